@@ -0,0 +1,428 @@
+import numpy as np
+from PinBallLayout import Layout, UniformGrid
+from PinBallFlippers import flipper_pose_cache
+
+
+class BatchGameEnvironment():
+    """
+    N independent pinball tables stepped together with NumPy.
+
+    Every per-table quantity of GameEnvironment (ball pose and velocity,
+    flipper angles and targets, remaining balls, counters) is stored as an
+    array of shape (N,). One call to play_step runs the same sequence as
+    GameEnvironment.play_step in headless mode for all tables at once:
+    flipper targets, flipper update, flipper / wall / top wall / bumper /
+    bottom collisions, drain, gravity, integration, stuck check, friction
+    and the speed clamp.
+
+    Tables whose last ball drains report done=True for that step and are
+    reset in place (auto-reset), so the batch always stays full.
+
+    physics_dt and frame_skip work as in GameEnvironment. With frame_skip > 1
+    a table that finishes an episode mid-step keeps ticking its new episode
+    for the rest of the step.
+    """
+    def __init__(self, num_envs = 1, width = 700, height = 1000, camera_height = 128, bottom_area_height = 150, ball_radius = 15, bumpers_radius=[25, 20, 20], max_ball_speed = 400, flipper_rotation_speed_frac = 1, seed = None, physics_dt = None, frame_skip = 1, layout = None):
+
+        # --- Constants and Configuration (same as GameEnvironment) ---
+        self.N = num_envs
+        self.WIDTH, self.HEIGHT = width, height
+        self.PLAYGROUND_HEIGHT = self.HEIGHT - bottom_area_height
+
+        self.FLIPPERs_Y = self.PLAYGROUND_HEIGHT - self.PLAYGROUND_HEIGHT//5
+        self.CAMERA_UPPER_BOUND  = self.FLIPPERs_Y - camera_height
+        self.BALL_RADIUS = ball_radius
+        self.BALL_INIT_X = self.WIDTH//2
+        self.BALL_INIT_Y = self.PLAYGROUND_HEIGHT //2
+        self.BUMPERS_RADIUS = bumpers_radius
+        self.INIT_SCORE = 0
+        self.INIT_N_BALLS = 1
+
+        self.FRICTION = 0.995
+        self.WALL_RESTITUTION = 0.98
+        self.GRAVITY = 0.1
+
+        self.GAME_FPS = 60
+        self.dt = 1/self.GAME_FPS if physics_dt is None else physics_dt
+        self.PHYSICS_DT = self.dt
+        self.TICK_FRAMES = self.PHYSICS_DT * self.GAME_FPS
+        self.frame_skip = frame_skip
+        self.MAX_SPEED_PX_PER_FRAME = (max_ball_speed/self.GAME_FPS)
+        self.MAX_SPEED_PX_PER_SEC = max_ball_speed
+
+        self.left_flipper_pivot = np.array([self.WIDTH//4 , self.PLAYGROUND_HEIGHT - self.PLAYGROUND_HEIGHT//5 ])
+        self.right_flipper_pivot = np.array([3*(self.WIDTH//4) , self.PLAYGROUND_HEIGHT - self.PLAYGROUND_HEIGHT//5 ])
+        self.FLIPPER_LENGTH = self.WIDTH//4 - (self.BALL_RADIUS *5//4)
+        self.FLIPPER_WIDTH = self.HEIGHT//80
+        self.LEFT_IDLE_ANGLE = 45
+        self.RIGHT_IDLE_ANGLE = 135
+        self.LEFT_ACTIVE_ANGLE = 0
+        self.RIGHT_ACTIVE_ANGLE = 180
+        self.FLIPPER_BOOST = 55.5
+        self.FLIPPER_ROTATION_SPEED = 500
+        self.flipper_rotation_speed_frac = flipper_rotation_speed_frac
+        # Collision segment tips per reachable flipper angle, as in GameEnvironment
+        step = self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES
+        self._left_flipper = flipper_pose_cache(tuple(self.left_flipper_pivot.tolist()), self.FLIPPER_LENGTH, self.FLIPPER_WIDTH,
+                                                False, self.LEFT_IDLE_ANGLE, self.LEFT_ACTIVE_ANGLE, step)
+        self._right_flipper = flipper_pose_cache(tuple(self.right_flipper_pivot.tolist()), self.FLIPPER_LENGTH, self.FLIPPER_WIDTH,
+                                                 True, self.RIGHT_IDLE_ANGLE, self.RIGHT_ACTIVE_ANGLE, step)
+
+        self.left_gap = self.left_flipper_pivot[0]
+        self.right_gap = self.right_flipper_pivot[0]
+
+        self.POS_REWARD = 10
+        self.NEG_REWARD = -10
+
+        # Obstacles as contiguous arrays (a Layout, a layout file, or None for the classic table)
+        if layout is None:
+            layout = Layout.classic(self.WIDTH, self.HEIGHT, self.BUMPERS_RADIUS)
+        elif not isinstance(layout, Layout):
+            layout = Layout.load(layout)
+        self.layout = layout
+        self.bumper_x = layout.bumpers['x'].copy()
+        self.bumper_y = layout.bumpers['y'].copy()
+        self.bumper_radius = layout.bumpers['radius'].copy()
+        self.bumper_bounce = layout.bumpers['bounce'].copy()
+        self.segment_ax = layout.segments['ax'].copy()
+        self.segment_ay = layout.segments['ay'].copy()
+        self.segment_bx = layout.segments['bx'].copy()
+        self.segment_by = layout.segments['by'].copy()
+        self.segment_restitution = layout.segments['restitution'].copy()
+        self.segment_kick = layout.segments['kick'].copy()
+        self.segment_reward = layout.segments['reward'].copy()
+
+        # Broad phase, same grids as GameEnvironment
+        self.GRID_CELL_SIZE = 4 * self.BALL_RADIUS
+        self._bumper_grid = UniformGrid(layout.bumper_boxes(self.BALL_RADIUS + 1), self.WIDTH, self.HEIGHT, self.GRID_CELL_SIZE)
+        self._segment_grid = UniformGrid(layout.segment_boxes(self.BALL_RADIUS + 1), self.WIDTH, self.HEIGHT, self.GRID_CELL_SIZE)
+
+        self.np_random = np.random.default_rng(seed)
+
+        # --- Per-table state, shape (N,) ---
+        n = self.N
+        self.ball_x = np.zeros(n)
+        self.ball_y = np.zeros(n)
+        self.ball_vx_px_per_frame = np.zeros(n)
+        self.ball_vy_px_per_frame = np.zeros(n)
+        self.left_flipper_angle = np.zeros(n)
+        self.right_flipper_angle = np.zeros(n)
+        self.left_flipper_target = np.zeros(n)
+        self.right_flipper_target = np.zeros(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.n_reamined_balls = np.zeros(n, dtype=np.int64)
+        self.reward = np.zeros(n)
+        self.cumulative_reward = np.zeros(n)
+        self.current_time = np.zeros(n)
+        self.time_tick_cnt = 0
+        self.episode_cnt = np.zeros(n, dtype=np.int64)
+        self.BALL_GOT_STUCK = np.zeros(n, dtype=bool)
+        self.left_success_hit = np.zeros(n, dtype=bool)
+        self.right_success_hit = np.zeros(n, dtype=bool)
+        self.single_episode_game_over = np.zeros(n, dtype=bool)
+
+        self.LEFT_FLIPPER_TOUCH_NUM = np.zeros(n, dtype=np.int64)
+        self.RIGHT_FLIPPER_TOUCH_NUM = np.zeros(n, dtype=np.int64)
+        self.LEFT_FLIPPER_SUCCESS_HIT_NUM = np.zeros(n, dtype=np.int64)
+        self.RIGHT_FLIPPER_SUCCESS_HIT_NUM = np.zeros(n, dtype=np.int64)
+        self.LEFT_FLIPPER_PRESS_NUM = np.zeros(n, dtype=np.int64)
+        self.RIGHT_FLIPPER_PRESS_NUM = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+
+    # --- Resets (mask selects the tables to reset, None means all) ---
+    def _mask(self, mask):
+        if mask is None:
+            return np.ones(self.N, dtype=bool)
+        return np.asarray(mask, dtype=bool)
+
+    def _reset_ball(self, mask=None):
+        mask = self._mask(mask)
+        k = int(mask.sum())
+        if k == 0:
+            return
+        self.ball_x[mask] = self.BALL_INIT_X
+        self.ball_y[mask] = self.BALL_INIT_Y
+        self.ball_vx_px_per_frame[mask] = self.np_random.integers(3, 11, size=k)
+        self.ball_vy_px_per_frame[mask] = self.np_random.integers(3, 11, size=k)
+
+    def _reset_flippers(self, mask=None):
+        mask = self._mask(mask)
+        self.left_flipper_angle[mask] = self.LEFT_IDLE_ANGLE
+        self.right_flipper_angle[mask] = self.RIGHT_IDLE_ANGLE
+        self.left_flipper_target[mask] = self.LEFT_IDLE_ANGLE
+        self.right_flipper_target[mask] = self.RIGHT_IDLE_ANGLE
+
+    def _reset(self, mask=None):
+        mask = self._mask(mask)
+        self.score[mask] = self.INIT_SCORE
+        self.n_reamined_balls[mask] = self.INIT_N_BALLS
+        self.reward[mask] = 0
+        self.cumulative_reward[mask] = 0
+        self._reset_ball(mask)
+        self.LEFT_FLIPPER_TOUCH_NUM[mask] = 0
+        self.RIGHT_FLIPPER_TOUCH_NUM[mask] = 0
+        self.LEFT_FLIPPER_SUCCESS_HIT_NUM[mask] = 0
+        self.RIGHT_FLIPPER_SUCCESS_HIT_NUM[mask] = 0
+        self.LEFT_FLIPPER_PRESS_NUM[mask] = 0
+        self.RIGHT_FLIPPER_PRESS_NUM[mask] = 0
+        self.left_success_hit[mask] = False
+        self.right_success_hit[mask] = False
+
+    def reset(self, mask=None):
+        """Start a new episode on the selected tables (all tables by default)."""
+        mask = self._mask(mask)
+        self._reset(mask)
+        self._reset_flippers(mask)
+        self.current_time[mask] = 0
+        self.single_episode_game_over[mask] = False
+
+
+    # --- Vectorized physics ---
+    def _update_flippers(self):
+        step = self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES
+        for angle, target in ((self.left_flipper_angle, self.left_flipper_target),
+                              (self.right_flipper_angle, self.right_flipper_target)):
+            up = angle < target
+            down = angle > target
+            angle[up] = np.minimum(angle[up] + step, target[up])
+            angle[down] = np.maximum(angle[down] - step, target[down])
+
+    def _flipper_collision(self, active, flipper, angle, touch_num, success_hit_num, success_hit):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            return
+        ax, ay = flipper.pivot
+        bx, by = flipper.segment_ends(angle[idx])
+        px, py = self.ball_x[idx], self.ball_y[idx]
+
+        # Point-segment distance
+        abx, aby = bx - ax, by - ay
+        ab2 = abx*abx + aby*aby
+        t = np.clip(((px - ax)*abx + (py - ay)*aby) / ab2, 0, 1)
+        cx, cy = ax + t*abx, ay + t*aby
+        dx, dy = px - cx, py - cy
+        dist = np.sqrt(dx*dx + dy*dy)
+
+        hit = (dist < self.BALL_RADIUS) & (dist != 0)
+        if not hit.any():
+            return
+        idx, cx, cy, dx, dy, dist = idx[hit], cx[hit], cy[hit], dx[hit], dy[hit], dist[hit]
+        nx, ny = dx / dist, dy / dist
+        vx, vy = self.ball_vx_px_per_frame[idx], self.ball_vy_px_per_frame[idx]
+        dot = vx*nx + vy*ny
+        self.ball_vx_px_per_frame[idx] = (vx - 2*dot*nx) * self.FLIPPER_BOOST
+        self.ball_vy_px_per_frame[idx] = (vy - 2*dot*ny) * self.FLIPPER_BOOST
+        self.ball_x[idx] = cx + nx * (self.BALL_RADIUS + 20)
+        self.ball_y[idx] = cy + ny * (self.BALL_RADIUS + 20)
+        touch_num[idx] += 1
+        success_hit_num[idx] += 1
+        success_hit[idx] = True
+
+    def _check_flippers_collision(self, action):
+        self.left_success_hit[:] = False
+        self.right_success_hit[:] = False
+        # Like GameEnvironment, only action 1 (left) and 2 (right) test the flippers
+        self._flipper_collision(action == 1, self._left_flipper, self.left_flipper_angle,
+                                self.LEFT_FLIPPER_TOUCH_NUM, self.LEFT_FLIPPER_SUCCESS_HIT_NUM, self.left_success_hit)
+        self._flipper_collision(action == 2, self._right_flipper, self.right_flipper_angle,
+                                self.RIGHT_FLIPPER_TOUCH_NUM, self.RIGHT_FLIPPER_SUCCESS_HIT_NUM, self.right_success_hit)
+
+    def _check_wall_collidepoint(self):
+        left = self.ball_x - self.BALL_RADIUS <= 0
+        self.ball_x[left] = self.BALL_RADIUS
+        self.ball_vx_px_per_frame[left] = -self.ball_vx_px_per_frame[left] * self.WALL_RESTITUTION
+        right = self.ball_x + self.BALL_RADIUS >= self.WIDTH
+        self.ball_x[right] = self.WIDTH - self.BALL_RADIUS
+        self.ball_vx_px_per_frame[right] = -self.ball_vx_px_per_frame[right] * self.WALL_RESTITUTION
+
+    def _check_top_wall_collision(self):
+        top = self.ball_y - self.BALL_RADIUS <= 0
+        self.ball_y[top] = self.BALL_RADIUS
+        slow = top & (np.abs(self.ball_vy_px_per_frame) < 0.2)
+        bounce = top & ~slow
+        self.ball_vy_px_per_frame[slow] = 0.2
+        self.ball_vy_px_per_frame[bounce] = -self.ball_vy_px_per_frame[bounce] * self.WALL_RESTITUTION
+
+    def _broadphase(self, grid, respond):
+        """
+        Visit, for every table, the obstacles listed in the grid cell of its ball,
+        in index order as GameEnvironment does. respond(rows, j) tests obstacle j[k]
+        against the ball of table rows[k], applies the hits and returns the hit mask.
+        A ball that was moved is looked up again in its new cell, from the next
+        obstacle index on.
+        """
+        cells = grid.cells_of(self.ball_x, self.ball_y)
+        rows = np.flatnonzero(grid.padded[cells, 0] >= 0)
+        cells = cells[rows]
+        last = np.full(rows.size, -1, dtype=np.int64)
+        while rows.size:
+            candidates = grid.padded[cells]
+            later = candidates > last[:, None]
+            left = later.any(axis=1)
+            if not left.all():
+                rows, cells, last, candidates, later = rows[left], cells[left], last[left], candidates[left], later[left]
+                if rows.size == 0:
+                    break
+            last = candidates[np.arange(rows.size), later.argmax(axis=1)]
+            hit = respond(rows, last)
+            if hit is not None:
+                cells[hit] = grid.cells_of(self.ball_x[rows[hit]], self.ball_y[rows[hit]])
+
+    def _respond_bumpers(self, idx, j):
+        bx, by, br, bounce = self.bumper_x[j], self.bumper_y[j], self.bumper_radius[j], self.bumper_bounce[j]
+        dx = self.ball_x[idx] - bx
+        dy = self.ball_y[idx] - by
+        dist = np.sqrt(dx**2 + dy**2)
+        hit = dist < self.BALL_RADIUS + br
+        if not hit.any():
+            return None
+        idx, bx, by, br, bounce, dx, dy, dist = idx[hit], bx[hit], by[hit], br[hit], bounce[hit], dx[hit], dy[hit], dist[hit]
+        nonzero = dist != 0
+        nx = np.where(nonzero, dx / np.where(nonzero, dist, 1), dx)
+        ny = np.where(nonzero, dy / np.where(nonzero, dist, 1), dy)
+        vx, vy = self.ball_vx_px_per_frame[idx], self.ball_vy_px_per_frame[idx]
+        dot = vx*nx + vy*ny
+        self.ball_vx_px_per_frame[idx] = (vx - 2*dot*nx) * bounce
+        self.ball_vy_px_per_frame[idx] = (vy - 2*dot*ny) * bounce
+        self.ball_x[idx] = bx + nx*(self.BALL_RADIUS + br + 1)
+        self.ball_y[idx] = by + ny*(self.BALL_RADIUS + br + 1)
+        self.reward[idx] += self.POS_REWARD
+        return hit
+
+    def _respond_segments(self, idx, j):
+        ax, ay, bx, by = self.segment_ax[j], self.segment_ay[j], self.segment_bx[j], self.segment_by[j]
+        px, py = self.ball_x[idx], self.ball_y[idx]
+        # Point-segment distance
+        abx, aby = bx - ax, by - ay
+        ab2 = abx*abx + aby*aby
+        t = np.clip(((px - ax)*abx + (py - ay)*aby) / np.where(ab2 == 0, 1, ab2), 0, 1)
+        cx, cy = ax + t*abx, ay + t*aby
+        dx, dy = px - cx, py - cy
+        dist = np.sqrt(dx*dx + dy*dy)
+        hit = (dist < self.BALL_RADIUS) & (dist != 0)
+        if not hit.any():
+            return None
+        idx, j, cx, cy, dx, dy, dist = idx[hit], j[hit], cx[hit], cy[hit], dx[hit], dy[hit], dist[hit]
+        nx, ny = dx / dist, dy / dist
+        vx, vy = self.ball_vx_px_per_frame[idx], self.ball_vy_px_per_frame[idx]
+        dot = vx*nx + vy*ny
+        # Reflect only balls moving into the segment
+        dot = np.where(dot < 0, dot, 0)
+        self.ball_vx_px_per_frame[idx] = (vx - 2*dot*nx) * self.segment_restitution[j] + self.segment_kick[j] * nx
+        self.ball_vy_px_per_frame[idx] = (vy - 2*dot*ny) * self.segment_restitution[j] + self.segment_kick[j] * ny
+        self.ball_x[idx] = cx + nx * (self.BALL_RADIUS + 1)
+        self.ball_y[idx] = cy + ny * (self.BALL_RADIUS + 1)
+        self.reward[idx] += self.segment_reward[j]
+        return hit
+
+    def _check_bumpers_collision(self):
+        # Bumpers are applied one after another, as in GameEnvironment
+        self._broadphase(self._bumper_grid, self._respond_bumpers)
+
+    def _check_segments_collision(self):
+        self._broadphase(self._segment_grid, self._respond_segments)
+
+    def _check_bottom_collision(self):
+        in_gap = (self.left_gap <= self.ball_x) & (self.ball_x <= self.right_gap)
+        hit = (self.ball_y + self.BALL_RADIUS >= self.left_flipper_pivot[1]) & ~in_gap
+        self.ball_y[hit] = self.left_flipper_pivot[1] - self.BALL_RADIUS
+        self.ball_vy_px_per_frame[hit] = -self.ball_vy_px_per_frame[hit] * self.WALL_RESTITUTION
+
+    def _check_drain(self):
+        in_gap = (self.left_gap <= self.ball_x) & (self.ball_x <= self.right_gap)
+        drained = (self.ball_y + self.BALL_RADIUS >= self.left_flipper_pivot[1]+self.FLIPPER_LENGTH) & in_gap
+        self.n_reamined_balls[drained] -= 1
+        lost_ball = drained & (self.n_reamined_balls > 0)
+        self.reward[lost_ball] += self.NEG_REWARD
+        self._reset_ball(lost_ball)
+
+        game_over = drained & ~lost_ball
+        self.single_episode_game_over[:] = game_over
+        if game_over.any():
+            self.current_time[game_over] = 0
+            self.episode_cnt[game_over] += 1
+            self._reset(game_over)
+        return game_over
+
+    def _check_if_the_ball_got_stuck_at_the_bottom(self):
+        return ((np.round(np.abs(self.ball_vx_px_per_frame), 1) == 0)
+                & (np.round(np.abs(self.ball_vy_px_per_frame), 1) == 0)
+                & (self.ball_y + self.BALL_RADIUS >= self.right_flipper_pivot[1]))
+
+    def play_step(self, action):
+        """
+        action: integer array of shape (N,) with values in {0,1,2,3} (see GameEnvironment.play_step).
+        Returns (reward, done, left_success_hit, right_success_hit), each of shape (N,),
+        summed / or-ed over the frame_skip ticks of the step.
+        done is True on the step a table loses its last ball; that table is reset in place.
+        """
+        action = np.asarray(action)
+
+        # --- Set flipper target angles based on action ---
+        left_on = (action == 1) | (action == 3)
+        right_on = (action == 2) | (action == 3)
+        self.left_flipper_target[:] = np.where(left_on, self.LEFT_ACTIVE_ANGLE, self.LEFT_IDLE_ANGLE)
+        self.right_flipper_target[:] = np.where(right_on, self.RIGHT_ACTIVE_ANGLE, self.RIGHT_IDLE_ANGLE)
+        self.LEFT_FLIPPER_PRESS_NUM += left_on
+        self.RIGHT_FLIPPER_PRESS_NUM += right_on
+
+        if self.frame_skip == 1:
+            done = self._tick(action)
+            return self.reward.copy(), done, self.left_success_hit.copy(), self.right_success_hit.copy()
+
+        reward = np.zeros(self.N)
+        done = np.zeros(self.N, dtype=bool)
+        left_success_hit = np.zeros(self.N, dtype=bool)
+        right_success_hit = np.zeros(self.N, dtype=bool)
+        for _ in range(self.frame_skip):
+            done |= self._tick(action)
+            reward += self.reward
+            left_success_hit |= self.left_success_hit
+            right_success_hit |= self.right_success_hit
+        return reward, done, left_success_hit, right_success_hit
+
+    def _tick(self, action):
+        """One physics tick for all tables; returns the game-over mask."""
+        self.reward[:] = 0
+
+        self._update_flippers()
+
+        self._check_flippers_collision(action)
+        self._check_wall_collidepoint()
+        self._check_top_wall_collision()
+        self._check_bumpers_collision()
+        if len(self.segment_ax):
+            self._check_segments_collision()
+        self._check_bottom_collision()
+        done = self._check_drain()
+
+        self.current_time += self.dt
+        self.time_tick_cnt += 1
+
+        # --- Apply Gravity ---
+        self.ball_vy_px_per_frame += self.GRAVITY * self.TICK_FRAMES
+
+        # --- Update Ball Position ---
+        self.ball_x += self.ball_vx_px_per_frame * self.TICK_FRAMES
+        self.ball_y += self.ball_vy_px_per_frame * self.TICK_FRAMES
+
+        self.BALL_GOT_STUCK[:] = self._check_if_the_ball_got_stuck_at_the_bottom()
+        self._reset_ball(self.BALL_GOT_STUCK)
+
+        # --- Apply Friction ---
+        friction = self.FRICTION ** self.TICK_FRAMES
+        self.ball_vx_px_per_frame *= friction
+        self.ball_vy_px_per_frame *= friction
+
+        # --- Enforce Maximum Speed ---
+        speed = np.sqrt(self.ball_vx_px_per_frame**2 + self.ball_vy_px_per_frame**2)
+        fast = speed > self.MAX_SPEED_PX_PER_FRAME
+        factor = self.MAX_SPEED_PX_PER_FRAME / speed[fast]
+        self.ball_vx_px_per_frame[fast] *= factor
+        self.ball_vy_px_per_frame[fast] *= factor
+
+        self.cumulative_reward += self.reward
+
+        return done
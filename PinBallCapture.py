@@ -0,0 +1,267 @@
+import glob
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zipfile
+import zlib
+import numpy as np
+
+from PinBallTrajectory import next_index
+
+# One record per stored frame
+FRAME_DTYPE = np.dtype([
+    ('frame', '<i8'),                   # Capture number in this recording (gaps: dropped frames)
+    ('time_tick_cnt', '<i8'),
+    ('episode_cnt', '<i4'),
+])
+
+CHUNK_PATTERN = 'chunk_{:06d}'          # .npz (frames and records), or .npy (records) next to the PNGs
+PNG_PATTERN = 'frame_{:08d}.png'
+
+
+def encode_png(frame, level = 6):
+    """PNG file contents of a uint8 (H, W) grayscale or (H, W, 3) RGB frame (zlib, Sub filter on every row)."""
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    height, width = frame.shape[:2]
+    channels = 1 if frame.ndim == 2 else frame.shape[2]
+    rows = frame.reshape(height, width * channels)
+    filtered = np.empty((height, width * channels + 1), dtype=np.uint8)
+    filtered[:, 0] = 1                  # Sub: each byte minus the byte of the pixel to its left
+    filtered[:, 1:channels + 1] = rows[:, :channels]
+    np.subtract(rows[:, channels:], rows[:, :-channels], out=filtered[:, channels + 1:])
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+    color_type = 0 if channels == 1 else 2
+    header = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(filtered, level)) + chunk(b'IEND', b''))
+
+
+def save_npz(file, level = 1, **arrays):
+    """
+    np.savez with a chosen zlib level (0: stored); np.load reads the result.
+    The arrays are handed to zlib as buffers: no bytes copy, which would hold the GIL.
+    """
+    compression = zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED
+    with zipfile.ZipFile(file, 'w', compression=compression, compresslevel=level or None, allowZip64=True) as zf:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            with zf.open(name + '.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array_header_1_0(member, np.lib.format.header_data_from_array_1_0(array))
+                member.write(memoryview(array.reshape(-1).view(np.uint8)))
+
+
+def _window_frame(screen):
+    # The window as raw bytes plus what is needed to decode them, a plain memory copy (see _decode).
+    # Turning 32-bit pixels into RGB is left to the writer thread
+    if screen.get_bytesize() == 4:
+        shifts = screen.get_shifts()[:3]
+        return (screen.get_buffer().raw, screen.get_height(), screen.get_width(), screen.get_pitch(),
+                tuple(shift // 8 for shift in shifts))
+    import pygame
+    return pygame.image.tobytes(screen, 'RGB'), screen.get_height(), screen.get_width(), None, None
+
+
+def _decode(frame):
+    if isinstance(frame, np.ndarray):
+        return frame
+    data, height, width, pitch, channel_bytes = frame
+    pixels = np.frombuffer(data, dtype=np.uint8)
+    if pitch is None:
+        return pixels.reshape(height, width, 3)
+    pixels = pixels.reshape(height, pitch)[:, :width * 4].reshape(height, width, 4)
+    return pixels[..., list(channel_bytes)]
+
+
+class FrameRecorder():
+    """
+    Records rendered frames of a GameEnvironment into chunk files from a background thread.
+
+    capture(env), called by play_step, copies one frame into a bounded queue.
+    For source='window' that is a raw copy of the window pixels (the frame
+    drawn by the last render); for source='fov' it is a copy of
+    get_fov_frame(downscale, grayscale). A writer thread turns the frames into
+    files, so the compression (zlib, which releases the GIL) does not run in
+    the game loop:
+
+    format='npz': every chunk_size frames one chunk_000000.npz in `directory`,
+    with `frames` (N, H, W[, 3]) uint8 and `records` (FRAME_DTYPE).
+    format='png': one frame_00000000.png per frame, and every chunk_size frames
+    a chunk_000000.npy of their FRAME_DTYPE records.
+    compress: a zlib level, True for 1 (the fastest, about twice the size of
+    level 6 on table frames), False to store the pixels uncompressed.
+
+    When the writer falls queue_size frames behind, policy='block' makes
+    capture wait for a free slot (backpressure: every frame is kept) and
+    policy='drop' skips the frame (the game loop never waits; the skipped
+    capture numbers are missing from the records). every: capture one
+    play_step out of `every`.
+
+    Recording into an existing directory continues after its highest-numbered
+    chunk and PNG.
+    An error in the writer thread is raised by the next capture() or close().
+    frames_captured, frames_dropped, frames_written, wait_s: counters.
+    """
+    def __init__(self, directory, source = 'window', format = 'npz', chunk_size = 64, queue_size = 64,
+                 policy = 'block', compress = True, every = 1, downscale = 1, grayscale = False):
+        if source not in ('window', 'fov'):
+            raise ValueError(f"source must be 'window' or 'fov', not {source!r}")
+        if format not in ('npz', 'png'):
+            raise ValueError(f"format must be 'npz' or 'png', not {format!r}")
+        if policy not in ('block', 'drop'):
+            raise ValueError(f"policy must be 'block' or 'drop', not {policy!r}")
+        self.directory = directory
+        self.source = source
+        self.format = format
+        self.chunk_size = chunk_size
+        self.policy = policy
+        self.level = int(compress) if not isinstance(compress, bool) else (1 if compress else 0)
+        self.every = every
+        self.downscale = downscale
+        self.grayscale = grayscale
+        os.makedirs(directory, exist_ok=True)
+        self.chunk_cnt = next_index(glob.glob(os.path.join(directory, 'chunk_*.np[yz]')))
+        self.png_cnt = next_index(glob.glob(os.path.join(directory, 'frame_*.png')))
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_written = 0
+        self.wait_s = 0.0                   # Time capture() spent waiting for the writer (policy='block')
+        self._countdown = 1
+        self._error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="PinBallFrameWriter", daemon=True)
+        self._thread.start()
+
+    def capture(self, env):
+        """Queue the current frame of env (every `every` calls). Returns False if it was dropped."""
+        if self._error is not None:
+            raise self._error
+        self._countdown -= 1
+        if self._countdown > 0:
+            return True
+        self._countdown = self.every
+        if self.source == 'fov':
+            frame = env.get_fov_frame(self.downscale, self.grayscale).copy()
+        elif env.screen is not None:
+            frame = _window_frame(env.screen)
+        else:
+            return True                     # No window to copy (headless and never rendered)
+        item = (frame, self.frames_captured, env.time_tick_cnt, env.episode_cnt)
+        self.frames_captured += 1
+        if self.policy == 'drop':
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.frames_dropped += 1
+                return False
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                t0 = time.perf_counter()
+                self._queue.put(item)
+                self.wait_s += time.perf_counter() - t0
+        return True
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def close(self):
+        """Write the queued frames and the last, partial chunk and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        # On Linux a thread has its own nice value: let the game loop win a busy core, so
+        # on a single CPU the writer only uses the time the frame limiter sleeps
+        if sys.platform.startswith('linux'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except OSError:
+                pass
+        frames, records = [], []
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                continue                    # Keep draining, so capture() never blocks on a dead writer
+            frame, number, tick, episode = item
+            try:
+                if self.format == 'png':
+                    self._write_png(_decode(frame))
+                else:
+                    frames.append(_decode(frame))
+                records.append((number, tick, episode))
+                if len(records) == self.chunk_size:
+                    self._write_chunk(frames, records)
+                    frames, records = [], []
+            except Exception as error:
+                self._error = error
+        if records and self._error is None:
+            try:
+                self._write_chunk(frames, records)
+            except Exception as error:
+                self._error = error
+
+    def _write_png(self, frame):
+        path = os.path.join(self.directory, PNG_PATTERN.format(self.png_cnt))
+        with open(path, 'wb') as f:
+            f.write(encode_png(frame, self.level))
+        self.png_cnt += 1
+
+    def _write_chunk(self, frames, records):
+        records = np.array(records, dtype=FRAME_DTYPE)
+        name = os.path.join(self.directory, CHUNK_PATTERN.format(self.chunk_cnt))
+        if self.format == 'png':
+            np.save(name + '.npy', records)
+        else:
+            # Written under a temporary name, so a reader never sees a partial chunk
+            with open(name + '.tmp', 'wb') as f:
+                save_npz(f, self.level, frames=np.stack(frames), records=records)
+            os.replace(name + '.tmp', name + '.npz')
+        self.chunk_cnt += 1
+        self.frames_written += len(records)
+
+
+def decode_png(data):
+    """Frame of a PNG written by encode_png (8-bit grayscale or RGB, Sub filter)."""
+    width, height, depth, color_type = struct.unpack('>IIBB', data[16:26])
+    if depth != 8 or color_type not in (0, 2):
+        raise ValueError("not a PNG written by encode_png")
+    pos, idat = 8, b''
+    while pos < len(data):
+        length, tag = struct.unpack('>I4s', data[pos:pos + 8])
+        if tag == b'IDAT':
+            idat += data[pos + 8:pos + 8 + length]
+        pos += length + 12
+    channels = 1 if color_type == 0 else 3
+    filtered = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * channels + 1)
+    if (filtered[:, 0] != 1).any():
+        raise ValueError("not a PNG written by encode_png")
+    # Undo Sub: running sum along each row, per channel, modulo 256
+    frame = np.cumsum(filtered[:, 1:].reshape(height, width, channels), axis=1, dtype=np.uint8)
+    return frame[..., 0] if channels == 1 else frame
+
+
+def iter_frames(directory):
+    """(record, frame) of every frame stored by FrameRecorder in `directory`, in order."""
+    pngs = iter(sorted(glob.glob(os.path.join(directory, 'frame_*.png'))))
+    for path in sorted(glob.glob(os.path.join(directory, 'chunk_*.np[yz]'))):
+        if path.endswith('.npz'):
+            with np.load(path) as chunk:
+                frames, records = chunk['frames'], chunk['records']
+            yield from zip(records, frames)
+        else:
+            for record in np.load(path):
+                with open(next(pngs), 'rb') as f:
+                    yield record, decode_png(f.read())
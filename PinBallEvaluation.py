@@ -0,0 +1,306 @@
+"""
+Parallel policy evaluation.
+
+Plays one episode per seed on fresh headless tables, spread over a pool of
+worker processes, and streams a record per episode back as soon as it ends
+(EPISODE_DTYPE: duration, reward, flipper touches / successful hits /
+presses per side, ...). EpisodeStats aggregates the records incrementally,
+so the running means are known while the evaluation goes on and nothing
+but the per-episode rows is kept.
+
+A policy is a zero-argument factory, called once in every worker, that
+returns policy(game, rng) -> action. rng is a numpy Generator seeded with
+the episode seed, so an evaluation is reproducible for any worker count.
+A factory can load a checkpoint once per worker. On the command line it is
+given as module:name (the module must be importable from the workers),
+or as one of the built-in policies:
+  random     uniform random action on every step
+  idle       never press a flipper
+  bot        press the flipper on the ball's side while it falls towards the flippers
+  predictor  ArrivalPredictor.flip_action: press when the ball reaches the drain gap within a few ticks
+
+    python PinBallEvaluation.py --policy bot --episodes 10000 [--workers 8] [--env width=256 height=656] [--out eval.npy]
+"""
+import argparse
+import ast
+import importlib
+import math
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+
+from PinBallGameEnvironment import GameEnvironment
+
+# One record per evaluated episode
+EPISODE_DTYPE = np.dtype([
+    ('seed', '<i8'),
+    ('steps', '<i8'),                               # play_step calls
+    ('duration_s', '<f8'),                          # Simulated time (physics ticks * PHYSICS_DT)
+    ('wall_s', '<f8'),                              # Wall time of the episode, policy included
+    ('score', '<i8'),
+    ('cumulative_reward', '<f8'),
+    ('LEFT_FLIPPER_TOUCH_NUM', '<i8'), ('RIGHT_FLIPPER_TOUCH_NUM', '<i8'),
+    ('LEFT_FLIPPER_SUCCESS_HIT_NUM', '<i8'), ('RIGHT_FLIPPER_SUCCESS_HIT_NUM', '<i8'),
+    ('LEFT_FLIPPER_PRESS_NUM', '<i8'), ('RIGHT_FLIPPER_PRESS_NUM', '<i8'),
+    ('truncated', '?'),                             # Stopped after max_steps with balls left
+])
+
+# Copied from the environment at the end of an episode
+COUNTERS = ('score', 'cumulative_reward',
+            'LEFT_FLIPPER_TOUCH_NUM', 'RIGHT_FLIPPER_TOUCH_NUM',
+            'LEFT_FLIPPER_SUCCESS_HIT_NUM', 'RIGHT_FLIPPER_SUCCESS_HIT_NUM',
+            'LEFT_FLIPPER_PRESS_NUM', 'RIGHT_FLIPPER_PRESS_NUM')
+
+
+# --- Built-in policies (factories: policy() -> policy(game, rng) -> action) ---
+class RandomPolicy():
+    def __call__(self):
+        return lambda game, rng: int(rng.integers(0, 4))
+
+
+class IdlePolicy():
+    def __call__(self):
+        return lambda game, rng: 0
+
+
+class BotPolicy():
+    def __call__(self):
+        def bot(game, rng):
+            if game.ball_vy_px_per_frame > 0 and game.ball_y > game.FLIPPERs_Y - 3 * game.BALL_RADIUS:
+                return 1 if game.ball_x < game.WIDTH / 2 else 2
+            return 0
+        return bot
+
+
+class PredictorPolicy():
+    def __init__(self, lead_ticks = 4):
+        self.lead_ticks = lead_ticks
+
+    def __call__(self):
+        from PinBallPredictor import ArrivalPredictor
+        lead_ticks = self.lead_ticks
+        predictors = {}                 # One per table geometry; every episode of a run uses the same one
+
+        def predictor(game, rng):
+            key = (game.WIDTH, game.HEIGHT, game.BALL_RADIUS, game.PHYSICS_DT, game.MAX_SPEED_PX_PER_FRAME)
+            if key not in predictors:
+                # flip_action only looks lead_ticks ahead; a ball moves at most `reach` px towards the line in that time
+                p = ArrivalPredictor(game, max_ticks=lead_ticks)
+                predictors[key] = p, lead_ticks * (p.MAX_SPEED_PX_PER_FRAME + p.gravity_step) * p.k
+            p, reach = predictors[key]
+            if p.line_y - game.ball_y > reach:
+                return 0
+            return p.flip_action(game, lead_ticks)
+        return predictor
+
+
+POLICIES = {'random': RandomPolicy, 'idle': IdlePolicy, 'bot': BotPolicy, 'predictor': PredictorPolicy}
+
+
+def load_policy(spec):
+    """Policy factory for a built-in name or a 'module:name' spec."""
+    if spec in POLICIES:
+        return POLICIES[spec]()
+    module, sep, name = spec.partition(':')
+    if not sep:
+        raise ValueError(f"unknown policy {spec!r} (expected one of {', '.join(POLICIES)} or module:name)")
+    return getattr(importlib.import_module(module), name)
+
+
+# --- Episodes ---
+def run_episode(policy, seed, env_kwargs = None, max_steps = 20_000, metrics = None):
+    """
+    Play one episode of `policy` (policy(game, rng) -> action) on a fresh
+    headless table seeded with `seed`. Returns an EPISODE_DTYPE record.
+    metrics: a PinBallMetrics.MetricsWriter the table publishes to.
+    """
+    t0 = time.perf_counter()
+    kwargs = dict({'headless': True, 'verbose': False}, **(env_kwargs or {}))
+    kwargs.update(num_episodes=1, seed=seed, metrics=metrics)
+    game = GameEnvironment(**kwargs)
+    rng = np.random.default_rng(seed)
+    steps = 0
+    game_over = False
+    # With num_episodes=1 the table keeps its counters when the last ball drains
+    while not game_over and steps < max_steps:
+        game_over = game.play_step(policy(game, rng))[1]
+        steps += 1
+    record = np.zeros((), dtype=EPISODE_DTYPE)
+    record['seed'] = seed
+    record['steps'] = steps
+    record['duration_s'] = game.time_tick_cnt * game.PHYSICS_DT
+    for name in COUNTERS:
+        record[name] = getattr(game, name)
+    record['truncated'] = not game_over
+    game.close()
+    record['wall_s'] = time.perf_counter() - t0
+    return record[()]
+
+
+# Per-worker state, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(policy_factory, env_kwargs, max_steps, metrics = None, next_row = None):
+    _worker['policy'] = load_policy(policy_factory)() if isinstance(policy_factory, str) else policy_factory()
+    _worker['env_kwargs'] = env_kwargs
+    _worker['max_steps'] = max_steps
+    _worker['metrics'] = None
+    if metrics is not None:
+        from PinBallMetrics import MetricsBlock
+        block = MetricsBlock.attach(metrics)
+        if next_row is None:
+            row = 0
+        else:
+            with next_row.get_lock():
+                row = next_row.value
+                next_row.value += 1
+        _worker['block'] = block
+        _worker['metrics'] = block.writer(row)
+
+
+def _run_seed(seed):
+    return run_episode(_worker['policy'], seed, _worker['env_kwargs'], _worker['max_steps'], _worker['metrics'])
+
+
+def iter_episodes(policy, episodes, seed = 0, workers = None, env_kwargs = None, max_steps = 20_000, chunksize = 4,
+                  metrics = None):
+    """
+    Evaluate `policy` on `episodes` episodes seeded seed, seed+1, ... and
+    yield their EPISODE_DTYPE records in the order they finish.
+
+    policy: built-in name, 'module:name' spec, or a picklable zero-argument factory.
+    workers: worker processes (default os.cpu_count(); 1 runs in this process).
+    env_kwargs: extra GameEnvironment arguments (table size, frame_skip, layout, ...).
+    max_steps: play_step calls after which an episode is cut off (truncated=True).
+    chunksize: episodes handed to a worker at a time.
+    metrics: name of a PinBallMetrics.MetricsBlock with a row per worker; each
+             worker publishes its live counters into its own row.
+    """
+    seeds = range(seed, seed + episodes)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(policy, env_kwargs, max_steps, metrics)
+        try:
+            for s in seeds:
+                yield _run_seed(s)
+        finally:
+            if metrics is not None:
+                _worker['metrics'].close()
+                _worker.pop('block').close()
+        return
+    ctx = mp.get_context()
+    with ctx.Pool(workers, _init_worker, (policy, env_kwargs, max_steps, metrics, ctx.Value('i', 0))) as pool:
+        yield from pool.imap_unordered(_run_seed, seeds, chunksize)
+
+
+class EpisodeStats():
+    """
+    Running mean, standard deviation, minimum and maximum of every numeric
+    EPISODE_DTYPE field (Welford's update), plus totals for the success rates.
+    add() takes one record at a time; memory does not grow with the episode count.
+    """
+    FIELDS = tuple(name for name in EPISODE_DTYPE.names if name not in ('seed', 'truncated'))
+
+    def __init__(self):
+        k = len(self.FIELDS)
+        self.n = 0
+        self.truncated = 0
+        self.mean = np.zeros(k)
+        self._m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.total = np.zeros(k)
+
+    def add(self, record):
+        x = np.array([record[name] for name in self.FIELDS], dtype=np.float64)
+        self.n += 1
+        self.truncated += bool(record['truncated'])
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+        self.total += x
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else np.zeros_like(self.mean)
+
+    def success_rate(self, side):
+        """Successful hits per flipper touch over all episodes so far ('LEFT' or 'RIGHT'; nan before any touch)."""
+        touches = self.total[self.FIELDS.index(f'{side}_FLIPPER_TOUCH_NUM')]
+        hits = self.total[self.FIELDS.index(f'{side}_FLIPPER_SUCCESS_HIT_NUM')]
+        return hits / touches if touches else math.nan
+
+    def summary(self):
+        """{field: {'mean', 'std', 'min', 'max'}} plus 'episodes', 'truncated' and the per-side success rates."""
+        out = {'episodes': self.n, 'truncated': self.truncated,
+               'left_success_rate': self.success_rate('LEFT'), 'right_success_rate': self.success_rate('RIGHT')}
+        for i, name in enumerate(self.FIELDS):
+            out[name] = {'mean': self.mean[i], 'std': self.std[i], 'min': self.min[i], 'max': self.max[i]}
+        return out
+
+    def table(self):
+        """summary() as a text table."""
+        lines = [f"{'field':<32}{'mean':>12}{'std':>12}{'min':>12}{'max':>12}"]
+        for i, name in enumerate(self.FIELDS):
+            lines.append(f"{name:<32}{self.mean[i]:>12.3f}{self.std[i]:>12.3f}{self.min[i]:>12.3f}{self.max[i]:>12.3f}")
+        lines.append(f"episodes {self.n}, truncated {self.truncated}, "
+                     f"success rate left {self.success_rate('LEFT'):.3f} right {self.success_rate('RIGHT'):.3f}")
+        return "\n".join(lines)
+
+
+def parse_env_kwargs(items):
+    """['width=256', 'frame_skip=4', 'layout=layouts/x.json'] -> dict (values as Python literals where possible)."""
+    kwargs = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"expected key=value, got {item!r}")
+        try:
+            kwargs[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            kwargs[key] = value
+    return kwargs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policy", default="random", help=f"{', '.join(POLICIES)} or module:factory")
+    parser.add_argument("--episodes", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode; episode i uses seed + i")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-steps", type=int, default=20_000, help="play_step calls after which an episode is cut off")
+    parser.add_argument("--chunksize", type=int, default=4, help="episodes handed to a worker at a time")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="GameEnvironment arguments")
+    parser.add_argument("--every", type=int, default=100, help="print the running means every N episodes")
+    parser.add_argument("--out", help="write the per-episode records (sorted by seed) to this .npy file")
+    parser.add_argument("--metrics", metavar="NAME",
+                        help="publish live worker metrics to a shared-memory block of this name (see PinBallMetrics.py)")
+    args = parser.parse_args()
+
+    stats = EpisodeStats()
+    records = np.zeros(args.episodes, dtype=EPISODE_DTYPE)
+    reward, duration = EpisodeStats.FIELDS.index('cumulative_reward'), EpisodeStats.FIELDS.index('duration_s')
+    block = None
+    if args.metrics:
+        from PinBallMetrics import MetricsBlock
+        block = MetricsBlock(args.workers, name=args.metrics)
+    t0 = time.perf_counter()
+    for record in iter_episodes(args.policy, args.episodes, args.seed, args.workers, parse_env_kwargs(args.env),
+                                args.max_steps, args.chunksize, args.metrics):
+        records[stats.n] = record
+        stats.add(record)
+        if stats.n % args.every == 0 or stats.n == args.episodes:
+            elapsed = time.perf_counter() - t0
+            print(f"{stats.n:>8}/{args.episodes}  reward {stats.mean[reward]:9.2f}  duration {stats.mean[duration]:8.2f} s  "
+                  f"success L {stats.success_rate('LEFT'):.3f} R {stats.success_rate('RIGHT'):.3f}  "
+                  f"{stats.n / elapsed:7.1f} episodes/s", flush=True)
+    print(stats.table())
+    if block is not None:
+        block.close()
+    if args.out:
+        np.save(args.out, np.sort(records, order='seed'))
+        print(f"records written to {args.out}")
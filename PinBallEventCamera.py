@@ -0,0 +1,114 @@
+import numpy as np
+from PinBallFovRenderer import FovRenderer
+
+# One address-event: pixel (x, y) in the FOV, timestamp in microseconds of
+# simulated time, polarity +1 (brighter) / -1 (darker)
+EVENT_DTYPE = np.dtype([('x', '<u2'), ('y', '<u2'), ('t', '<i8'), ('p', 'i1')])
+
+
+class EventCamera():
+    """
+    Dynamic vision sensor (DVS) emulator on top of the camera FOV.
+
+    Each update() rasterizes the FOV in grayscale and compares the log
+    intensity of every pixel with its reference level, the level at its last
+    event. Pixels whose log intensity changed by at least `threshold` emit
+    one event with the sign of the change, and their reference is moved to
+    the new level. Only pixels that changed since the previous frame can
+    cross the threshold, so the comparison runs on those pixels only.
+
+    Events go into a fixed-size ring buffer of EVENT_DTYPE records. When the
+    buffer is full the oldest events are overwritten and counted in
+    `dropped`. read() returns the events since the previous read, oldest first.
+    No full-frame temporaries are allocated per update.
+    """
+    def __init__(self, env, threshold = 0.2, downscale = 1, capacity = 1 << 20, eps = 1e-2):
+        self.env = env
+        self.threshold = threshold
+        self.renderer = FovRenderer(env, downscale=downscale, grayscale=True)
+        shape = self.renderer.out.shape
+        self.width = shape[1]
+
+        # log(I + eps) for every uint8 intensity, looked up instead of calling np.log per frame
+        self._log_lut = np.log(np.arange(256, dtype=np.float32) / 255 + np.float32(eps)).astype(np.float32)
+        self._prev = np.zeros(shape, dtype=np.uint8)
+        self._ref = np.empty(shape, dtype=np.float32)
+        self._changed = np.empty(shape, dtype=bool)
+        self._initialized = False
+
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.head = 0             # next write position
+        self.size = 0             # unread events in the buffer
+        self.dropped = 0          # events overwritten before they were read
+        self.events_total = 0
+        self.t_us = 0.0           # simulated time of the last update, in microseconds
+
+    def reset(self):
+        """Forget the reference frame and all unread events."""
+        self._initialized = False
+        self.head = 0
+        self.size = 0
+
+    def _push(self, index, polarity, t):
+        n = len(index)
+        if n == 0:
+            return
+        if n > self.capacity:
+            index, polarity = index[-self.capacity:], polarity[-self.capacity:]
+            self.dropped += n - self.capacity
+            self.events_total += n - self.capacity
+            n = self.capacity
+        first = min(n, self.capacity - self.head)
+        for src, dst in ((slice(0, first), slice(self.head, self.head + first)),
+                         (slice(first, n), slice(0, n - first))):
+            chunk = self.buffer[dst]
+            if len(chunk) == 0:
+                continue
+            ys, xs = np.divmod(index[src], self.width)
+            chunk['x'] = xs
+            chunk['y'] = ys
+            chunk['t'] = t
+            chunk['p'] = polarity[src]
+        self.head = (self.head + n) % self.capacity
+        overflow = self.size + n - self.capacity
+        if overflow > 0:
+            self.dropped += overflow
+        self.size = min(self.size + n, self.capacity)
+        self.events_total += n
+
+    def update(self, dt):
+        """Advance the sensor clock by dt seconds and emit the events of the current FOV."""
+        self.t_us += dt * 1e6
+        frame = self.renderer.render()
+        if not self._initialized:
+            np.take(self._log_lut, frame, out=self._ref)
+            np.copyto(self._prev, frame)
+            self._initialized = True
+            return 0
+
+        np.not_equal(frame, self._prev, out=self._changed)
+        index = np.flatnonzero(self._changed)
+        if index.size == 0:
+            return 0
+        np.copyto(self._prev, frame)
+
+        ref = self._ref.reshape(-1)
+        level = self._log_lut[frame.reshape(-1)[index]]
+        diff = level - ref[index]
+        fire = np.abs(diff) >= self.threshold
+        index = index[fire]
+        ref[index] = level[fire]
+        polarity = np.where(diff[fire] > 0, 1, -1).astype(np.int8)
+        self._push(index, polarity, int(round(self.t_us)))
+        return len(index)
+
+    def read(self):
+        """Return (and consume) the unread events as an EVENT_DTYPE array, oldest first."""
+        start = (self.head - self.size) % self.capacity
+        if start + self.size <= self.capacity:
+            events = self.buffer[start:start + self.size].copy()
+        else:
+            events = np.concatenate((self.buffer[start:], self.buffer[:self.head]))
+        self.size = 0
+        return events
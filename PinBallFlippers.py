@@ -0,0 +1,120 @@
+import functools
+from collections import namedtuple
+import numpy as np
+
+from PinBallPhysics import rotate_point
+
+# Geometry of one flipper at one angle, in table coordinates
+FlipperPose = namedtuple('FlipperPose', [
+    'angle',
+    'tip_x', 'tip_y',       # Tip of the collision segment relative to the pivot (FLIPPER_LENGTH * 1.1 long)
+    'bx', 'by',             # Tip of the collision segment; the segment runs from the pivot to (bx, by)
+    'nx', 'ny',             # Unit normal of the collision segment on its upper (playfield) side
+    'polygon',              # The four corners of the drawn nail-shaped polygon (see GameEnvironment._flipper_polygon)
+])
+
+
+def reachable_angles(idle, active, step, limit = 100_000):
+    """
+    Every angle _update_flippers can produce from `idle`, moving by `step`
+    towards idle or active on each tick with the same float operations
+    (overshoot clamped to the target), in ascending order. Stops after
+    `limit` angles.
+    """
+    lo, hi = min(idle, active), max(idle, active)
+    seen = {idle, active}
+    frontier = [idle, active]
+    while frontier and len(seen) < limit:
+        angle = frontier.pop()
+        if angle < hi:
+            up = angle + step
+            if up > hi:
+                up = hi
+            if up not in seen:
+                seen.add(up)
+                frontier.append(up)
+        if angle > lo:
+            down = angle - step
+            if down < lo:
+                down = lo
+            if down not in seen:
+                seen.add(down)
+                frontier.append(down)
+    return sorted(seen)
+
+
+class FlipperPoseCache():
+    """
+    Flipper geometry per angle, precomputed for all reachable angles.
+
+    A flipper only moves between its idle and active angle in steps of
+    FLIPPER_ROTATION_SPEED * flipper_rotation_speed_frac * TICK_FRAMES, so it
+    takes a small, fixed set of angles (two with the default speed, which
+    covers the whole swing in one tick). pose(angle) looks them up in a dict
+    instead of evaluating sin and cos for the collision segment and the four
+    polygon corners on every tick and frame.
+
+    An angle outside the set (assigned directly, e.g. by a test) is computed
+    with the same float operations and remembered, up to max_extra angles,
+    so a lookup always returns exactly what the trigonometry would.
+    """
+    def __init__(self, pivot, length, width, mirror, idle, active, step, max_extra = 4096):
+        self.pivot = (float(pivot[0]), float(pivot[1]))
+        self.length = length
+        self.width = width
+        self.mirror = mirror
+        self.collision_length = length * 1.1
+        self.max_extra = max_extra
+        angles = reachable_angles(idle, active, step)
+        self._poses = {angle: self._compute(angle) for angle in angles}
+        self._n_reachable = len(self._poses)
+
+        # Sorted tables for the vectorized lookup of segment_ends()
+        self.angles = np.array(angles, dtype=np.float64)
+        self._bx = np.array([self._poses[angle].bx for angle in angles])
+        self._by = np.array([self._poses[angle].by for angle in angles])
+
+    def _compute(self, angle):
+        px, py = self.pivot
+        tip_x, tip_y = rotate_point(self.collision_length, 0, angle)
+        # Upper side: the normal with a negative y component (pygame's y axis points down)
+        nx, ny = tip_y / self.collision_length, -tip_x / self.collision_length
+        if ny > 0 or (ny == 0 and nx > 0):
+            nx, ny = -nx, -ny
+        length, width = self.length, self.width
+        if not self.mirror:
+            points = [(0, 0), (length * 0.7, -width/2), (length, 0), (length * 0.7, width/2)]
+        else:
+            points = [(0, 0), (length * 0.7, width/2), (length, 0), (length * 0.7, -width/2)]
+        polygon = []
+        for x, y in points:
+            rx, ry = rotate_point(x, y, angle)
+            polygon.append((self.pivot[0] + rx, self.pivot[1] + ry))
+        return FlipperPose(angle, tip_x, tip_y, px + tip_x, py + tip_y, nx, ny, tuple(polygon))
+
+    def pose(self, angle):
+        """FlipperPose at `angle` (degrees)."""
+        pose = self._poses.get(angle)
+        if pose is None:
+            pose = self._compute(angle)
+            if len(self._poses) - self._n_reachable < self.max_extra:
+                self._poses[angle] = pose
+        return pose
+
+    def segment_ends(self, angles):
+        """Tips (bx, by) of the collision segments for an array of angles."""
+        angles = np.asarray(angles, dtype=np.float64)
+        i = np.minimum(np.searchsorted(self.angles, angles), self.angles.size - 1)
+        bx, by = self._bx[i], self._by[i]
+        miss = self.angles[i] != angles
+        if miss.any():
+            for k in np.flatnonzero(miss):
+                pose = self.pose(float(angles[k]))
+                bx[k], by[k] = pose.bx, pose.by
+        return bx, by
+
+
+@functools.lru_cache(maxsize=64)
+def flipper_pose_cache(pivot, length, width, mirror, idle, active, step):
+    """Shared FlipperPoseCache per flipper geometry (arguments must be hashable: pivot as a tuple)."""
+    return FlipperPoseCache(pivot, length, width, mirror, idle, active, step)
@@ -0,0 +1,188 @@
+import numpy as np
+
+# Colors (same as PinBallGameEnvironment)
+WHITE = (255, 255, 255)
+RED   = (255, 0, 0)
+
+
+class FovRenderer():
+    """
+    Rasterizes the camera field of view of a GameEnvironment straight into a
+    NumPy uint8 buffer, without pygame and without touching the display.
+
+    The FOV is the full table width between CAMERA_UPPER_BOUND and FLIPPERs_Y.
+    It contains the bumpers, the layout segments, the LEDs, the ball and the
+    flipper polygons, drawn in the same order as GameEnvironment.render().
+
+    All buffers (the frame, the circle stamps and the polygon scratch space)
+    are allocated once in the constructor. render() fills the same output
+    buffer on every call and returns it, so copy it if you need to keep a frame.
+
+    downscale: integer factor k, the frame is rasterized directly at 1/k of the
+               resolution: each pixel samples the center of its k x k block of
+               the table (rows/columns that do not fill a whole block are cropped).
+               Outlines and rings stay at least one pixel wide.
+    grayscale: return (H, W) luminance frames instead of (H, W, 3) RGB frames.
+    """
+    def __init__(self, env, downscale = 1, grayscale = False):
+        self.env = env
+        self.downscale = int(downscale)
+        self.grayscale = grayscale
+        self.top = env.CAMERA_UPPER_BOUND
+        k = self.downscale
+
+        self.height = (env.FLIPPERs_Y - env.CAMERA_UPPER_BOUND) // k
+        self.width = env.WIDTH // k
+        channels = () if grayscale else (3,)
+
+        self.frame = np.zeros((self.height, self.width) + channels, dtype=np.uint8)
+        self.out = self.frame
+
+        # Pixel coordinate grids (world coordinates of the block centers) and scratch space for the polygon rasterizer
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        self._xs = xs * float(k) + (k - 1) / 2
+        self._ys = ys * float(k) + (k - 1) / 2 + self.top
+        self._edge = np.empty((self.height, self.width))
+        self._inner = np.empty((self.height, self.width))
+        self._tmp = np.empty((self.height, self.width))
+        self._inside = np.empty((self.height, self.width), dtype=bool)
+        self._band = np.empty((self.height, self.width), dtype=bool)
+
+        self._disks = {}
+        self._rings = {}
+        self._colors = {}
+
+        # The layout segments are static: their 3 px wide quads are built once
+        self._segments = []
+        for (ax, ay, bx, by, *_), color in zip(env.segments, env.layout.segments['color'].tolist()):
+            length = np.hypot(bx - ax, by - ay)
+            if length == 0 or max(ay, by) < self.top - 2 or min(ay, by) > self.top + self.height + 2:
+                continue
+            nx, ny = -(by - ay) / length * 1.5, (bx - ax) / length * 1.5
+            quad = [(ax + nx, ay + ny), (bx + nx, by + ny), (bx - nx, by - ny), (ax - nx, ay - ny)]
+            self._segments.append((quad, tuple(color)))
+
+
+    # --- Precomputed stamps ---
+    def _offsets(self, radius):
+        # World offsets of the pixels of a stamp of `radius` world px, one pixel per k px
+        r = int(np.ceil(radius / self.downscale))
+        dy, dx = np.mgrid[-r:r + 1, -r:r + 1] * self.downscale
+        return dx*dx + dy*dy
+
+    def _disk(self, radius):
+        disk = self._disks.get(radius)
+        if disk is None:
+            disk = self._offsets(radius) <= radius*radius
+            self._disks[radius] = disk
+        return disk
+
+    def _ring(self, radius, width = 2):
+        ring = self._rings.get(radius)
+        if ring is None:
+            width = max(width, self.downscale)
+            d2 = self._offsets(radius)
+            ring = (d2 <= radius*radius) & (d2 > (radius - width)**2)
+            self._rings[radius] = ring
+        return ring
+
+    def _color(self, color):
+        value = self._colors.get(color)
+        if value is None:
+            if self.grayscale:
+                value = int(round(0.299*color[0] + 0.587*color[1] + 0.114*color[2]))
+            else:
+                value = np.array(color, dtype=np.uint8)
+            self._colors[color] = value
+        return value
+
+
+    # --- Rasterizers ---
+    def _stamp(self, stamp, cx, cy, color):
+        """Paint a boolean stamp centered at the world position (cx, cy)."""
+        r = stamp.shape[0] // 2
+        x0, y0 = cx // self.downscale - r, (cy - self.top) // self.downscale - r
+        x1, y1 = x0 + stamp.shape[1], y0 + stamp.shape[0]
+        if x1 <= 0 or y1 <= 0 or x0 >= self.width or y0 >= self.height:
+            return
+        sx0, sy0 = max(0, -x0), max(0, -y0)
+        sx1 = stamp.shape[1] - max(0, x1 - self.width)
+        sy1 = stamp.shape[0] - max(0, y1 - self.height)
+        region = self.frame[max(0, y0):min(y1, self.height), max(0, x0):min(x1, self.width)]
+        region[stamp[sy0:sy1, sx0:sx1]] = self._color(color)
+
+    def _polygon(self, points, fill, outline, outline_width = 2):
+        """
+        Fill a convex polygon given in world coordinates, with an outline band of
+        outline_width pixels on the inside of its edges.
+        """
+        k = self.downscale
+        xs = [p[0] for p in points]
+        ys = [p[1] - self.top for p in points]
+        x0 = max(0, int(np.floor(min(xs) / k)))
+        x1 = min(self.width, int(np.ceil(max(xs) / k)) + 1)
+        y0 = max(0, int(np.floor(min(ys) / k)))
+        y1 = min(self.height, int(np.ceil(max(ys) / k)) + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        px = self._xs[y0:y1, x0:x1]
+        py = self._ys[y0:y1, x0:x1]
+        edge = self._edge[y0:y1, x0:x1]
+        tmp = self._tmp[y0:y1, x0:x1]
+        inner = self._inner[y0:y1, x0:x1]
+        inside = self._inside[y0:y1, x0:x1]
+        band = self._band[y0:y1, x0:x1]
+
+        # Orientation, so that "inside" is always the positive side of each edge
+        n = len(points)
+        area = sum(points[i][0]*points[(i + 1) % n][1] - points[(i + 1) % n][0]*points[i][1] for i in range(n))
+        sign = 1.0 if area > 0 else -1.0
+
+        inner.fill(np.inf)
+        for i in range(n):
+            ax, ay = points[i]
+            bx, by = points[(i + 1) % n]
+            ex, ey = bx - ax, by - ay
+            length = np.hypot(ex, ey)
+            if length == 0:
+                continue
+            # Signed distance of every pixel to the edge line: (e x (p - a)) / |e|
+            np.subtract(px, ax, out=edge)
+            np.multiply(edge, -ey * sign / length, out=edge)
+            np.subtract(py, ay, out=tmp)
+            np.multiply(tmp, ex * sign / length, out=tmp)
+            np.add(edge, tmp, out=edge)
+            np.minimum(inner, edge, out=inner)
+        region = self.frame[y0:y1, x0:x1]
+        np.greater_equal(inner, 0, out=inside)
+        region[inside] = self._color(fill)
+        np.less(inner, max(outline_width, k), out=band)
+        np.logical_and(band, inside, out=band)
+        region[band] = self._color(outline)
+
+
+    def render(self):
+        """Rasterize the current FOV of the environment and return the output buffer."""
+        env = self.env
+        self.frame.fill(0)
+
+        for bumper in env.bumpers:
+            self._stamp(self._disk(bumper["radius"]), int(bumper["x"]), int(bumper["y"]), bumper["color"])
+            self._stamp(self._ring(bumper["radius"]), int(bumper["x"]), int(bumper["y"]), RED)
+
+        for quad, color in self._segments:
+            self._polygon(quad, color, color)
+
+        if env.num_leds > 0:
+            for led in env.leds:
+                if led["state"]:
+                    self._stamp(self._disk(led["radius"]), int(led["x"]), int(led["y"]), led["color"])
+
+        for x, y in env._ball_positions():
+            self._stamp(self._disk(env.BALL_RADIUS), int(x), int(y), WHITE)
+
+        for flipper, angle in ((env._left_flipper, env.left_flipper_angle), (env._right_flipper, env.right_flipper_angle)):
+            self._polygon(flipper.pose(angle).polygon, WHITE, RED)
+            self._stamp(self._disk(10), int(flipper.pivot[0]), int(flipper.pivot[1]), WHITE)
+        return self.out
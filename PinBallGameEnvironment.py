@@ -1,20 +1,56 @@
-import pygame, os
+import math
 import numpy as np
-import random
 import time
-import random
-# Initialize Pygame
-pygame.init()
-pygame.display.set_caption("Pinball Game")
+from PinBallPhysics import rotate_point, point_segment_distance, reflect_vector, sweep_circle_circle, sweep_circle_line, sweep_circle_segment
+from PinBallFovRenderer import FovRenderer
+from PinBallEventCamera import EventCamera
+from PinBallTrajectory import TrajectoryRecorder
+from PinBallProfiler import PhaseProfiler
+from PinBallFlippers import flipper_pose_cache
+from PinBallCapture import FrameRecorder
+from PinBallLayout import Layout, UniformGrid, BUMPER_DTYPE
+
+# pygame is only imported and initialized when a window is needed (see _import_pygame),
+# so the headless physics can be imported and run without it
+pygame = None
+
+def _import_pygame():
+    """Import and initialize pygame on first use; returns the module."""
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+        _pygame.init()
+        _pygame.display.set_caption("Pinball Game")
+        pygame = _pygame
+    return pygame
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 RED   = (255, 0, 0)
 GRAY  = (100, 100, 100)
 
+# Scalar attributes captured by GameEnvironment.get_state(), with their record type
+STATE_FIELDS = (
+    ('ball_x', '<f8'), ('ball_y', '<f8'),
+    ('ball_vx_px_per_frame', '<f8'), ('ball_vy_px_per_frame', '<f8'),
+    ('ball_speed_val_px_per_frame', '<f8'), ('ball_speed_val_px_per_sec', '<f8'),
+    ('left_flipper_angle', '<f8'), ('right_flipper_angle', '<f8'),
+    ('left_flipper_target', '<f8'), ('right_flipper_target', '<f8'),
+    ('score', '<i8'), ('n_reamined_balls', '<i8'), ('reward', '<f8'), ('cumulative_reward', '<f8'),
+    ('LEFT_FLIPPER_TOUCH_NUM', '<i8'), ('RIGHT_FLIPPER_TOUCH_NUM', '<i8'),
+    ('LEFT_FLIPPER_SUCCESS_HIT_NUM', '<i8'), ('RIGHT_FLIPPER_SUCCESS_HIT_NUM', '<i8'),
+    ('LEFT_FLIPPER_PRESS_NUM', '<i8'), ('RIGHT_FLIPPER_PRESS_NUM', '<i8'), ('BALL_STUCK_NUM', '<i8'),
+    ('left_success_hit', '?'), ('right_success_hit', '?'),
+    ('time_tick_cnt', '<i8'), ('episode_cnt', '<i8'), ('current_time', '<f8'), ('dt', '<f8'),
+    ('single_episode_game_over', '?'), ('BALL_GOT_STUCK', '?'), ('START_GAME', '?'), ('RUNING', '?'),
+)
+LED_DTYPE = np.dtype([('x', '<f8'), ('y', '<f8'), ('radius', '<f8'), ('color', 'u1', (3,)),
+                      ('blink_interval', '<f8'), ('last_toggle', '<f8'), ('state', '?')])
+
 
 class GameEnvironment():
-    def __init__(self, width = 700, height = 1000, show_fov = False, camera_height = 128, bottom_area_height = 150, ball_radius = 15, bumpers_radius=[25, 20, 20], num_leds = 0, save_speed_log = False, log_filename = 'game.log', num_episodes = 10, max_ball_speed = 400, flipper_rotation_speed_frac = 1): 
+    def __init__(self, width = 700, height = 1000, show_fov = False, camera_height = 128, bottom_area_height = 150, ball_radius = 15, bumpers_radius=[25, 20, 20], num_leds = 0, save_speed_log = False, log_filename = 'game_log', num_episodes = 10, max_ball_speed = 400, flipper_rotation_speed_frac = 1, headless = False, verbose = True, dvs_threshold = None, log_flush_size = 4096, print_speed_log = False, seed = None, continuous_collision = False, physics_dt = None, frame_skip = 1, layout = None, async_render = False, profile = False, metrics = None, jit = False, frame_log_filename = 'frame_log', record_frames = None): 
 
 
         # --- Constants and Configuration ---
@@ -24,6 +60,8 @@ class GameEnvironment():
         self.FLIPPERs_Y = self.PLAYGROUND_HEIGHT - self.PLAYGROUND_HEIGHT//5
         self.CAMERA_UPPER_BOUND  = self.FLIPPERs_Y - camera_height
         self.SHOW_FOV = show_fov
+        self.HEADLESS = headless or async_render     # No window, no frame limiter: physics runs on a fixed simulated dt
+        self.verbose = verbose                       # Print game events (hits, drains) to stdout
         self.BALL_RADIUS = ball_radius
         self.BALL_INIT_SPEED_VX = 5                   # Initial speed of the ball
         self.BALL_INIT_SPEED_VY = 5                   # Initial speed of the ball
@@ -34,6 +72,7 @@ class GameEnvironment():
         self.INIT_SCORE = 0
         self.INIT_N_BALLS = 1
         self.N_EPISODES = num_episodes
+        self.np_random = np.random.default_rng(seed)  # Own RNG for ball launches and LEDs, so runs are reproducible
 
         self.left_success_hit = False
         self.right_success_hit = False
@@ -43,30 +82,58 @@ class GameEnvironment():
         self.RIGHT_FLIPPER_SUCCESS_HIT_NUM = 0
         self.LEFT_FLIPPER_PRESS_NUM = 0
         self.RIGHT_FLIPPER_PRESS_NUM = 0
+        self.BALL_STUCK_NUM = 0                      # Stuck-ball resets in this episode
         self.ball_start_time = time.time()
         # self.N_LED = n_led
 
         self.SAVE_SPEED_LOG = save_speed_log
-        self.log_filename = log_filename
+        self.log_filename = log_filename             # Directory of the .npy trajectory chunks
+        self.log_flush_size = log_flush_size         # Ticks buffered in memory before a chunk is written
+        self.PRINT_SPEED_LOG = print_speed_log       # Also print the ball speed to stdout on every tick
+        self.trajectory_recorder = None
+        self.frame_log_filename = frame_log_filename     # Directory of the recorded frames (REC button, start_recording)
+        self.frame_recorder = None
 
         # Friction, restitution, and gravity
         self.FRICTION = 0.995                      # Continuous friction factor
         self.WALL_RESTITUTION = 0.98               # Energy loss factor for wall bounces
         self.GRAVITY = 0.1                         # Gravity (pixels per frame added to vertical velocity)
 
+        # Continuous collision detection: sweep the ball along its path each tick instead of only testing where it lands
+        self.CONTINUOUS_COLLISION = continuous_collision
+        self.CCD_MAX_IMPACTS = 8                   # Impacts resolved per tick; the motion after the last one is dropped
+        self.CCD_SKIN = 1e-6                       # The swept ball is this much smaller, so it ends just inside the contact
 
-        # Font for display (if needed)
-        self.font = pygame.font.Font(None, 36)
 
-        # Window setup
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        # Fonts, frame clock and buttons are created with the window (see _init_display)
+        self.font = None
+        self.ui_font = None
+        self.clock = None
+
+        # Cached static layer and the moving-object areas of the last frame (see render)
+        self.background = None
+        self._dirty_rects = []
+        self._led_rects = set()
+        self._n_balls_text_for = None
+
+        # Window setup (in headless mode the window is only opened by an explicit render() call)
+        self.screen = None
+        if not self.HEADLESS:
+            self._init_display()
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         
         self.GAME_FPS = 60
-        self.clock = pygame.time.Clock()
         self.RUNING = True
-        self.START_GAME = False
-
+        self.START_GAME = self.HEADLESS              # There is no START button to press without a window
+
+        # Static obstacles (bumpers, walls, rails, slingshots): a Layout, a layout file, or None for the classic table
+        if layout is None:
+            layout = Layout.classic(self.WIDTH, self.HEIGHT, self.BUMPERS_RADIUS)
+        elif not isinstance(layout, Layout):
+            layout = Layout.load(layout)
+        self.layout = layout
         self.bumpers = []
+        self.segments = [tuple(segment[:7]) for segment in layout.segments.tolist()]   # (ax, ay, bx, by, restitution, kick, reward)
         self.num_leds = num_leds
         self.leds = []
 
@@ -82,6 +149,9 @@ class GameEnvironment():
         # Flipper settings (for a realistic pinball layout)
         self.left_flipper_pivot = np.array([self.WIDTH//4 , self.PLAYGROUND_HEIGHT - self.PLAYGROUND_HEIGHT//5 ])
         self.right_flipper_pivot = np.array([3*(self.WIDTH//4) , self.PLAYGROUND_HEIGHT - self.PLAYGROUND_HEIGHT//5 ])
+        # Plain Python copies of the pivots for the scalar collision kernels
+        self._left_pivot_xy = (float(self.left_flipper_pivot[0]), float(self.left_flipper_pivot[1]))
+        self._right_pivot_xy = (float(self.right_flipper_pivot[0]), float(self.right_flipper_pivot[1]))
         self.FLIPPER_LENGTH = self.WIDTH//4 - (self.BALL_RADIUS *5//4) #85 + 35                  # Flipper length
         self.FLIPPER_WIDTH = self.HEIGHT//80                    # Flipper thickness
         # Idle and active angles (in degrees):
@@ -102,12 +172,44 @@ class GameEnvironment():
         self.right_flipper_target = self.RIGHT_IDLE_ANGLE
 
         # Define drain gap (using active positions)
-        self.left_gap = self.left_flipper_pivot[0] #+ FLIPPER_LENGTH   # 150 + 85 = 235
-        self.right_gap = self.right_flipper_pivot[0] #- FLIPPER_LENGTH  # 350 - 85 = 265
+        self.left_gap = int(self.left_flipper_pivot[0]) #+ FLIPPER_LENGTH   # 150 + 85 = 235
+        self.right_gap = int(self.right_flipper_pivot[0]) #- FLIPPER_LENGTH  # 350 - 85 = 265
+
+        # Broad phase: obstacle bounding boxes grown by the ball radius in a uniform grid, so a
+        # collision check only visits the obstacles registered in the cell of the ball center
+        self.GRID_CELL_SIZE = 4 * self.BALL_RADIUS
+        self._bumper_grid = UniformGrid(layout.bumper_boxes(self.BALL_RADIUS + 1), self.WIDTH, self.HEIGHT, self.GRID_CELL_SIZE)
+        self._segment_grid = UniformGrid(layout.segment_boxes(self.BALL_RADIUS + 1), self.WIDTH, self.HEIGHT, self.GRID_CELL_SIZE)
+
+        # Static obstacles for the swept collision test: (name, ax, ay, bx, by).
+        # The walls are infinite lines, like in _check_wall_collidepoint / _check_top_wall_collision
+        self._ccd_lines = (
+            ('wall', 0, 0, 0, self.HEIGHT),
+            ('wall', self.WIDTH, 0, self.WIDTH, self.HEIGHT),
+            ('top', 0, 0, self.WIDTH, 0),
+        )
+        self._ccd_segments = (
+            ('bottom', 0, self.FLIPPERs_Y, self.left_gap, self.FLIPPERs_Y),
+            ('bottom', self.right_gap, self.FLIPPERs_Y, self.WIDTH, self.FLIPPERs_Y),
+        )
 
         self.current_time = 0
         self.dt = 1/self.GAME_FPS
 
+        # Fixed physics timestep, independent of the wall-clock frame time. Velocities stay in px per
+        # 1/GAME_FPS s frame; TICK_FRAMES is how many such frames one physics tick covers (1 by default)
+        self.PHYSICS_DT = self.dt if physics_dt is None else physics_dt
+        self.TICK_FRAMES = self.PHYSICS_DT * self.GAME_FPS
+        self.dt = self.PHYSICS_DT
+        self.frame_skip = frame_skip                 # Physics ticks per play_step (action repeat)
+
+        # Flipper geometry (collision segment, polygon) per reachable angle, so ticks and frames need no trig
+        step = self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES
+        self._left_flipper = flipper_pose_cache(self._left_pivot_xy, self.FLIPPER_LENGTH, self.FLIPPER_WIDTH, False,
+                                                self.LEFT_IDLE_ANGLE, self.LEFT_ACTIVE_ANGLE, step)
+        self._right_flipper = flipper_pose_cache(self._right_pivot_xy, self.FLIPPER_LENGTH, self.FLIPPER_WIDTH, True,
+                                                 self.RIGHT_IDLE_ANGLE, self.RIGHT_ACTIVE_ANGLE, step)
+
         self.time_tick_cnt = 0
 
         self.single_episode_game_over = False
@@ -119,58 +221,86 @@ class GameEnvironment():
         
         self.POS_REWARD = 10
         self.NEG_REWARD = -10
-        # Button settings
-        self.button_rect_reset = pygame.Rect(self.WIDTH - 120, self.HEIGHT-50, 110, 40)
-
-        self.button_start = pygame.Rect(20, self.HEIGHT-90, 100, 35)
-
-        self.button_rect_quit = pygame.Rect( 20, self.HEIGHT-50, 100, 40)
+        # self.START_RECORDING = False
 
-        self.button_rect_record = pygame.Rect(self.WIDTH - 120, self.HEIGHT-90, 110, 35)
+        self._fov_renderers = {}               # FovRenderer per (downscale, grayscale)
 
-        # self.START_RECORDING = False
+        # Event camera (DVS) on the FOV, events are produced on every play_step
+        self.event_camera = None
+        if dvs_threshold is not None:
+            self.event_camera = EventCamera(self, threshold=dvs_threshold)
 
+        # Counters published into a shared-memory block for live monitoring (a MetricsWriter); see PinBallMetrics
+        self.metrics = None
+        if metrics is not None:
+            metrics.attach(self)
 
         self._reset()
 
+        # Fixed record layout of get_state()/set_state() for this table. Subclasses may set
+        # _state_fields first; fields with a shape are restored as arrays
+        if not hasattr(self, '_state_fields'):
+            self._state_fields = STATE_FIELDS
+        self._state_names = [field[0] for field in self._state_fields if len(field) == 2]
+        self._state_array_names = [field[0] for field in self._state_fields if len(field) > 2]
+        self.state_dtype = np.dtype(list(self._state_fields) + [
+            ('bumpers', BUMPER_DTYPE, (len(self.bumpers),)),
+            ('leds', LED_DTYPE, (self.num_leds,)),
+            ('rng_state', '<u8', (4,)),         # PCG64 state and increment (128 bits each, low word first)
+            ('rng_has_uint32', '?'),
+            ('rng_uinteger', '<u4'),
+        ])
+
+        # Draw from a background thread instead of inside play_step (True for GAME_FPS, or a frame rate)
+        self.viewer = None
+        if async_render:
+            from PinBallViewer import AsyncViewer   # imports pygame
+            self._init_display()
+            self.viewer = AsyncViewer(self, fps=self.GAME_FPS if async_render is True else async_render)
+
+        # Time and call count of every play_step phase (True, or 'trace' to also keep a timeline); see PinBallProfiler
+        self.profiler = None
+        if profile:
+            self.profiler = PhaseProfiler(self, trace=(profile == 'trace'))
+
+        # Physics ticks of play_step in a compiled Numba kernel, when Numba is installed; see PinBallJit.
+        # Windowed, verbose and profiled environments keep the Python path
+        self._step_kernel = None
+        if jit and self.HEADLESS and not verbose and not profile:
+            import PinBallJit
+            if PinBallJit.AVAILABLE and PinBallJit.supports(self):
+                self._step_kernel = PinBallJit.StepKernel(self)
+        self.jit = self._step_kernel is not None
+
+        # Rendered frames copied to a background writer thread (True, or a dict of FrameRecorder options)
+        if record_frames:
+            self.start_recording(**(record_frames if isinstance(record_frames, dict) else {}))
 
 
     # --- Class Helper Functions ---
     def _rotate_point(self, point, angle):
         """Rotate a 2D point by angle (in degrees)."""
-        rad = np.radians(angle)
-        x, y = point
-        return (x * np.cos(rad) - y * np.sin(rad),
-                x * np.sin(rad) + y * np.cos(rad))
+        return rotate_point(point[0], point[1], angle)
 
     def _point_segment_distance(self, p, a, b):
         """
         Compute the distance from point p to line segment ab.
         Returns (distance, closest_point)
         """
-        p = np.array(p, dtype=float)
-        a = np.array(a, dtype=float)
-        b = np.array(b, dtype=float)
-        ab = b - a
-        if np.dot(ab, ab) == 0:
-            return np.linalg.norm(p - a), a
-        t = np.dot(p - a, ab) / np.dot(ab, ab)
-        t = max(0, min(1, t))
-        closest = a + t * ab
-        return np.linalg.norm(p - closest), closest
+        dist, cx, cy = point_segment_distance(p[0], p[1], a[0], a[1], b[0], b[1])
+        return dist, (cx, cy)
 
     def _reflect_vector(self, v, n):
         """Reflect vector v about normalized vector n."""
-        return v - 2 * np.dot(v, n) * n
+        return reflect_vector(v[0], v[1], n[0], n[1])
 
-    def _draw_flipper(self, surface, pivot, angle, length, width, mirror=False):
+    def _flipper_polygon(self, pivot, angle, length, width, mirror=False):
         """
-        Draws a nail-shaped flipper as a tapered polygon.
+        World coordinates of the nail-shaped flipper polygon.
         The base polygon (relative to pivot) is defined as:
         [(0,0), (length*0.7, -width/2), (length, 0), (length*0.7, width/2)]
         If mirror is True, the flipper is flipped vertically.
         The polygon is rotated by 'angle' and translated by the pivot.
-        Returns the list of world coordinates for the polygon.
         """
         if not mirror:
             points = [(0, 0),
@@ -186,11 +316,76 @@ class GameEnvironment():
         for pt in points:
             rx, ry = self._rotate_point(pt, angle)
             rotated_points.append((pivot[0] + rx, pivot[1] + ry))
-        pygame.draw.polygon(surface, WHITE, rotated_points)
-        pygame.draw.polygon(surface, RED, rotated_points, 2)
-        pygame.draw.circle(surface, WHITE, (int(pivot[0]), int(pivot[1])), 10)
         return rotated_points
 
+    def _draw_flipper(self, surface, flipper, angle):
+        """
+        Draws a nail-shaped flipper (a FlipperPoseCache) at angle as a tapered polygon
+        (see _flipper_polygon). Returns the screen area it covers as a pygame.Rect.
+        """
+        rotated_points = flipper.pose(angle).polygon
+        pivot = flipper.pivot
+        rect = pygame.draw.polygon(surface, WHITE, rotated_points)
+        rect.union_ip(pygame.draw.polygon(surface, RED, rotated_points, 2))
+        rect.union_ip(pygame.draw.circle(surface, WHITE, (int(pivot[0]), int(pivot[1])), 10))
+        return rect
+
+    def _ball_positions(self):
+        """(x, y) of every ball on the table."""
+        return ((self.ball_x, self.ball_y),)
+
+    def get_fov_frame(self, downscale = 1, grayscale = False):
+        """
+        Camera FOV (CAMERA_UPPER_BOUND to FLIPPERs_Y) as a uint8 NumPy frame,
+        rasterized without pygame. The returned buffer is reused by the next call.
+        """
+        renderer = self._fov_renderers.get((downscale, grayscale))
+        if renderer is None:
+            renderer = FovRenderer(self, downscale=downscale, grayscale=grayscale)
+            self._fov_renderers[(downscale, grayscale)] = renderer
+        return renderer.render()
+
+    def start_recording(self, directory = None, **options):
+        """
+        Record rendered frames into `directory` (default frame_log_filename) from a
+        background thread; options go to PinBallCapture.FrameRecorder (source,
+        format, chunk_size, queue_size, policy, compress, every, downscale, grayscale).
+        Returns the recorder, also kept in frame_recorder.
+        """
+        if self.frame_recorder is not None:
+            self.stop_recording()
+        if options.get('source', 'window') == 'window' and self.viewer is not None:
+            raise ValueError("source='window' cannot be recorded while the async viewer draws; use source='fov'")
+        self.frame_recorder = FrameRecorder(self.frame_log_filename if directory is None else directory, **options)
+        self.background = None              # Redraw the REC button
+        return self.frame_recorder
+
+    def stop_recording(self):
+        """Write the queued frames and stop the frame recorder."""
+        recorder, self.frame_recorder = self.frame_recorder, None
+        self.background = None
+        if recorder is not None:
+            recorder.close()
+
+    def close(self):
+        """Write out any buffered trajectory ticks and frames, stop the viewer thread and publish the final metrics."""
+        if self.trajectory_recorder is not None:
+            self.trajectory_recorder.flush()
+        if self.frame_recorder is not None:
+            self.stop_recording()
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+        if self.metrics is not None:
+            self.metrics.end_episode(self)
+
+    def get_events(self):
+        """
+        Address-events (x, y, t, p) produced by the event camera since the last call,
+        as a structured NumPy array (see PinBallEventCamera.EVENT_DTYPE).
+        """
+        return self.event_camera.read()
+
     def _update_leds(self):
         # --- Update LED States ---
         for led in self.leds:
@@ -202,21 +397,21 @@ class GameEnvironment():
     def _update_flippers(self):
         # Smoothly update left flipper angle toward its target
         if self.left_flipper_angle < self.left_flipper_target:
-            self.left_flipper_angle += self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac#0.02
+            self.left_flipper_angle += self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES#0.02
             if self.left_flipper_angle > self.left_flipper_target:
                 self.left_flipper_angle = self.left_flipper_target
         elif self.left_flipper_angle > self.left_flipper_target:
-            self.left_flipper_angle -= self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac#0.02
+            self.left_flipper_angle -= self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES#0.02
             if self.left_flipper_angle < self.left_flipper_target:
                 self.left_flipper_angle = self.left_flipper_target
 
         # Smoothly update right flipper angle toward its target
         if self.right_flipper_angle < self.right_flipper_target:
-            self.right_flipper_angle += self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac#0.02
+            self.right_flipper_angle += self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES#0.02
             if self.right_flipper_angle > self.right_flipper_target:
                 self.right_flipper_angle = self.right_flipper_target
         elif self.right_flipper_angle > self.right_flipper_target:
-            self.right_flipper_angle -= self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac#0.02
+            self.right_flipper_angle -= self.FLIPPER_ROTATION_SPEED * self.flipper_rotation_speed_frac * self.TICK_FRAMES#0.02
             if self.right_flipper_angle < self.right_flipper_target:
                 self.right_flipper_angle = self.right_flipper_target
 
@@ -224,178 +419,387 @@ class GameEnvironment():
     def _check_flippers_collision(self, action):
         self.left_success_hit = False
         self.right_success_hit = False
+        self._collide_flippers(action)
+
+    def _collide_flippers(self, action, boost = True):
         if action == 1:
         # --- Flipper Collision Detection ---
         # Left flipper collision
         # left_tip = left_flipper_pivot + np.array(self._rotate_point((FLIPPER_LENGTH, 0), left_flipper_angle))
         # Extend hitbox length by 10% for collision detection
-            collision_length = self.FLIPPER_LENGTH * 1.1  
-            left_tip = self.left_flipper_pivot + np.array(self._rotate_point((collision_length, 0), self.left_flipper_angle))
+            pivot_x, pivot_y = self._left_pivot_xy
+            pose = self._left_flipper.pose(self.left_flipper_angle)
 
-            dist, closest = self._point_segment_distance((self.ball_x, self.ball_y), self.left_flipper_pivot, left_tip)
+            dist, closest_x, closest_y = point_segment_distance(self.ball_x, self.ball_y, pivot_x, pivot_y, pose.bx, pose.by)
             if dist < self.BALL_RADIUS:
                 
-                collision_vec = np.array([self.ball_x, self.ball_y]) - closest
-                if np.linalg.norm(collision_vec) != 0:
-                    normal = collision_vec / np.linalg.norm(collision_vec)
-                    v = np.array([self.ball_vx_px_per_frame, self.ball_vy_px_per_frame])
-                    v_reflected = self._reflect_vector(v, normal)
+                if dist != 0:
+                    normal_x = (self.ball_x - closest_x) / dist
+                    normal_y = (self.ball_y - closest_y) / dist
+                    vx, vy = reflect_vector(self.ball_vx_px_per_frame, self.ball_vy_px_per_frame, normal_x, normal_y)
                     self.left_hit = True
                     self.LEFT_FLIPPER_TOUCH_NUM += 1
 
-                    if action == 1:
-                        v_reflected *= self.FLIPPER_BOOST
+                    if action == 1 and boost:
+                        vx *= self.FLIPPER_BOOST
+                        vy *= self.FLIPPER_BOOST
                         self.left_success_hit = True
                         # self.right_success_hit = False
                         # self.right_hit = False
                         self.LEFT_FLIPPER_SUCCESS_HIT_NUM += 1
 
-                        print("left_success_hit")
+                        if self.verbose:
+                            print("left_success_hit")
                     # else:
                     #     print("left_touch")
-                    self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = v_reflected
-                    self.ball_x, self.ball_y = closest + normal * (self.BALL_RADIUS + 20)
+                    self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = vx, vy
+                    self.ball_x = closest_x + normal_x * (self.BALL_RADIUS + 20)
+                    self.ball_y = closest_y + normal_y * (self.BALL_RADIUS + 20)
         if action == 2:            
             # Right flipper collision
             # right_tip = right_flipper_pivot + np.array(self._rotate_point((FLIPPER_LENGTH, 0), right_flipper_angle))
-            collision_length = self.FLIPPER_LENGTH * 1.1
-            right_tip = self.right_flipper_pivot + np.array(self._rotate_point((collision_length, 0), self.right_flipper_angle))
+            pivot_x, pivot_y = self._right_pivot_xy
+            pose = self._right_flipper.pose(self.right_flipper_angle)
 
-            dist, closest = self._point_segment_distance((self.ball_x, self.ball_y), self.right_flipper_pivot, right_tip)
+            dist, closest_x, closest_y = point_segment_distance(self.ball_x, self.ball_y, pivot_x, pivot_y, pose.bx, pose.by)
             if dist < self.BALL_RADIUS:
                 
-                collision_vec = np.array([self.ball_x, self.ball_y]) - closest
-                if np.linalg.norm(collision_vec) != 0:
-                    normal = collision_vec / np.linalg.norm(collision_vec)
-                    v = np.array([self.ball_vx_px_per_frame, self.ball_vy_px_per_frame])
-                    v_reflected = self._reflect_vector(v, normal)
+                if dist != 0:
+                    normal_x = (self.ball_x - closest_x) / dist
+                    normal_y = (self.ball_y - closest_y) / dist
+                    vx, vy = reflect_vector(self.ball_vx_px_per_frame, self.ball_vy_px_per_frame, normal_x, normal_y)
                     # self.right_hit = True
                     self.RIGHT_FLIPPER_TOUCH_NUM += 1
 
-                    if action == 2:
-                        v_reflected *= self.FLIPPER_BOOST
+                    if action == 2 and boost:
+                        vx *= self.FLIPPER_BOOST
+                        vy *= self.FLIPPER_BOOST
                         # self.left_hit = False
                         # self.left_success_hit = False
                         self.right_success_hit = True
                         self.RIGHT_FLIPPER_SUCCESS_HIT_NUM += 1
 
 
-                        print("right_success_hit")
+                        if self.verbose:
+                            print("right_success_hit")
                     # else:
                     #     print("right_touch")
-                    self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = v_reflected
-                    self.ball_x, self.ball_y = closest + normal * (self.BALL_RADIUS + 20)
+                    self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = vx, vy
+                    self.ball_x = closest_x + normal_x * (self.BALL_RADIUS + 20)
+                    self.ball_y = closest_y + normal_y * (self.BALL_RADIUS + 20)
 
     def _check_bumpers_collision(self):
 
         # --- Bumper Collision Detection ---
-        for bumper in self.bumpers:
+        grid = self._bumper_grid
+        candidates = grid.query(self.ball_x, self.ball_y)
+        k = 0
+        while k < len(candidates):
+            j = candidates[k]
+            k += 1
+            bumper = self.bumpers[j]
             dx = self.ball_x - bumper["x"]
             dy = self.ball_y - bumper["y"]
-            dist = np.sqrt(dx**2 + dy**2)
+            dist = math.sqrt(dx*dx + dy*dy)
             if dist < self.BALL_RADIUS + bumper["radius"]:
-                normal = np.array([dx, dy])
-                if np.linalg.norm(normal) != 0:
-                    normal = normal / np.linalg.norm(normal)
-                v = np.array([self.ball_vx_px_per_frame, self.ball_vy_px_per_frame])
-                v_reflected = self._reflect_vector(v, normal)
-                self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = v_reflected * bumper["bounce"]
-                self.ball_x = bumper["x"] + normal[0]*(self.BALL_RADIUS + bumper["radius"] + 1)
-                self.ball_y = bumper["y"] + normal[1]*(self.BALL_RADIUS + bumper["radius"] + 1)
+                normal_x, normal_y = dx, dy
+                if dist != 0:
+                    normal_x = dx / dist
+                    normal_y = dy / dist
+                vx, vy = reflect_vector(self.ball_vx_px_per_frame, self.ball_vy_px_per_frame, normal_x, normal_y)
+                self.ball_vx_px_per_frame = vx * bumper["bounce"]
+                self.ball_vy_px_per_frame = vy * bumper["bounce"]
+                self.ball_x = bumper["x"] + normal_x*(self.BALL_RADIUS + bumper["radius"] + 1)
+                self.ball_y = bumper["y"] + normal_y*(self.BALL_RADIUS + bumper["radius"] + 1)
                 # self.score += 1
                 self.reward += self.POS_REWARD
-
+                # The ball was moved: go on with the later bumpers listed at its new position
+                candidates = [i for i in grid.query(self.ball_x, self.ball_y) if i > j]
+                k = 0
+
+    def _check_segments_collision(self):
+
+        # --- Segment (wall / rail / slingshot) Collision Detection ---
+        grid = self._segment_grid
+        candidates = grid.query(self.ball_x, self.ball_y)
+        k = 0
+        while k < len(candidates):
+            j = candidates[k]
+            k += 1
+            ax, ay, bx, by, restitution, kick, reward = self.segments[j]
+            dist, closest_x, closest_y = point_segment_distance(self.ball_x, self.ball_y, ax, ay, bx, by)
+            if dist < self.BALL_RADIUS and dist != 0:
+                normal_x = (self.ball_x - closest_x) / dist
+                normal_y = (self.ball_y - closest_y) / dist
+                vx, vy = self.ball_vx_px_per_frame, self.ball_vy_px_per_frame
+                if vx*normal_x + vy*normal_y < 0:
+                    vx, vy = reflect_vector(vx, vy, normal_x, normal_y)
+                self.ball_vx_px_per_frame = vx * restitution + kick * normal_x
+                self.ball_vy_px_per_frame = vy * restitution + kick * normal_y
+                self.ball_x = closest_x + normal_x * (self.BALL_RADIUS + 1)
+                self.ball_y = closest_y + normal_y * (self.BALL_RADIUS + 1)
+                self.reward += reward
+                candidates = [i for i in grid.query(self.ball_x, self.ball_y) if i > j]
+                k = 0
+
+
+    def _first_impact(self, dx, dy, action, skip):
+        """
+        Earliest obstacle hit by the ball moving by (dx, dy) this tick.
+        Returns (t, name) with t in [0, 1], or (None, None).
+        """
+        x, y = self.ball_x, self.ball_y
+        r = self.BALL_RADIUS - self.CCD_SKIN
+        best_t, best = None, None
+        x0, x1 = (x, x + dx) if dx >= 0 else (x + dx, x)
+        y0, y1 = (y, y + dy) if dy >= 0 else (y + dy, y)
+        for i in self._bumper_grid.query_box(x0, y0, x1, y1):
+            if ('bumper', i) in skip:
+                continue
+            bumper = self.bumpers[i]
+            t = sweep_circle_circle(x, y, dx, dy, r, bumper["x"], bumper["y"], bumper["radius"])
+            if t is not None and (best_t is None or t < best_t):
+                best_t, best = t, ('bumper', i)
+        for i in self._segment_grid.query_box(x0, y0, x1, y1):
+            if ('segment', i) in skip:
+                continue
+            ax, ay, bx, by = self.segments[i][:4]
+            t = sweep_circle_segment(x, y, dx, dy, r, ax, ay, bx, by)
+            if t is not None and (best_t is None or t < best_t):
+                best_t, best = t, ('segment', i)
+        # Only the flipper of the current action collides, as in _check_flippers_collision
+        for side, flipper, angle in ((1, self._left_flipper, self.left_flipper_angle),
+                                     (2, self._right_flipper, self.right_flipper_angle)):
+            if action != side or ('flipper', side) in skip:
+                continue
+            pose = flipper.pose(angle)
+            t = sweep_circle_segment(x, y, dx, dy, r, flipper.pivot[0], flipper.pivot[1], pose.bx, pose.by)
+            if t is not None and (best_t is None or t < best_t):
+                best_t, best = t, ('flipper', side)
+        for line in self._ccd_lines:
+            if line in skip:
+                continue
+            _, ax, ay, bx, by = line
+            t = sweep_circle_line(x, y, dx, dy, r, ax, ay, bx, by)
+            if t is not None and (best_t is None or t < best_t):
+                best_t, best = t, line
+        for segment in self._ccd_segments:
+            if segment in skip:
+                continue
+            _, ax, ay, bx, by = segment
+            t = sweep_circle_segment(x, y, dx, dy, r, ax, ay, bx, by, caps=False)
+            if t is not None and (best_t is None or t < best_t):
+                best_t, best = t, segment
+        return best_t, best
+
+    def _move_ball(self, action):
+        """
+        Continuous collision version of `ball += velocity`: the ball is moved
+        to each impact on its path in turn, the regular collision response
+        is applied there, and the rest of the tick continues with the new
+        velocity. Fast balls can no longer pass through bumpers, the active
+        flipper or the walls between two ticks.
+        """
+        remaining = self.TICK_FRAMES
+        skip = set()
+        boosted = False
+        for _ in range(self.CCD_MAX_IMPACTS):
+            dx = self.ball_vx_px_per_frame * remaining
+            dy = self.ball_vy_px_per_frame * remaining
+            t, hit = self._first_impact(dx, dy, action, skip)
+            if hit is None:
+                break
+            self.ball_x += dx * t
+            self.ball_y += dy * t
+            remaining *= 1 - t
+            velocity = (self.ball_vx_px_per_frame, self.ball_vy_px_per_frame)
+            if hit[0] == 'bumper':
+                self._check_bumpers_collision()
+            elif hit[0] == 'segment':
+                self._check_segments_collision()
+            elif hit[0] == 'flipper':
+                # The flipper boosts once per tick; later contacts in the same tick only reflect
+                self._collide_flippers(action, boost=not boosted)
+                boosted = True
+            elif hit[0] == 'wall':
+                self._check_wall_collidepoint()
+            elif hit[0] == 'top':
+                self._check_top_wall_collision()
+            else:
+                self._check_bottom_collision()
+            if velocity == (self.ball_vx_px_per_frame, self.ball_vy_px_per_frame):
+                # No response (e.g. grazing contact): ignore this obstacle for the rest of the tick
+                skip.add(hit)
+        else:
+            # Out of impacts (e.g. right after a flipper boost): drop the rest of the motion rather than tunnel
+            return
+        self.ball_x += self.ball_vx_px_per_frame * remaining
+        self.ball_y += self.ball_vy_px_per_frame * remaining
 
     # Main functions
     def update_ui(self):
         if self.RUNING == True:    
-            self.dt = self.clock.tick(self.GAME_FPS) / 1000.0  # Frame time in seconds # GAME_SPEED
-            self.current_time = pygame.time.get_ticks() / 1000.0 # to update the blinker LEDs
-            # print(self.dt, self.current_time)
-            self.time_tick_cnt+=1
+            self._advance_clock()
+            self.render()
 
-            if self.num_leds > 0: 
-                self._update_leds()
-
-            # --- Drawing ---
-            self.screen.fill(BLACK)
+    def _advance_clock(self, wait = True):
+        if self.HEADLESS or not wait:
+            # Fixed simulated time step, no frame limiter
+            self.current_time += self.PHYSICS_DT
+        else:
+            # One frame per play_step, paced so that simulated time runs at wall-clock speed
+            self.dt = self.clock.tick(self.GAME_FPS / (self.TICK_FRAMES * self.frame_skip)) / 1000.0  # Frame time in seconds # GAME_SPEED
+            self.current_time = pygame.time.get_ticks() / 1000.0 # to update the blinker LEDs
+        # print(self.dt, self.current_time)
+        self.time_tick_cnt+=1
 
+        if self.num_leds > 0: 
+            self._update_leds()
 
-            # Draw Reset Button
-            pygame.draw.rect(self.screen, RED, self.button_rect_reset)
-            font = pygame.font.Font(None, 30)
-            text = font.render("RESET", True, WHITE)
-            self.screen.blit(text, (self.button_rect_reset.x + 25, self.button_rect_reset.y + 10))
+    def _init_display(self):
+        """
+        Import and initialize pygame and create the fonts, the frame clock and the
+        buttons. Runs once, when a window is first needed (interactive mode, render()
+        or async_render); headless runs never touch pygame.
+        """
+        if self.ui_font is not None:
+            return
+        _import_pygame()
+        # Font for display (if needed)
+        self.font = pygame.font.Font(None, 36)
+        self.ui_font = pygame.font.Font(None, 30)    # Button labels and counters
+        self.clock = pygame.time.Clock()
 
-            # Draw quit Button
-            pygame.draw.rect(self.screen, RED, self.button_rect_quit)
-            font = pygame.font.Font(None, 30)
-            text = font.render("QUIT", True, WHITE)
-            self.screen.blit(text, (self.button_rect_quit.x + 25, self.button_rect_quit.y + 10))
+        # Button settings
+        self.button_rect_reset = pygame.Rect(self.WIDTH - 120, self.HEIGHT-50, 110, 40)
 
-            # Draw record Button
-            pygame.draw.rect(self.screen, RED, self.button_rect_record)
-            font = pygame.font.Font(None, 30)
-            text = font.render("REC", True, WHITE)
-            self.screen.blit(text, (self.button_rect_record.x + 25, self.button_rect_record.y + 10))
+        self.button_start = pygame.Rect(20, self.HEIGHT-90, 100, 35)
 
+        self.button_rect_quit = pygame.Rect( 20, self.HEIGHT-50, 100, 40)
 
-            # Draw start Button
-            pygame.draw.rect(self.screen, RED, self.button_start)
-            font = pygame.font.Font(None, 30)
-            text = font.render("START", True, WHITE)
-            self.screen.blit(text, (self.button_start.x + 25, self.button_start.y + 10))
-            
+        self.button_rect_record = pygame.Rect(self.WIDTH - 120, self.HEIGHT-90, 110, 35)
 
+    def _draw_static_layer(self):
+        """
+        Everything that does not move (buttons, bumpers, walls, rails and slingshots,
+        the bottom boundary and the FOV border), drawn once onto an off-screen surface.
+        """
+        background = pygame.Surface((self.WIDTH, self.HEIGHT)).convert()
+        background.fill(BLACK)
+
+        # Buttons
+        for rect, label in ((self.button_rect_reset, "RESET"), (self.button_rect_quit, "QUIT"),
+                            (self.button_rect_record, "STOP" if self.frame_recorder is not None else "REC"),
+                            (self.button_start, "START")):
+            pygame.draw.rect(background, RED, rect)
+            text = self.ui_font.render(label, True, WHITE)
+            background.blit(text, (rect.x + 25, rect.y + 10))
+
+        # Draw bumpers
+        for bumper in self.bumpers:
+            pygame.draw.circle(background, bumper["color"], (int(bumper["x"]), int(bumper["y"])), bumper["radius"])
+            pygame.draw.circle(background, RED, (int(bumper["x"]), int(bumper["y"])), bumper["radius"], 2)
+
+        # Draw walls, rails and slingshots
+        for (ax, ay, bx, by, *_), color in zip(self.segments, self.layout.segments['color'].tolist()):
+            pygame.draw.line(background, tuple(color), (ax, ay), (bx, by), 3)
+
+        # Draw bottom boundary segments for visual reference:
+        # pygame.draw.line(self.screen, GRAY, (0, self.PLAYGROUND_HEIGHT), (self.left_gap, self.PLAYGROUND_HEIGHT), 3)
+        # pygame.draw.line(self.screen, GRAY, (self.right_gap, self.PLAYGROUND_HEIGHT), (self.WIDTH, self.PLAYGROUND_HEIGHT), 3)
+        pygame.draw.line(background, GRAY, (0, self.left_flipper_pivot[1]), (self.left_gap, self.left_flipper_pivot[1]), 3)
+        pygame.draw.line(background, GRAY, (self.right_gap, self.left_flipper_pivot[1]), (self.WIDTH, self.left_flipper_pivot[1]), 3)
+
+        # Camera boudary
+        if self.SHOW_FOV == True:
+            pygame.draw.line(background, WHITE, (0, self.CAMERA_UPPER_BOUND), (self.WIDTH, self.CAMERA_UPPER_BOUND), 3)
+            pygame.draw.line(background, WHITE, (0, self.FLIPPERs_Y), (self.WIDTH, self.FLIPPERs_Y), 3)
+            pygame.draw.line(background, WHITE, (0, self.CAMERA_UPPER_BOUND), (0, self.FLIPPERs_Y), 3)
+            pygame.draw.line(background, WHITE, (self.WIDTH, self.CAMERA_UPPER_BOUND), (self.WIDTH, self.FLIPPERs_Y), 3)
+        return background
+
+    def render(self):
+        """
+        Draw the current state of the table and update the display.
+        In headless mode the window is created on the first call.
+
+        The static layer is drawn once (see _draw_static_layer). Every frame only
+        the areas covered by moving objects (ball, flippers, LEDs that toggled,
+        the counters) in the previous and in this frame are restored from it,
+        redrawn and pushed to the display. Moving objects are drawn on top of the
+        static layer. Set background to None to force a full redraw.
+        """
+        self.ball_speed_val_px_per_frame = np.sqrt(self.ball_vx_px_per_frame**2 + self.ball_vy_px_per_frame**2)
+        self._draw(self._render_snapshot())
 
-            if self.num_leds > 0: 
-                # Draw blinking LEDs in the background
-                for led in self.leds:
-                    if led["state"]:
-                        pygame.draw.circle(self.screen, led["color"], (led["x"], led["y"]), led["radius"])
-            
-            # Draw ball and flippers on top of the LED background
-            pygame.draw.circle(self.screen, WHITE, (int(self.ball_x), int(self.ball_y)), self.BALL_RADIUS)
-            self._draw_flipper(self.screen, self.left_flipper_pivot, self.left_flipper_angle, self.FLIPPER_LENGTH, self.FLIPPER_WIDTH, mirror=False)
-            self._draw_flipper(self.screen, self.right_flipper_pivot, self.right_flipper_angle, self.FLIPPER_LENGTH, self.FLIPPER_WIDTH, mirror=True)
-            
-            # Draw bumpers
-            for bumper in self.bumpers:
-                pygame.draw.circle(self.screen, bumper["color"], (int(bumper["x"]), int(bumper["y"])), bumper["radius"])
-                pygame.draw.circle(self.screen, RED, (int(bumper["x"]), int(bumper["y"])), bumper["radius"], 2)
-            
-            # Draw bottom boundary segments for visual reference:
-            # pygame.draw.line(self.screen, GRAY, (0, self.PLAYGROUND_HEIGHT), (self.left_gap, self.PLAYGROUND_HEIGHT), 3)
-            # pygame.draw.line(self.screen, GRAY, (self.right_gap, self.PLAYGROUND_HEIGHT), (self.WIDTH, self.PLAYGROUND_HEIGHT), 3)
-            pygame.draw.line(self.screen, GRAY, (0, self.left_flipper_pivot[1]), (self.left_gap, self.left_flipper_pivot[1]), 3)
-            pygame.draw.line(self.screen, GRAY, (self.right_gap, self.left_flipper_pivot[1]), (self.WIDTH, self.left_flipper_pivot[1]), 3)
-
-
-            # Camera boudary
-            if self.SHOW_FOV == True:
-                pygame.draw.line(self.screen, WHITE, (0, self.CAMERA_UPPER_BOUND), (self.WIDTH, self.CAMERA_UPPER_BOUND), 3)
-                pygame.draw.line(self.screen, WHITE, (0, self.FLIPPERs_Y), (self.WIDTH, self.FLIPPERs_Y), 3)
-                pygame.draw.line(self.screen, WHITE, (0, self.CAMERA_UPPER_BOUND), (0, self.FLIPPERs_Y), 3)
-                pygame.draw.line(self.screen, WHITE, (self.WIDTH, self.CAMERA_UPPER_BOUND), (self.WIDTH, self.FLIPPERs_Y), 3)
-            
-            
-            
-            # Display Score and Ball Speed
-            self.ball_speed_val_px_per_frame = np.sqrt(self.ball_vx_px_per_frame**2 + self.ball_vy_px_per_frame**2)
-            # self.score_text = font.render(f"Score: {self.score}, Total reward: {self.cumulative_reward}", True, WHITE)
-            # self.speed_text = font.render(f"Speed: {round(self.ball_speed_val_px_per_frame*self.GAME_FPS, 2)} px/s", True, WHITE)
-            self.n_balls_text = font.render(f"Balls: {'O ' *self.n_reamined_balls} ", True, WHITE)
-            self.screen.blit(self.n_balls_text, (10, self.PLAYGROUND_HEIGHT + 60))
-            # self.speed_x_y_text = font.render(f" ball_vy: {round(self.ball_vy_px_per_frame, 1)}, ball_vx: {round(self.ball_vx_px_per_frame, 1)}", True, WHITE)
-            # self.screen.blit(self.score_text, (10, self.PLAYGROUND_HEIGHT + 10))
-            # self.screen.blit(self.speed_text, (10, self.PLAYGROUND_HEIGHT + 60))
-            # self.screen.blit(self.speed_x_y_text, (10, self.PLAYGROUND_HEIGHT + 70))
-            self.speed_text = font.render(f"Time:\n {self.current_time} s", True, WHITE)
-            # self.speed_x_y_text = font.render(f" ball_vy: {round(self.ball_vy_px_per_frame, 1)}, ball_vx: {round(self.ball_vx_px_per_frame, 1)}", True, WHITE)
-            # self.screen.blit(self.score_text, (10, self.PLAYGROUND_HEIGHT + 10))
-            self.screen.blit(self.speed_text, (10, self.PLAYGROUND_HEIGHT + 10))
-            
-            pygame.display.flip()    
+    def _render_snapshot(self):
+        """
+        The moving parts of the table as an immutable tuple of plain Python values:
+        (ball positions, left and right flipper angle, lit LEDs as (x, y, radius, color),
+        remaining balls, current time). Together with the static layer this is all
+        _draw() needs, so it can be drawn later or from another thread.
+        """
+        leds = ()
+        if self.num_leds > 0:
+            leds = tuple((led["x"], led["y"], led["radius"], led["color"]) for led in self.leds if led["state"])
+        return (tuple(self._ball_positions()), self.left_flipper_angle, self.right_flipper_angle,
+                leds, self.n_reamined_balls, self.current_time)
+
+    def _draw(self, snapshot):
+        """Draw a _render_snapshot() onto the window (see render)."""
+        ball_positions, left_flipper_angle, right_flipper_angle, leds, n_reamined_balls, current_time = snapshot
+        if self.screen is None:
+            self._init_display()
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+            self.background = None
+        screen = self.screen
+        full_redraw = self.background is None
+        if full_redraw:
+            self.background = self._draw_static_layer()
+            screen.blit(self.background, (0, 0))
+            self._dirty_rects = []
+            self._led_rects = set()
+
+        # LEDs that are lit in this frame, by their bounding box
+        led_rects = set((int(x - r), int(y - r), int(2*r + 1), int(2*r + 1)) for x, y, r, _ in leds)
+
+        # Restore the static layer under the moving objects of the last frame and under the LEDs that toggled
+        erased = self._dirty_rects + [pygame.Rect(rect) for rect in self._led_rects ^ led_rects]
+        for rect in erased:
+            screen.blit(self.background, rect, rect)
+
+        # Draw blinking LEDs in the background
+        for x, y, r, color in leds:
+            pygame.draw.circle(screen, color, (x, y), r)
+
+        # Draw ball and flippers on top of the LED background
+        drawn = []
+        for x, y in ball_positions:
+            drawn.append(pygame.draw.circle(screen, WHITE, (int(x), int(y)), self.BALL_RADIUS))
+        drawn.append(self._draw_flipper(screen, self._left_flipper, left_flipper_angle))
+        drawn.append(self._draw_flipper(screen, self._right_flipper, right_flipper_angle))
+
+        # Display Score and Ball Speed
+        font = self.ui_font
+        # self.score_text = font.render(f"Score: {self.score}, Total reward: {self.cumulative_reward}", True, WHITE)
+        # self.speed_text = font.render(f"Speed: {round(self.ball_speed_val_px_per_frame*self.GAME_FPS, 2)} px/s", True, WHITE)
+        if self._n_balls_text_for != n_reamined_balls:
+            self.n_balls_text = font.render(f"Balls: {'O ' *n_reamined_balls} ", True, WHITE)
+            self._n_balls_text_for = n_reamined_balls
+        drawn.append(screen.blit(self.n_balls_text, (10, self.PLAYGROUND_HEIGHT + 60)))
+        # self.speed_x_y_text = font.render(f" ball_vy: {round(self.ball_vy_px_per_frame, 1)}, ball_vx: {round(self.ball_vx_px_per_frame, 1)}", True, WHITE)
+        # self.screen.blit(self.score_text, (10, self.PLAYGROUND_HEIGHT + 10))
+        # self.screen.blit(self.speed_text, (10, self.PLAYGROUND_HEIGHT + 60))
+        # self.screen.blit(self.speed_x_y_text, (10, self.PLAYGROUND_HEIGHT + 70))
+        self.speed_text = font.render(f"Time:\n {current_time} s", True, WHITE)
+        drawn.append(screen.blit(self.speed_text, (10, self.PLAYGROUND_HEIGHT + 10)))
+
+        if full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(erased + drawn)
+        self._dirty_rects = drawn
+        self._led_rects = led_rects
 
 
 
@@ -404,35 +808,28 @@ class GameEnvironment():
         # global ball_x, ball_y, ball_vx, ball_vy
         self.ball_x = self.BALL_INIT_X
         self.ball_y = self.BALL_INIT_Y
-        self.ball_vx_px_per_frame = random.randint(3, 10)#self.BALL_INIT_SPEED_VX
-        self.ball_vy_px_per_frame = random.randint(3, 10)#self.BALL_INIT_SPEED_VY
+        self.ball_vx_px_per_frame = int(self.np_random.integers(3, 11))#self.BALL_INIT_SPEED_VX
+        self.ball_vy_px_per_frame = int(self.np_random.integers(3, 11))#self.BALL_INIT_SPEED_VY
     def _reset_leds(self):
         # --- Blinking LED Setup (Background Effects) ---
         num_leds = self.num_leds
         self.leds = []
         for _ in range(num_leds):
             led = {
-                "x": random.randint(10, self.WIDTH - 10),
-                "y": random.randint(10, self.PLAYGROUND_HEIGHT - 10),
+                "x": int(self.np_random.integers(10, self.WIDTH - 10 + 1)),
+                "y": int(self.np_random.integers(10, self.PLAYGROUND_HEIGHT - 10 + 1)),
                 "radius": 5,
-                "color": (random.randint(0,255), random.randint(0,255), random.randint(0,255)),
-                "blink_interval": random.uniform(0.5, 1.5),
+                "color": tuple(int(c) for c in self.np_random.integers(0, 256, size=3)),
+                "blink_interval": float(self.np_random.uniform(0.5, 1.5)),
                 "last_toggle": 0.0,
                 "state": True
             }
             self.leds.append(led)
         
     def _reset_bumpers(self):
-        # Bumper settings
-        self.bumpers = [
-            # {"x": self.WIDTH // 2, "y": self.WIDTH //5, "radius": self.BUMPERS_RADIUS[0], "bounce": 1.2, "color": (0, 0, 255)},       # Blue bumper in center
-            # {"x": self.WIDTH // 4, "y": self.WIDTH //3, "radius": self.BUMPERS_RADIUS[1], "bounce": 1.2, "color": (255, 0, 255)},       # Magenta bumper left
-            # {"x": 3 * self.WIDTH // 4, "y": self.WIDTH //3, "radius": self.BUMPERS_RADIUS[2], "bounce": 1.2, "color": (255, 255, 0)}    # Yellow bumper right
-            {"x": self.WIDTH // 2, "y": self.HEIGHT //5, "radius": self.BUMPERS_RADIUS[0], "bounce": 1.2, "color": (0, 0, 255)},       # Blue bumper in center
-            {"x": self.WIDTH // 4, "y": self.HEIGHT //3, "radius": self.BUMPERS_RADIUS[1], "bounce": 1.2, "color": (255, 0, 255)},       # Magenta bumper left
-            {"x": 3 * self.WIDTH // 4, "y": self.HEIGHT //3, "radius": self.BUMPERS_RADIUS[2], "bounce": 1.2, "color": (255, 255, 0)}    # Yellow bumper right
-
-        ]
+        # Bumper settings, from the layout (the classic table: blue bumper in center, magenta left, yellow right)
+        self.bumpers = [{"x": x, "y": y, "radius": radius, "bounce": bounce, "color": tuple(color.tolist())}
+                        for x, y, radius, bounce, color in self.layout.bumpers.tolist()]
 
     def _reset_flippers(self):
         # Initialize current flipper angles and target angles
@@ -441,7 +838,73 @@ class GameEnvironment():
         self.left_flipper_target = self.LEFT_IDLE_ANGLE
         self.right_flipper_target = self.RIGHT_IDLE_ANGLE
 
+    def reset(self, seed = None):
+        """
+        Start a new episode: balls, counters, ball and flipper pose, and
+        RUNING/single_episode_game_over. episode_cnt is kept.
+        With a seed, np_random is re-seeded first.
+        """
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+        self._reset()
+        self._reset_flippers()
+        self.single_episode_game_over = False
+        self.BALL_GOT_STUCK = False
+        self.current_time = 0
+        self.RUNING = True
+        if self.event_camera is not None:
+            self.event_camera.reset()
+
+    def get_state(self, out = None):
+        """
+        Snapshot of the full simulation state as a NumPy structured scalar of
+        dtype self.state_dtype (ball, flippers, bumpers, LEDs, counters, flags and
+        the state of np_random). Pass `out` (a 0-d array of that dtype) to reuse
+        a buffer; state.tobytes() gives a compact bytes form.
+        """
+        if out is None:
+            out = np.zeros((), dtype=self.state_dtype)
+        for name, *_ in self._state_fields:
+            out[name] = getattr(self, name)
+        bumpers = out['bumpers']
+        for i, bumper in enumerate(self.bumpers):
+            bumpers[i] = (bumper["x"], bumper["y"], bumper["radius"], bumper["bounce"], bumper["color"])
+        leds = out['leds']
+        for i, led in enumerate(self.leds):
+            leds[i] = (led["x"], led["y"], led["radius"], led["color"], led["blink_interval"], led["last_toggle"], led["state"])
+        rng = self.np_random.bit_generator.state
+        mask = (1 << 64) - 1
+        out['rng_state'] = (rng['state']['state'] & mask, rng['state']['state'] >> 64,
+                            rng['state']['inc'] & mask, rng['state']['inc'] >> 64)
+        out['rng_has_uint32'] = rng['has_uint32']
+        out['rng_uinteger'] = rng['uinteger']
+        return out
+
+    def set_state(self, state):
+        """Restore a snapshot from get_state() (a structured scalar, 0-d array or its bytes)."""
+        if isinstance(state, (bytes, bytearray, memoryview)):
+            state = np.frombuffer(state, dtype=self.state_dtype)[0]
+        for name in self._state_names:
+            setattr(self, name, state[name].item())
+        for name in self._state_array_names:
+            setattr(self, name, state[name].copy())
+        # tolist() converts the records to Python scalars in one call
+        self.bumpers = [{"x": x, "y": y, "radius": radius, "bounce": bounce, "color": tuple(color)}
+                        for x, y, radius, bounce, color in state['bumpers'].tolist()]
+        self.leds = [{"x": int(x), "y": int(y), "radius": int(radius), "color": tuple(color),
+                      "blink_interval": blink_interval, "last_toggle": last_toggle, "state": led_state}
+                     for x, y, radius, color, blink_interval, last_toggle, led_state in state['leds'].tolist()]
+        state_lo, state_hi, inc_lo, inc_hi = state['rng_state'].tolist()
+        self.np_random.bit_generator.state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': state_lo | (state_hi << 64), 'inc': inc_lo | (inc_hi << 64)},
+            'has_uint32': int(state['rng_has_uint32']),
+            'uinteger': int(state['rng_uinteger']),
+        }
+
     def _reset(self):
+        if self.metrics is not None:
+            self.metrics.end_episode(self)
         # self.single_episode_game_over = False
         self.score = self.INIT_SCORE
         self.n_reamined_balls = self.INIT_N_BALLS
@@ -455,6 +918,7 @@ class GameEnvironment():
         self.RIGHT_FLIPPER_SUCCESS_HIT_NUM = 0
         self.LEFT_FLIPPER_PRESS_NUM = 0
         self.RIGHT_FLIPPER_PRESS_NUM = 0
+        self.BALL_STUCK_NUM = 0
         self.left_success_hit = False
         self.right_success_hit = False
 
@@ -471,7 +935,8 @@ class GameEnvironment():
 
     def _check_if_the_ball_got_stuck_at_the_bottom(self):
         # speed_val = math.hypot(self.ball_vx_px_per_frame, self.ball_vy_px_per_frame)    
-        if (np.round(np.abs(self.ball_vx_px_per_frame), 1) == 0) and (np.round(np.abs(self.ball_vy_px_per_frame), 1) == 0) and (self.ball_y + self.BALL_RADIUS >= self.right_flipper_pivot[1]):
+        # Same as np.round(np.abs(v), 1) == 0 for both components, without the NumPy round trip
+        if (abs(self.ball_vx_px_per_frame) * 10 <= 0.5) and (abs(self.ball_vy_px_per_frame) * 10 <= 0.5) and (self.ball_y + self.BALL_RADIUS >= self.FLIPPERs_Y):
             return True
         return False
             # self._reset_ball()  # reset ball if not game over
@@ -492,7 +957,15 @@ class GameEnvironment():
                     pygame.display.quit()
                     self.RUNING = False
                 if self.button_rect_record.collidepoint(event.pos):
-                    self.SAVE_SPEED_LOG = True
+                    # REC toggles the trajectory log and the recording of the window
+                    if self.frame_recorder is None:
+                        self.SAVE_SPEED_LOG = True
+                        self.start_recording(policy='drop')     # Never slow the session down
+                    else:
+                        self.SAVE_SPEED_LOG = False
+                        if self.trajectory_recorder is not None:
+                            self.trajectory_recorder.flush()
+                        self.stop_recording()
                 if self.button_start.collidepoint(event.pos):
                     self.START_GAME = True
         
@@ -527,7 +1000,7 @@ class GameEnvironment():
 
 
         if self.episode_cnt<self.N_EPISODES:
-            if self.ball_y + self.BALL_RADIUS >= self.left_flipper_pivot[1]+self.FLIPPER_LENGTH:
+            if self.ball_y + self.BALL_RADIUS >= self.FLIPPERs_Y+self.FLIPPER_LENGTH:
                 if (self.left_gap ) <= self.ball_x <= (self.right_gap ):
                     # print(self.score)
                     self.n_reamined_balls -= 1
@@ -535,9 +1008,11 @@ class GameEnvironment():
                         
                         self.reward += self.NEG_REWARD # Penalty for game_over or passing through the drain
                         self._reset_ball()
-                        print(f'Episode, Reamined balls: {self.episode_cnt} -> {self.n_reamined_balls}')
+                        if self.verbose:
+                            print(f'Episode, Reamined balls: {self.episode_cnt} -> {self.n_reamined_balls}')
                     else:
-                        print("Oops! Game Over!")
+                        if self.verbose:
+                            print("Oops! Game Over!")
                         self.current_time = 0
                         
                         self.single_episode_game_over = True  # Game over
@@ -545,7 +1020,8 @@ class GameEnvironment():
                         if self.episode_cnt<self.N_EPISODES:
                             self._reset()
                         else:
-                            print("No episodes left!")
+                            if self.verbose:
+                                print("No episodes left!")
                             self.single_episode_game_over = True  # Game over
                             
                             # pygame.display.quit()
@@ -577,9 +1053,9 @@ class GameEnvironment():
                 
 
     def _check_bottom_collision(self):
-        if self.ball_y + self.BALL_RADIUS >= self.left_flipper_pivot[1]:#self.PLAYGROUND_HEIGHT-self.FLIPPER_LENGTH:
+        if self.ball_y + self.BALL_RADIUS >= self.FLIPPERs_Y:#self.PLAYGROUND_HEIGHT-self.FLIPPER_LENGTH:
             if not ((self.left_gap ) <= self.ball_x <= (self.right_gap )):
-                self.ball_y = self.left_flipper_pivot[1] - self.BALL_RADIUS
+                self.ball_y = self.FLIPPERs_Y - self.BALL_RADIUS
                 self.ball_vy_px_per_frame = -self.ball_vy_px_per_frame * self.WALL_RESTITUTION
 
     # def _check_bottom_collision(self):
@@ -614,12 +1090,15 @@ class GameEnvironment():
            1: activate left flipper only
            2: activate right flipper only
            3: activate both flippers
+
+        The action is held for frame_skip physics ticks. The returned reward is
+        the sum over those ticks and the hit flags are set if any tick hit. The
+        step ends early on the tick where an episode is over.
         """
         if self.RUNING == True:
-            
-            self.reward = 0
 
-            self._check_game_control()
+            if not self.HEADLESS:
+                self._check_game_control()
             # --- Flipper Controls (replace the discrete state code) ---
 
             # --- Set flipper target angles based on action ---
@@ -643,87 +1122,181 @@ class GameEnvironment():
                 self.left_press = False            
                 self.right_press = False
 
+            if (self._step_kernel is not None and self.frame_skip > 1
+                    and not self.SAVE_SPEED_LOG and not self.CONTINUOUS_COLLISION):
+                # Same ticks, same results, compiled (the trajectory log and swept collisions need the Python path).
+                # A single tick costs less in Python than copying the state into the kernel and back: one tick
+                # steps go through the kernel only in blocks, with play_steps
+                ticks = self._step_kernel.run(self, action)
+            else:
+                reward = 0
+                left_success_hit = right_success_hit = False
+                ticks = 0
+                while ticks < self.frame_skip:
+                    ticks += 1
+                    # Only the last tick of the step draws a frame (and waits for the frame limiter)
+                    self._tick(action, ticks == self.frame_skip)
+                    reward += self.reward
+                    left_success_hit = left_success_hit or self.left_success_hit
+                    right_success_hit = right_success_hit or self.right_success_hit
+                    if self.single_episode_game_over or not self.RUNING:
+                        break
+                if ticks > 1:
+                    self.reward = reward
+                    self.left_success_hit = left_success_hit
+                    self.right_success_hit = right_success_hit
+
+            if self.event_camera is not None:
+                self.event_camera.update(ticks * self.PHYSICS_DT)
+
+            if self.viewer is not None and self.viewer.frame_requested:
+                self.viewer.publish(self._render_snapshot())
+
+            if self.frame_recorder is not None:
+                self.frame_recorder.capture(self)
+
+            if self.metrics is not None:
+                self.metrics.countdown -= 1
+                if self.metrics.countdown <= 0:
+                    self.metrics.publish(self)
+
+            if not self.RUNING:
+                self.close()
 
 
-            self._update_flippers()
+        # else:
+        #     self.single_episode_game_over = True  # Game over
+        
+        return self.reward, self.single_episode_game_over, self.score, self.left_success_hit, self.right_success_hit 
 
-            
-            # gravity and ball x y update, were here
+    def play_steps(self, actions):
+        """
+        play_step for each of `actions` in turn, stopping after the step where
+        the game stops running. Returns the results of those steps as arrays:
+        (rewards, game_over, left_success_hit, right_success_hit).
+
+        With jit, the steps run in one kernel call: the state is copied into the
+        kernel and back once per call, not once per step, which is what makes
+        short steps (frame_skip=1) fast. Tables with an event camera, a viewer,
+        a frame recorder, the trajectory log or swept collisions, which need
+        every step in Python, call play_step instead.
+        """
+        actions = np.asarray(actions, dtype=np.int64).reshape(-1)
+        out = np.zeros((actions.size, 4))      # reward, game_over, left and right hits per step
+        n = 0
+        if not self.RUNING:
+            pass
+        elif (self._step_kernel is None or self.SAVE_SPEED_LOG or self.CONTINUOUS_COLLISION
+                or self.event_camera is not None or self.viewer is not None or self.frame_recorder is not None):
+            for action in actions.tolist():
+                out[n, 0], out[n, 1], _, out[n, 2], out[n, 3] = self.play_step(action)
+                n += 1
+                if not self.RUNING:
+                    break
+        else:
+            n = self._step_kernel.run_steps(self, actions, out)
+            self._after_steps(actions[:n])
+        out = out[:n]
+        return out[:, 0], out[:, 1] > 0, out[:, 2] > 0, out[:, 3] > 0
+
+    def _after_steps(self, actions):
+        # The bookkeeping of play_step after the ticks of `actions`, for play_steps
+        n = actions.size
+        if n and (actions == 0).any():
+            self.left_press = False
+            self.right_press = False
+        if self.metrics is not None:
+            self.metrics.countdown -= n
+            if self.metrics.countdown <= 0:
+                self.metrics.publish(self)
+        if not self.RUNING:
+            self.close()
+
+    def _log_tick(self, action, ball_x, ball_y, ball_vx_px_per_frame, ball_vy_px_per_frame, ball_speed_px_per_sec):
+        """Record the tick (with the given ball) into the trajectory log; print its speed with print_speed_log."""
+        if self.PRINT_SPEED_LOG:
+            print(ball_speed_px_per_sec, ball_vx_px_per_frame*self.GAME_FPS, ball_vy_px_per_frame*self.GAME_FPS)
+        if self.trajectory_recorder is None:
+            self.trajectory_recorder = TrajectoryRecorder(self.log_filename, flush_size=self.log_flush_size)
+        self.trajectory_recorder.record(self.time_tick_cnt, self.episode_cnt, self.single_episode_game_over,
+                                        ball_x, ball_y, ball_vx_px_per_frame, ball_vy_px_per_frame,
+                                        ball_speed_px_per_sec, self.left_flipper_angle, self.right_flipper_angle,
+                                        action, self.reward)
+
+    def _tick(self, action, render = True):
+        """One physics tick of PHYSICS_DT with the flipper targets already set."""
+        self.reward = 0
 
+        self._update_flippers()
 
+        
+        # gravity and ball x y update, were here
 
-            
 
-            # print(self.ball_x, self.ball_vx_px_per_frame)
-            # print(self.ball_y, self.ball_vy_px_per_frame)
 
-            self._check_flippers_collision(action)
-            self._check_wall_collidepoint()
-            self._check_top_wall_collision()
-            self._check_bumpers_collision()
-            self._check_bottom_collision()
-            if self.START_GAME == True:
-                self._check_game_over()
-                self._check_drain()
+        
 
+        # print(self.ball_x, self.ball_vx_px_per_frame)
+        # print(self.ball_y, self.ball_vy_px_per_frame)
+
+        self._check_flippers_collision(action)
+        self._check_wall_collidepoint()
+        self._check_top_wall_collision()
+        self._check_bumpers_collision()
+        if self.segments:
+            self._check_segments_collision()
+        self._check_bottom_collision()
+        if self.START_GAME == True:
+            self._check_game_over()
+            self._check_drain()
+
+        if self.HEADLESS or not render:
+            self._advance_clock(wait=False)
+        else:
             self.update_ui()# update was after playstep in the pipeline_MV
-            
-            
-            # --- Apply Gravity ---
-            self.ball_vy_px_per_frame += self.GRAVITY
-
-            # --- Update Ball Position ---
-            self.ball_x += self.ball_vx_px_per_frame
-            self.ball_y += self.ball_vy_px_per_frame
-            
-            
-            if self._check_if_the_ball_got_stuck_at_the_bottom():
-                self.BALL_GOT_STUCK = True
-                self._reset_ball()
-            else:
-                self.BALL_GOT_STUCK = False
-            
-            # --- Apply Friction ---
-            self.ball_vx_px_per_frame *= self.FRICTION
-            self.ball_vy_px_per_frame *= self.FRICTION
-
-            # --- Enforce Maximum Speed ---
-            self.ball_speed_val_px_per_frame = np.sqrt(self.ball_vx_px_per_frame**2 + self.ball_vy_px_per_frame**2) 
-            
-            self.ball_speed_val_px_per_sec = self.ball_speed_val_px_per_frame * self.GAME_FPS
-
-            # if self.ball_speed_val_px_per_sec > self.MAX_SPEED_PX_PER_SEC:
-            #     factor = (self.MAX_SPEED_PX_PER_SEC / self.GAME_FPS) / self.ball_speed_val_px_per_frame
-            #     self.ball_vx_px_per_frame *= factor
-            #     self.ball_vy_px_per_frame *= factor
-
-            if self.ball_speed_val_px_per_frame > self.MAX_SPEED_PX_PER_FRAME:
-                factor = self.MAX_SPEED_PX_PER_FRAME / self.ball_speed_val_px_per_frame
-                self.ball_vx_px_per_frame *= factor
-                self.ball_vy_px_per_frame *= factor
-            # self.current_time += self.dt
-            self.cumulative_reward += self.reward # track an episode reward
-
-
-            if self.SAVE_SPEED_LOG:
-                print(self.ball_speed_val_px_per_frame*self.GAME_FPS, self.ball_vx_px_per_frame*self.GAME_FPS, self.ball_vy_px_per_frame*self.GAME_FPS)
-                if not os.path.exists(self.log_filename):
-                    with open(self.log_filename, 'a') as f:
-                        f.write(f'time,ball_x,ball_y,vx,vy,v\n')
-                    with open(self.log_filename, 'a') as f:
-                        f.write(f'{self.time_tick_cnt},{self.ball_x},{self.ball_y},{self.ball_vx_px_per_frame* self.GAME_FPS},{self.ball_vy_px_per_frame* self.GAME_FPS},{self.ball_speed_val_px_per_frame* self.GAME_FPS}\n') #,{np.sqrt((self.ball_vx_px_per_frame)**2 + (self.ball_vy_px_per_frame)**2)}\n')                        
-                else:
-                    with open(self.log_filename, 'a') as f:
-                        f.write(f'{self.time_tick_cnt},{self.ball_x},{self.ball_y},{self.ball_vx_px_per_frame* self.GAME_FPS},{self.ball_vy_px_per_frame* self.GAME_FPS},{self.ball_speed_val_px_per_frame* self.GAME_FPS}\n') #,{np.sqrt((self.ball_vx_px_per_frame)**2 + (self.ball_vy_px_per_frame)**2)}\n')                        
-
+        
+        
+        # --- Apply Gravity ---
+        self.ball_vy_px_per_frame += self.GRAVITY * self.TICK_FRAMES
 
-        # else:
-        #     self.single_episode_game_over = True  # Game over
+        # --- Update Ball Position ---
+        if self.CONTINUOUS_COLLISION:
+            self._move_ball(action)
+        else:
+            self.ball_x += self.ball_vx_px_per_frame * self.TICK_FRAMES
+            self.ball_y += self.ball_vy_px_per_frame * self.TICK_FRAMES
         
-        return self.reward, self.single_episode_game_over, self.score, self.left_success_hit, self.right_success_hit 
+        
+        if self._check_if_the_ball_got_stuck_at_the_bottom():
+            self.BALL_GOT_STUCK = True
+            self.BALL_STUCK_NUM += 1
+            self._reset_ball()
+        else:
+            self.BALL_GOT_STUCK = False
+        
+        # --- Apply Friction ---
+        friction = self.FRICTION ** self.TICK_FRAMES
+        self.ball_vx_px_per_frame *= friction
+        self.ball_vy_px_per_frame *= friction
 
+        # --- Enforce Maximum Speed ---
+        self.ball_speed_val_px_per_frame = math.sqrt(self.ball_vx_px_per_frame*self.ball_vx_px_per_frame + self.ball_vy_px_per_frame*self.ball_vy_px_per_frame) 
         
+        self.ball_speed_val_px_per_sec = self.ball_speed_val_px_per_frame * self.GAME_FPS
 
+        # if self.ball_speed_val_px_per_sec > self.MAX_SPEED_PX_PER_SEC:
+        #     factor = (self.MAX_SPEED_PX_PER_SEC / self.GAME_FPS) / self.ball_speed_val_px_per_frame
+        #     self.ball_vx_px_per_frame *= factor
+        #     self.ball_vy_px_per_frame *= factor
 
+        if self.ball_speed_val_px_per_frame > self.MAX_SPEED_PX_PER_FRAME:
+            factor = self.MAX_SPEED_PX_PER_FRAME / self.ball_speed_val_px_per_frame
+            self.ball_vx_px_per_frame *= factor
+            self.ball_vy_px_per_frame *= factor
+        # self.current_time += self.dt
+        self.cumulative_reward += self.reward # track an episode reward
 
-        
+
+        if self.SAVE_SPEED_LOG:
+            self._log_tick(action, self.ball_x, self.ball_y, self.ball_vx_px_per_frame, self.ball_vy_px_per_frame,
+                           self.ball_speed_val_px_per_sec)
@@ -0,0 +1,322 @@
+import sys
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+from PinBallGameEnvironment import GameEnvironment
+
+# gymnasium is optional: without it the wrappers work the same, they just
+# have no observation_space / action_space objects.
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError:
+    gym = None
+    spaces = None
+
+
+class PinBallEnv(gym.Env if gym is not None else object):
+    """
+    Gym-style reset()/step() wrapper around a headless GameEnvironment.
+
+    obs_type:
+        'state': float32 vector [ball_x, ball_y, ball_vx, ball_vy, left_flipper_angle, right_flipper_angle]
+                 (velocities in px per frame, angles in degrees)
+        'fov':   uint8 camera frame from GameEnvironment.get_fov_frame(downscale, grayscale)
+    max_episode_steps: steps after which an episode is truncated (None = never)
+    env_kwargs: passed on to GameEnvironment
+    """
+    metadata = {"render_modes": ["human"]}
+    STATE_SIZE = 6
+
+    def __init__(self, obs_type = 'state', downscale = 1, grayscale = True, max_episode_steps = None, **env_kwargs):
+        env_kwargs.setdefault('num_episodes', sys.maxsize)
+        env_kwargs.setdefault('verbose', False)
+        env_kwargs['headless'] = True
+        self.game = GameEnvironment(**env_kwargs)
+        self.obs_type = obs_type
+        self.downscale = downscale
+        self.grayscale = grayscale
+        self.max_episode_steps = max_episode_steps
+        self.episode_steps = 0
+
+        if obs_type == 'state':
+            self.observation_shape, self.observation_dtype = (self.STATE_SIZE,), np.dtype(np.float32)
+        elif obs_type == 'fov':
+            frame = self.game.get_fov_frame(downscale, grayscale)
+            self.observation_shape, self.observation_dtype = frame.shape, frame.dtype
+        else:
+            raise ValueError(f"Unknown obs_type: {obs_type}")
+
+        if spaces is not None:
+            self.action_space = spaces.Discrete(4)
+            if obs_type == 'state':
+                self.observation_space = spaces.Box(-np.inf, np.inf, self.observation_shape, np.float32)
+            else:
+                self.observation_space = spaces.Box(0, 255, self.observation_shape, np.uint8)
+
+    def observe(self, out = None):
+        """Write the current observation into `out` (allocated if None) and return it."""
+        if out is None:
+            out = np.empty(self.observation_shape, dtype=self.observation_dtype)
+        game = self.game
+        if self.obs_type == 'state':
+            out[0] = game.ball_x
+            out[1] = game.ball_y
+            out[2] = game.ball_vx_px_per_frame
+            out[3] = game.ball_vy_px_per_frame
+            out[4] = game.left_flipper_angle
+            out[5] = game.right_flipper_angle
+        else:
+            np.copyto(out, game.get_fov_frame(self.downscale, self.grayscale))
+        return out
+
+    def _info(self):
+        game = self.game
+        return {"left_success_hit": game.left_success_hit, "right_success_hit": game.right_success_hit,
+                "episode_cnt": game.episode_cnt, "cumulative_reward": game.cumulative_reward}
+
+    def reset(self, seed = None, options = None):
+        self.game.reset(seed=seed)
+        self.episode_steps = 0
+        return self.observe(), self._info()
+
+    def _step(self, action):
+        # step() without the observation and info: (reward, terminated, truncated)
+        reward, game_over, _, _, _ = self.game.play_step(action)
+        self.episode_steps += 1
+        truncated = self.max_episode_steps is not None and self.episode_steps >= self.max_episode_steps
+        if game_over:
+            self.episode_steps = 0          # The game has already reset itself into the next episode
+        return reward, bool(game_over), truncated
+
+    def step(self, action):
+        reward, terminated, truncated = self._step(int(action))
+        return self.observe(), reward, terminated, truncated, self._info()
+
+    def render(self):
+        self.game.render()
+
+    def close(self):
+        self.game.close()
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(pipe, indices, names, env_kwargs, metrics = None):
+    """
+    Worker process: steps the PinBallEnvs of `indices` (env i in column i of the shared arrays).
+    A ('step', n) command runs n steps from the rows of the shared action block.
+    """
+    block = None
+    writers = []
+    if metrics is not None:
+        from PinBallMetrics import MetricsBlock
+        block = MetricsBlock.attach(metrics)
+    envs = []
+    for index in indices:
+        kwargs = env_kwargs
+        if kwargs.get('seed') is not None:
+            kwargs = dict(kwargs, seed=kwargs['seed'] + index)
+        if block is not None:
+            writers.append(block.writer(index))
+            kwargs = dict(kwargs, metrics=writers[-1])
+        envs.append(PinBallEnv(**kwargs))
+    handles = []
+    views = {}
+    for key, (name, shape, dtype) in names.items():
+        shm, view = _attach(name, shape, dtype)
+        handles.append(shm)
+        views[key] = view
+    obs, actions, rewards = views['obs'], views['actions'], views['rewards']
+    terminated, truncated = views['terminated'], views['truncated']
+    left_hit, right_hit = views['left_hit'], views['right_hit']
+    try:
+        while True:
+            cmd, arg = pipe.recv()
+            if cmd == 'step':
+                for index, env in zip(indices, envs):
+                    game = env.game
+                    # The per-step scalars are collected in lists and written as one column per command
+                    steps = [None] * arg
+                    for t, action in enumerate(actions[:arg, index].tolist()):
+                        reward, term, trunc = env._step(action)
+                        # A drain already started the next episode inside play_step; only a truncated
+                        # episode or the last one of the game still needs its reset
+                        if trunc or (term and game.episode_cnt >= game.N_EPISODES):
+                            env.reset()
+                        env.observe(out=obs[t, index])
+                        steps[t] = (reward, term, trunc, game.left_success_hit, game.right_success_hit)
+                    rewards[:arg, index], terminated[:arg, index], truncated[:arg, index], \
+                        left_hit[:arg, index], right_hit[:arg, index] = zip(*steps)
+                pipe.send(None)
+            elif cmd == 'reset':
+                for index, env in zip(indices, envs):
+                    env.reset(seed=None if arg is None else arg + index)
+                    env.observe(out=obs[0, index])
+                pipe.send(None)
+            elif cmd == 'close':
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        for writer in writers:
+            writer.close()
+        if block is not None:
+            block.close()
+        for shm in handles:
+            shm.close()
+        pipe.close()
+
+
+class SubprocVectorEnv():
+    """
+    K PinBallEnv instances, stepped in num_workers worker processes.
+
+    Env i is seeded with env_kwargs['seed'] + i (and reset(seed) with seed + i).
+    By default every env has its own worker; with num_workers < K the envs
+    are split into contiguous groups, one per worker. Observations, actions,
+    rewards and done flags live in shared memory arrays of shape
+    (block_steps, K, ...). The pipes to the workers only carry short
+    commands, so no observation is ever pickled.
+
+    Each command is a pipe round trip per worker, which costs several
+    play_steps. Two ways to amortize it: more envs per worker
+    (num_workers < K), and step_block(actions), which runs up to
+    block_steps steps per command from an (T, K) action block.
+
+    Finished episodes are reset automatically, as in gymnasium's vector envs.
+    A terminated episode is reset by the game itself within the step that
+    drained the last ball, so the observation returned with terminated=True
+    is already the first observation of the next episode; no extra reset (and
+    no extra random draw) happens, and every env steps exactly like a single
+    PinBallEnv.
+
+    step() returns (obs, rewards, terminated, truncated, infos), step_block()
+    the same with a leading T axis. With copy=False, the arrays are the shared
+    buffers themselves and the next step overwrites them.
+
+    metrics: name of a PinBallMetrics.MetricsBlock with at least num_envs rows;
+    env i publishes its live counters into row i.
+    """
+    def __init__(self, num_envs, env_kwargs = None, context = None, copy = True, metrics = None,
+                 num_workers = None, block_steps = 1):
+        env_kwargs = dict(env_kwargs or {})
+        self.num_envs = num_envs
+        self.num_workers = min(num_envs, num_workers or num_envs)
+        self.block_steps = block_steps
+        self.copy = copy
+        probe = PinBallEnv(**env_kwargs)
+        self.observation_shape, self.observation_dtype = probe.observation_shape, probe.observation_dtype
+        if spaces is not None:
+            self.single_observation_space = probe.observation_space
+            self.single_action_space = probe.action_space
+        probe.close()
+
+        layout = {
+            'obs': ((block_steps, num_envs) + tuple(self.observation_shape), self.observation_dtype),
+            'actions': ((block_steps, num_envs), np.dtype(np.int64)),
+            'rewards': ((block_steps, num_envs), np.dtype(np.float64)),
+            'terminated': ((block_steps, num_envs), np.dtype(bool)),
+            'truncated': ((block_steps, num_envs), np.dtype(bool)),
+            'left_hit': ((block_steps, num_envs), np.dtype(bool)),
+            'right_hit': ((block_steps, num_envs), np.dtype(bool)),
+        }
+        self._shm = {}
+        self._blocks = {}
+        names = {}
+        for key, (shape, dtype) in layout.items():
+            size = max(1, int(np.prod(shape)) * dtype.itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shm[key] = shm
+            self._blocks[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            setattr(self, key, self._blocks[key][0])
+            names[key] = (shm.name, shape, dtype)
+
+        ctx = mp.get_context(context)
+        self.pipes = []
+        self.processes = []
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).round().astype(int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(child, range(lo, hi), names, env_kwargs, metrics), daemon=True)
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+    def _wait(self):
+        for pipe in self.pipes:
+            pipe.recv()
+
+    def _out(self, array):
+        return array.copy() if self.copy else array
+
+    def reset(self, seed = None):
+        for pipe in self.pipes:
+            pipe.send(('reset', seed))
+        self._wait()
+        return self._out(self.obs), {}
+
+    def step_async(self, actions):
+        self.actions[:] = actions
+        for pipe in self.pipes:
+            pipe.send(('step', 1))
+
+    def step_wait(self):
+        self._wait()
+        infos = {"left_success_hit": self._out(self.left_hit), "right_success_hit": self._out(self.right_hit)}
+        return self._out(self.obs), self._out(self.rewards), self._out(self.terminated), self._out(self.truncated), infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def step_block(self, actions):
+        """
+        Step every env through the T rows of `actions` (T, K), T <= block_steps, with one
+        command per worker. Returns the results of step() with a leading T axis.
+        """
+        steps = len(actions)
+        if not 0 < steps <= self.block_steps:
+            raise ValueError(f"step_block takes 1 to block_steps={self.block_steps} rows of actions, not {steps}")
+        blocks = self._blocks
+        blocks['actions'][:steps] = actions
+        for pipe in self.pipes:
+            pipe.send(('step', steps))
+        self._wait()
+        infos = {"left_success_hit": self._out(blocks['left_hit'][:steps]),
+                 "right_success_hit": self._out(blocks['right_hit'][:steps])}
+        return (self._out(blocks['obs'][:steps]), self._out(blocks['rewards'][:steps]),
+                self._out(blocks['terminated'][:steps]), self._out(blocks['truncated'][:steps]), infos)
+
+    def close(self):
+        if self.closed:
+            return
+        for pipe in self.pipes:
+            try:
+                pipe.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._blocks = {}
+        for key, shm in self._shm.items():
+            setattr(self, key, None)
+            shm.close()
+            shm.unlink()
+        self.closed = True
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
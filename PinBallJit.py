@@ -0,0 +1,589 @@
+"""
+Optional Numba kernel for the physics ticks of GameEnvironment.play_step
+and play_steps.
+
+run_ticks() is the pure-physics part of GameEnvironment._tick compiled to
+machine code: flipper rotation, flipper / wall / bumper / segment / bottom
+collisions, the game-over check, gravity, motion, friction and the speed
+clamp. It performs the same float operations in the same order as the
+Python path (no fastmath), so a jitted environment produces bit-identical
+trajectories, rewards and counters. run_steps() runs it for a sequence of
+actions, so a block of steps costs one call into the kernel.
+
+Everything that needs Python stays in Python. A tick that drains the ball,
+resets a stuck ball (both draw from the environment RNG and may reset the
+episode) or meets a flipper angle outside the pose tables is not committed
+by the kernel: StepKernel.run_steps() replays that one tick with
+GameEnvironment._tick and then continues in the kernel. Blinking LEDs are
+toggled by the kernel too and written back to the environment's LED dicts
+when the kernel returns.
+
+Numba is optional. Without it, AVAILABLE is False and
+GameEnvironment(jit=True) silently uses the Python path.
+"""
+import math
+import struct
+import numpy as np
+
+from PinBallPhysics import point_segment_distance, reflect_vector
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+AVAILABLE = numba is not None
+
+# Float state (F): ball, flippers, clock, rewards
+BALL_X, BALL_Y, BALL_VX, BALL_VY, LEFT_ANGLE, RIGHT_ANGLE, LEFT_TARGET, RIGHT_TARGET, \
+    CURRENT_TIME, CUMULATIVE_REWARD, SPEED_PX_PER_FRAME, SPEED_PX_PER_SEC, STEP_REWARD = range(13)
+# Integer state (I): clock and episode state, START_GAME and frame_skip, the successful flipper hits
+# of the ticks run, the LED toggles of the call, then for run_steps the next step, the ticks run by
+# the call and the ticks already run of the current step
+TICK_CNT, N_BALLS, EPISODE_CNT, GAME_OVER, RUNNING, START_GAME, FRAME_SKIP, LEFT_HITS, RIGHT_HITS, \
+    LED_TOGGLES, STEP, TICKS, STEP_TICKS = range(13)
+# Blinking LEDs (L): one column per LED
+LED_LAST_TOGGLE, LED_BLINK_INTERVAL, LED_STATE = range(3)
+# Per-step results of run_steps (columns of `out`)
+OUT_REWARD, OUT_GAME_OVER, OUT_LEFT_HITS, OUT_RIGHT_HITS = range(4)
+
+# Status returned by run_ticks and run_steps
+DONE, STOPPED, NEEDS_PYTHON = range(3)
+
+# Table (T): constants, then the offsets and sizes of the packed tables (one array keeps the call cheap)
+(T_RADIUS, T_WIDTH, T_WALL_RESTITUTION, T_FLIPPERS_Y, T_FLIPPER_LENGTH, T_LEFT_GAP, T_RIGHT_GAP, T_FLIPPER_STEP,
+ T_FLIPPER_BOOST, T_POS_REWARD, T_GRAVITY_STEP, T_TICK_FRAMES, T_FRICTION, T_MAX_SPEED, T_GAME_FPS, T_PHYSICS_DT,
+ T_LEFT_PIVOT_X, T_LEFT_PIVOT_Y, T_RIGHT_PIVOT_X, T_RIGHT_PIVOT_Y, T_N_EPISODES,
+ T_LEFT_IDLE, T_LEFT_ACTIVE, T_RIGHT_IDLE, T_RIGHT_ACTIVE,
+ T_LEFT_POSES, T_N_LEFT_POSES, T_RIGHT_POSES, T_N_RIGHT_POSES, T_BUMPERS, T_N_BUMPERS, T_SEGMENTS, T_N_SEGMENTS,
+ T_BUMPER_GRID, T_SEGMENT_GRID, T_HEADER) = range(36)
+
+# GameEnvironment methods the kernel replaces; a subclass overriding any of them keeps the Python path
+REPLACED = ('_tick', '_update_flippers', '_check_flippers_collision', '_collide_flippers', '_check_wall_collidepoint',
+            '_check_top_wall_collision', '_check_bumpers_collision', '_check_segments_collision',
+            '_check_bottom_collision', '_check_game_over', '_check_drain', '_check_if_the_ball_got_stuck_at_the_bottom')
+
+
+def _grid_table(grid):
+    """UniformGrid packed for the kernel: cell_size, cols, rows, the cell_start offsets, then cell_items."""
+    return np.concatenate(([grid.cell_size, grid.cols, grid.rows], grid.cell_start, grid.cell_items)).astype(np.float64)
+
+
+def _grid_range(T, grid, x, y):
+    # Positions in T of the obstacles listed in the cell of (x, y), like UniformGrid.query
+    # (positions outside the grid are clamped to its border cells)
+    cell_size = T[grid]
+    cols = int(T[grid + 1])
+    rows = int(T[grid + 2])
+    col = int(x // cell_size)
+    row = int(y // cell_size)
+    if col < 0:
+        col = 0
+    elif col > cols - 1:
+        col = cols - 1
+    if row < 0:
+        row = 0
+    elif row > rows - 1:
+        row = rows - 1
+    cell = row * cols + col
+    items = grid + 3 + cols * rows + 1
+    return items + int(T[grid + 3 + cell]), items + int(T[grid + 4 + cell])
+
+
+def _pose_index(angles, angle):
+    # Position of `angle` in a sorted pose table, -1 if it is not there
+    i = np.searchsorted(angles, angle)
+    if i < angles.size and angles[i] == angle:
+        return i
+    return -1
+
+
+def run_ticks(F, I, T, L, action, n_ticks, start_game):
+    """
+    Up to n_ticks physics ticks with the flipper targets already set (F and I
+    updated in place; I[LEFT_HITS], I[RIGHT_HITS] count the successful hits
+    of these ticks; the LEDs in L are toggled like _update_leds does and
+    I[LED_TOGGLES] counts the toggles). Stops after a tick that ends the
+    episode (STOPPED) or before a tick that needs Python (NEEDS_PYTHON).
+    Returns (ticks run, status).
+    """
+    R = T[T_RADIUS]
+    W = T[T_WIDTH]
+    WR = T[T_WALL_RESTITUTION]
+    FY = T[T_FLIPPERS_Y]
+    left_gap = T[T_LEFT_GAP]
+    right_gap = T[T_RIGHT_GAP]
+    step = T[T_FLIPPER_STEP]
+    n_episodes = T[T_N_EPISODES]
+    o, n = int(T[T_LEFT_POSES]), int(T[T_N_LEFT_POSES])
+    left_angles, left_bx, left_by = T[o:o + n], T[o + n:o + 2*n], T[o + 2*n:o + 3*n]
+    o, n = int(T[T_RIGHT_POSES]), int(T[T_N_RIGHT_POSES])
+    right_angles, right_bx, right_by = T[o:o + n], T[o + n:o + 2*n], T[o + 2*n:o + 3*n]
+    bumpers, n_bumpers = int(T[T_BUMPERS]), int(T[T_N_BUMPERS])
+    segments, n_segments = int(T[T_SEGMENTS]), int(T[T_N_SEGMENTS])
+    bumper_grid, segment_grid = int(T[T_BUMPER_GRID]), int(T[T_SEGMENT_GRID])
+
+    x = F[BALL_X]
+    y = F[BALL_Y]
+    vx = F[BALL_VX]
+    vy = F[BALL_VY]
+    left_angle = F[LEFT_ANGLE]
+    right_angle = F[RIGHT_ANGLE]
+    left_target = F[LEFT_TARGET]
+    right_target = F[RIGHT_TARGET]
+    current_time = F[CURRENT_TIME]
+    cumulative_reward = F[CUMULATIVE_REWARD]
+    speed = F[SPEED_PX_PER_FRAME]
+    speed_per_sec = F[SPEED_PX_PER_SEC]
+    step_reward = F[STEP_REWARD]
+    tick_cnt = I[TICK_CNT]
+    n_balls = I[N_BALLS]
+    episode_cnt = I[EPISODE_CNT]
+    game_over = I[GAME_OVER]
+    running = I[RUNNING]
+    left_hits = 0
+    right_hits = 0
+
+    done = 0
+    status = DONE
+    while done < n_ticks:
+        # The tick works on copies and is only committed at its end
+        tx, ty, tvx, tvy = x, y, vx, vy
+        reward = 0.0
+        t_game_over, t_running = game_over, running
+        t_left_hit = 0
+        t_right_hit = 0
+
+        # _update_flippers
+        la = left_angle
+        if la < left_target:
+            la += step
+            if la > left_target:
+                la = left_target
+        elif la > left_target:
+            la -= step
+            if la < left_target:
+                la = left_target
+        ra = right_angle
+        if ra < right_target:
+            ra += step
+            if ra > right_target:
+                ra = right_target
+        elif ra > right_target:
+            ra -= step
+            if ra < right_target:
+                ra = right_target
+
+        # _collide_flippers: only the pressed flipper of actions 1 and 2 hits, always boosted
+        if action == 1 or action == 2:
+            if action == 1:
+                k = _pose_index(left_angles, la)
+                px, py = T[T_LEFT_PIVOT_X], T[T_LEFT_PIVOT_Y]
+                bx, by = left_bx, left_by
+            else:
+                k = _pose_index(right_angles, ra)
+                px, py = T[T_RIGHT_PIVOT_X], T[T_RIGHT_PIVOT_Y]
+                bx, by = right_bx, right_by
+            if k < 0:
+                status = NEEDS_PYTHON
+                break
+            dist, closest_x, closest_y = point_segment_distance(tx, ty, px, py, bx[k], by[k])
+            if dist < R:
+                if dist != 0:
+                    normal_x = (tx - closest_x) / dist
+                    normal_y = (ty - closest_y) / dist
+                    tvx, tvy = reflect_vector(tvx, tvy, normal_x, normal_y)
+                    tvx *= T[T_FLIPPER_BOOST]
+                    tvy *= T[T_FLIPPER_BOOST]
+                    if action == 1:
+                        t_left_hit = 1
+                    else:
+                        t_right_hit = 1
+                    tx = closest_x + normal_x * (R + 20)
+                    ty = closest_y + normal_y * (R + 20)
+
+        # _check_wall_collidepoint, _check_top_wall_collision
+        if tx - R <= 0:
+            tx = R
+            tvx = -tvx * WR
+        if tx + R >= W:
+            tx = W - R
+            tvx = -tvx * WR
+        if ty - R <= 0:
+            ty = R
+            if abs(tvy) < 0.2:
+                tvy = 0.2
+            else:
+                tvy = -tvy * WR
+
+        # _check_bumpers_collision: after a hit, only later bumpers listed at the new position
+        if n_bumpers > 0:
+            p, end = _grid_range(T, bumper_grid, tx, ty)
+            last = -1
+            while p < end:
+                j = int(T[p])
+                p += 1
+                if j <= last:
+                    continue
+                bumper_x = T[bumpers + j]
+                bumper_y = T[bumpers + n_bumpers + j]
+                radius = T[bumpers + 2*n_bumpers + j]
+                bounce = T[bumpers + 3*n_bumpers + j]
+                dx = tx - bumper_x
+                dy = ty - bumper_y
+                dist = math.sqrt(dx*dx + dy*dy)
+                if dist < R + radius:
+                    normal_x, normal_y = dx, dy
+                    if dist != 0:
+                        normal_x = dx / dist
+                        normal_y = dy / dist
+                    rvx, rvy = reflect_vector(tvx, tvy, normal_x, normal_y)
+                    tvx = rvx * bounce
+                    tvy = rvy * bounce
+                    tx = bumper_x + normal_x*(R + radius + 1)
+                    ty = bumper_y + normal_y*(R + radius + 1)
+                    reward += T[T_POS_REWARD]
+                    last = j
+                    p, end = _grid_range(T, bumper_grid, tx, ty)
+
+        # _check_segments_collision
+        if n_segments > 0:
+            p, end = _grid_range(T, segment_grid, tx, ty)
+            last = -1
+            while p < end:
+                j = int(T[p])
+                p += 1
+                if j <= last:
+                    continue
+                seg = segments + 7*j
+                dist, closest_x, closest_y = point_segment_distance(tx, ty, T[seg], T[seg + 1], T[seg + 2], T[seg + 3])
+                if dist < R and dist != 0:
+                    normal_x = (tx - closest_x) / dist
+                    normal_y = (ty - closest_y) / dist
+                    if tvx*normal_x + tvy*normal_y < 0:
+                        tvx, tvy = reflect_vector(tvx, tvy, normal_x, normal_y)
+                    tvx = tvx * T[seg + 4] + T[seg + 5] * normal_x
+                    tvy = tvy * T[seg + 4] + T[seg + 5] * normal_y
+                    tx = closest_x + normal_x * (R + 1)
+                    ty = closest_y + normal_y * (R + 1)
+                    reward += T[seg + 6]
+                    last = j
+                    p, end = _grid_range(T, segment_grid, tx, ty)
+
+        # _check_bottom_collision
+        if ty + R >= FY:
+            if not (left_gap <= tx <= right_gap):
+                ty = FY - R
+                tvy = -tvy * WR
+
+        # _check_game_over, _check_drain (a drain relaunches the ball or resets the episode: Python)
+        if start_game:
+            t_game_over = 1 if n_balls == 0 else 0
+            if episode_cnt >= n_episodes:
+                t_running = 0
+            if episode_cnt < n_episodes and ty + R >= FY + T[T_FLIPPER_LENGTH] and left_gap <= tx <= right_gap:
+                status = NEEDS_PYTHON
+                break
+
+        # _advance_clock, gravity, motion
+        t_time = current_time + T[T_PHYSICS_DT]
+        tvy += T[T_GRAVITY_STEP]
+        tx += tvx * T[T_TICK_FRAMES]
+        ty += tvy * T[T_TICK_FRAMES]
+
+        # A stuck ball is relaunched from the RNG: Python
+        if abs(tvx) * 10 <= 0.5 and abs(tvy) * 10 <= 0.5 and ty + R >= FY:
+            status = NEEDS_PYTHON
+            break
+
+        # Friction and speed clamp
+        tvx *= T[T_FRICTION]
+        tvy *= T[T_FRICTION]
+        t_speed = math.sqrt(tvx*tvx + tvy*tvy)
+        speed_per_sec = t_speed * T[T_GAME_FPS]
+        if t_speed > T[T_MAX_SPEED]:
+            factor = T[T_MAX_SPEED] / t_speed
+            tvx *= factor
+            tvy *= factor
+
+        # Commit the tick
+        x, y, vx, vy = tx, ty, tvx, tvy
+        left_angle, right_angle = la, ra
+        current_time = t_time
+        speed = t_speed
+        tick_cnt += 1
+        cumulative_reward += reward
+        step_reward += reward
+        game_over, running = t_game_over, t_running
+        left_hits += t_left_hit
+        right_hits += t_right_hit
+        done += 1
+        # _update_leds, on the clock of this tick
+        for i in range(L.shape[1]):
+            if current_time - L[LED_LAST_TOGGLE, i] > L[LED_BLINK_INTERVAL, i]:
+                L[LED_STATE, i] = 1.0 - L[LED_STATE, i]
+                L[LED_LAST_TOGGLE, i] = current_time
+                I[LED_TOGGLES] += 1
+        if game_over or not running:
+            status = STOPPED
+            break
+
+    F[BALL_X] = x
+    F[BALL_Y] = y
+    F[BALL_VX] = vx
+    F[BALL_VY] = vy
+    F[LEFT_ANGLE] = left_angle
+    F[RIGHT_ANGLE] = right_angle
+    F[CURRENT_TIME] = current_time
+    F[CUMULATIVE_REWARD] = cumulative_reward
+    F[SPEED_PX_PER_FRAME] = speed
+    F[SPEED_PX_PER_SEC] = speed_per_sec
+    F[STEP_REWARD] = step_reward
+    I[TICK_CNT] = tick_cnt
+    I[GAME_OVER] = game_over
+    I[RUNNING] = running
+    I[LEFT_HITS] = left_hits
+    I[RIGHT_HITS] = right_hits
+    return done, status
+
+
+def run_steps(F, I, T, L, actions, out):
+    """
+    The tick loops of play_step for actions[I[STEP]:]: each action sets the
+    flipper targets, then up to I[FRAME_SKIP] ticks run through run_ticks.
+    A step interrupted by an earlier call resumes after its I[STEP_TICKS]
+    ticks, with F[STEP_REWARD] holding its reward so far. out[step] gets the
+    reward and game_over flag returned by play_step and the counts of
+    successful left and right flipper hits (it is zeroed when the step starts).
+
+    Stops after the step where the game stops running (STOPPED) or before a
+    tick that needs Python (NEEDS_PYTHON). I[STEP] is then the next step,
+    I[TICKS] the ticks run and I[LEFT_HITS], I[RIGHT_HITS], I[LED_TOGGLES]
+    the hits and LED toggles of the whole call. Returns the status.
+    """
+    s = I[STEP]
+    frame_skip = I[FRAME_SKIP]
+    start_game = I[START_GAME] == 1
+    ticks = 0
+    left_hits = 0
+    right_hits = 0
+    I[LED_TOGGLES] = 0
+    status = DONE
+    while s < actions.size:
+        action = actions[s]
+        if I[STEP_TICKS] == 0:
+            # The targets of play_step
+            F[LEFT_TARGET] = T[T_LEFT_ACTIVE] if action == 1 or action == 3 else T[T_LEFT_IDLE]
+            F[RIGHT_TARGET] = T[T_RIGHT_ACTIVE] if action == 2 or action == 3 else T[T_RIGHT_IDLE]
+            F[STEP_REWARD] = 0.0
+            out[s] = 0.0
+        done, status = run_ticks(F, I, T, L, action, frame_skip - I[STEP_TICKS], start_game)
+        ticks += done
+        I[STEP_TICKS] += done
+        out[s, OUT_LEFT_HITS] += I[LEFT_HITS]
+        out[s, OUT_RIGHT_HITS] += I[RIGHT_HITS]
+        left_hits += I[LEFT_HITS]
+        right_hits += I[RIGHT_HITS]
+        if status == NEEDS_PYTHON:
+            break
+        out[s, OUT_REWARD] = F[STEP_REWARD]
+        out[s, OUT_GAME_OVER] = I[GAME_OVER]
+        I[STEP_TICKS] = 0
+        s += 1
+        if I[RUNNING] == 0:
+            status = STOPPED
+            break
+        status = DONE
+    I[STEP] = s
+    I[TICKS] = ticks
+    I[LEFT_HITS] = left_hits
+    I[RIGHT_HITS] = right_hits
+    return status
+
+
+if numba is not None:
+    # No fastmath: reassociating or fusing the float operations would change the results.
+    # The kernels call each other through these globals, so rebinding them compiles the calls too
+    point_segment_distance = numba.njit(cache=True)(point_segment_distance)
+    reflect_vector = numba.njit(cache=True)(reflect_vector)
+    _grid_range = numba.njit(cache=True)(_grid_range)
+    _pose_index = numba.njit(cache=True)(_pose_index)
+    run_ticks = numba.njit(cache=True)(run_ticks)
+    run_steps = numba.njit(cache=True)(run_steps)
+
+
+def supports(env):
+    """Whether run_ticks reproduces env's ticks (a GameEnvironment whose physics methods are not overridden)."""
+    from PinBallGameEnvironment import GameEnvironment
+    return isinstance(env, GameEnvironment) and all(
+        getattr(type(env), name) is getattr(GameEnvironment, name) for name in REPLACED)
+
+
+class StepKernel():
+    """
+    Runs the tick loops of play_step through run_steps: run() for one step,
+    run_steps() for a sequence of actions in one kernel call, so the state is
+    copied into the kernel and back only around the ticks that need Python.
+
+    Table constants, flipper pose tables, layout segments and the broad-phase
+    grids are packed when the kernel is built; the bumpers and the LEDs are
+    packed again whenever the environment replaces their lists (on every
+    reset) and the LEDs after a Python tick; the LED states and toggle times
+    go back to the LED dicts after a call that toggled any.
+    """
+    def __init__(self, env):
+        left, right = env._left_flipper, env._right_flipper
+        bumper_grid, segment_grid = _grid_table(env._bumper_grid), _grid_table(env._segment_grid)
+        segments = np.array(env.segments, dtype=np.float64).reshape(-1, 7)
+        n_bumpers = len(env.layout.bumpers)
+        header = [
+            env.BALL_RADIUS, env.WIDTH, env.WALL_RESTITUTION, env.FLIPPERs_Y, env.FLIPPER_LENGTH,
+            env.left_gap, env.right_gap,
+            env.FLIPPER_ROTATION_SPEED * env.flipper_rotation_speed_frac * env.TICK_FRAMES,
+            env.FLIPPER_BOOST, env.POS_REWARD, env.GRAVITY * env.TICK_FRAMES, env.TICK_FRAMES,
+            env.FRICTION ** env.TICK_FRAMES, env.MAX_SPEED_PX_PER_FRAME, env.GAME_FPS, env.PHYSICS_DT,
+            *env._left_pivot_xy, *env._right_pivot_xy, env.N_EPISODES,
+            env.LEFT_IDLE_ANGLE, env.LEFT_ACTIVE_ANGLE, env.RIGHT_IDLE_ANGLE, env.RIGHT_ACTIVE_ANGLE,
+        ]
+        parts = [np.concatenate((left.angles, left._bx, left._by)), np.concatenate((right.angles, right._bx, right._by)),
+                 np.zeros(4 * n_bumpers), segments.ravel(), bumper_grid, segment_grid]
+        offsets = T_HEADER + np.concatenate(([0], np.cumsum([part.size for part in parts])))
+        header += [offsets[0], left.angles.size, offsets[1], right.angles.size, offsets[2], n_bumpers,
+                   offsets[3], len(segments), offsets[4], offsets[5]]
+        self.T = np.concatenate([np.array(header, dtype=np.float64)] + parts)
+        self._bumpers = self.T[offsets[2]:offsets[3]].reshape(4, n_bumpers)
+        self._bumpers_of = None
+        self.F = np.zeros(13)
+        self.I = np.zeros(13, dtype=np.int64)
+        self.L = np.zeros((3, env.num_leds))
+        self._leds_of = None
+        self.ticks = 0
+        # Buffers of run() (one step)
+        self._action = np.zeros(1, dtype=np.int64)
+        self._out = np.zeros((1, 4))
+
+    # struct packs the attributes into F and I several times faster than a slice assignment
+    _F_STATE = struct.Struct('%dd' % STEP_REWARD)
+    _I_STATE = struct.Struct('%dq' % LEFT_HITS)
+    _I_START = struct.Struct('%dq' % (STEP_TICKS + 1))
+
+    def _load(self, env, start = False):
+        # env -> F, I (the step in progress, F[STEP_REWARD] and I[STEP:], is kept unless this
+        # starts a call)
+        if env.bumpers is not self._bumpers_of:
+            self._bumpers_of = env.bumpers
+            for i, name in enumerate(('x', 'y', 'radius', 'bounce')):
+                self._bumpers[i] = [bumper[name] for bumper in env.bumpers]
+        if env.leds is not self._leds_of:
+            self._load_leds(env)
+        self._F_STATE.pack_into(self.F, 0, env.ball_x, env.ball_y, env.ball_vx_px_per_frame,
+                                env.ball_vy_px_per_frame, env.left_flipper_angle, env.right_flipper_angle,
+                                env.left_flipper_target, env.right_flipper_target, env.current_time,
+                                env.cumulative_reward, env.ball_speed_val_px_per_frame,
+                                env.ball_speed_val_px_per_sec)
+        state = (env.time_tick_cnt, env.n_reamined_balls, env.episode_cnt, env.single_episode_game_over,
+                 env.RUNING, env.START_GAME, env.frame_skip)
+        if start:
+            self._I_START.pack_into(self.I, 0, *state, 0, 0, 0, 0, 0, 0)
+        else:
+            self._I_STATE.pack_into(self.I, 0, *state)
+
+    def _load_leds(self, env):
+        self._leds_of = env.leds
+        if env.leds:
+            self.L[LED_LAST_TOGGLE] = [led["last_toggle"] for led in env.leds]
+            self.L[LED_BLINK_INTERVAL] = [led["blink_interval"] for led in env.leds]
+            self.L[LED_STATE] = [led["state"] for led in env.leds]
+
+    def _store(self, env):
+        # F, I -> env; the hits of the kernel call go to the flipper counters right away, as an
+        # episode reset in a later Python tick clears them. Returns (next step, ticks run)
+        (env.ball_x, env.ball_y, env.ball_vx_px_per_frame, env.ball_vy_px_per_frame,
+         env.left_flipper_angle, env.right_flipper_angle, env.left_flipper_target, env.right_flipper_target,
+         env.current_time, env.cumulative_reward, env.ball_speed_val_px_per_frame,
+         env.ball_speed_val_px_per_sec, _) = self.F.tolist()
+        (env.time_tick_cnt, _, _, game_over, running, _, _, left_hits, right_hits,
+         led_toggles, step, ticks, _) = self.I.tolist()
+        env.single_episode_game_over = game_over == 1
+        env.RUNING = running == 1
+        env.BALL_GOT_STUCK = False
+        if left_hits:
+            env.LEFT_FLIPPER_TOUCH_NUM += left_hits
+            env.LEFT_FLIPPER_SUCCESS_HIT_NUM += left_hits
+            env.left_hit = True
+        if right_hits:
+            env.RIGHT_FLIPPER_TOUCH_NUM += right_hits
+            env.RIGHT_FLIPPER_SUCCESS_HIT_NUM += right_hits
+        if led_toggles:
+            for led, last_toggle, state in zip(env.leds, self.L[LED_LAST_TOGGLE].tolist(), self.L[LED_STATE].tolist()):
+                led["last_toggle"] = last_toggle
+                led["state"] = state == 1.0
+        return step, ticks
+
+    @staticmethod
+    def _count_presses(env, actions):
+        if actions.size:
+            env.LEFT_FLIPPER_PRESS_NUM += int(np.count_nonzero((actions == 1) | (actions == 3)))
+            env.RIGHT_FLIPPER_PRESS_NUM += int(np.count_nonzero((actions == 2) | (actions == 3)))
+
+    def run_steps(self, env, actions, out, count_presses = True):
+        """
+        The tick loops of play_step for each of `actions` (int64), flipper targets
+        included. Fills `out` ((n, 4): reward, game_over and the successful left
+        and right flipper hits, Python ticks included) per step, updates the
+        flipper counters (the press counters too with count_presses), and sets
+        env.reward and the hit flags to those of the last step. Stops after the
+        step where the game stops running. Returns the number of steps run;
+        self.ticks is the number of ticks.
+        """
+        F, I, T, L = self.F, self.I, self.T, self.L
+        n = actions.size
+        self.ticks = 0
+        pressed = 0                         # Steps whose presses are counted
+        self._load(env, start=True)
+        while True:
+            status = run_steps(F, I, T, L, actions, out)
+            s, ticks = self._store(env)
+            self.ticks += ticks
+            if status != NEEDS_PYTHON:
+                break
+            # The next tick of step s in Python (it counts its own flipper hits). The presses
+            # are counted first: a drain in this tick publishes and resets the counters
+            if count_presses:
+                self._count_presses(env, actions[pressed:s + 1])
+                pressed = s + 1
+            self.ticks += 1
+            I[STEP_TICKS] += 1
+            step_done = I[STEP_TICKS] == env.frame_skip
+            env._tick(int(actions[s]), step_done)
+            F[STEP_REWARD] += env.reward
+            out[s, OUT_LEFT_HITS] += env.left_success_hit
+            out[s, OUT_RIGHT_HITS] += env.right_success_hit
+            if env.single_episode_game_over or not env.RUNING or step_done:
+                out[s, OUT_REWARD] = F[STEP_REWARD]
+                out[s, OUT_GAME_OVER] = env.single_episode_game_over
+                I[STEP_TICKS] = 0
+                s += 1
+                I[STEP] = s
+                if not env.RUNING or s == n:
+                    break
+            if env.num_leds > 0:
+                self._load_leds(env)        # The Python tick may have toggled them
+            self._load(env)
+
+        if count_presses:
+            self._count_presses(env, actions[pressed:s])
+        if s:
+            env.reward, _, left_hits, right_hits = out[s - 1].tolist()
+            env.left_success_hit = left_hits > 0
+            env.right_success_hit = right_hits > 0
+        return s
+
+    def run(self, env, action):
+        """
+        The tick loop of one play_step (targets already set). Sets env.reward and
+        the hit flags for the whole step and returns the number of ticks run.
+        """
+        self._action[0] = action
+        self.run_steps(env, self._action, self._out, count_presses=False)
+        return self.ticks
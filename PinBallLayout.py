@@ -0,0 +1,164 @@
+import json
+import math
+import numpy as np
+
+# Colors (same as PinBallGameEnvironment)
+RED   = (255, 0, 0)
+GRAY  = (100, 100, 100)
+
+# Round bumpers: the ball is reflected and its speed multiplied by `bounce`
+BUMPER_DTYPE = np.dtype([('x', '<f8'), ('y', '<f8'), ('radius', '<f8'), ('bounce', '<f8'), ('color', 'u1', (3,))])
+# Straight obstacles (walls, rails, slingshots): the ball is reflected, its speed multiplied
+# by `restitution`, and `kick` px/frame are added along the normal. `reward` is paid per hit
+SEGMENT_DTYPE = np.dtype([('ax', '<f8'), ('ay', '<f8'), ('bx', '<f8'), ('by', '<f8'),
+                          ('restitution', '<f8'), ('kick', '<f8'), ('reward', '<f8'), ('color', 'u1', (3,))])
+
+# Defaults of the segment fields per "kind" in a layout file
+SEGMENT_KINDS = {
+    'wall':      {'restitution': 0.98, 'kick': 0.0, 'reward': 0.0, 'color': GRAY},
+    'rail':      {'restitution': 0.98, 'kick': 0.0, 'reward': 0.0, 'color': GRAY},
+    'slingshot': {'restitution': 0.98, 'kick': 4.0, 'reward': 10.0, 'color': RED},
+}
+
+
+class Layout():
+    """
+    The static obstacles of a table: `bumpers` (BUMPER_DTYPE) and `segments`
+    (SEGMENT_DTYPE) as contiguous structured arrays, in pixels.
+
+    A layout file is JSON:
+        {"bumpers":  [{"x": 350, "y": 200, "radius": 25, "bounce": 1.2, "color": [0, 0, 255]}, ...],
+         "segments": [{"kind": "slingshot", "ax": 120, "ay": 600, "bx": 170, "by": 660}, ...]}
+    Missing segment fields are taken from SEGMENT_KINDS[kind] (default "wall").
+    """
+    def __init__(self, bumpers = (), segments = ()):
+        self.bumpers = np.array([tuple(b) for b in bumpers], dtype=BUMPER_DTYPE)
+        self.segments = np.array([tuple(s) for s in segments], dtype=SEGMENT_DTYPE)
+
+    @classmethod
+    def classic(cls, width, height, bumpers_radius = (25, 20, 20)):
+        """The original three-bumper table."""
+        return cls(bumpers=[
+            (width // 2, height //5, bumpers_radius[0], 1.2, (0, 0, 255)),       # Blue bumper in center
+            (width // 4, height //3, bumpers_radius[1], 1.2, (255, 0, 255)),     # Magenta bumper left
+            (3 * width // 4, height //3, bumpers_radius[2], 1.2, (255, 255, 0)), # Yellow bumper right
+        ])
+
+    @classmethod
+    def from_dict(cls, data):
+        bumpers = [(b['x'], b['y'], b['radius'], b.get('bounce', 1.2), tuple(b.get('color', RED)))
+                   for b in data.get('bumpers', [])]
+        segments = []
+        for s in data.get('segments', []):
+            defaults = SEGMENT_KINDS[s.get('kind', 'wall')]
+            segments.append((s['ax'], s['ay'], s['bx'], s['by'],
+                             s.get('restitution', defaults['restitution']), s.get('kick', defaults['kick']),
+                             s.get('reward', defaults['reward']), tuple(s.get('color', defaults['color']))))
+        return cls(bumpers, segments)
+
+    def to_dict(self):
+        bumpers = [{'x': x, 'y': y, 'radius': radius, 'bounce': bounce, 'color': color.tolist()}
+                   for x, y, radius, bounce, color in self.bumpers.tolist()]
+        segments = [{'ax': ax, 'ay': ay, 'bx': bx, 'by': by, 'restitution': restitution,
+                     'kick': kick, 'reward': reward, 'color': color.tolist()}
+                    for ax, ay, bx, by, restitution, kick, reward, color in self.segments.tolist()]
+        return {'bumpers': bumpers, 'segments': segments}
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def bumper_boxes(self, margin = 0):
+        """(K, 4) bounding boxes [x0, y0, x1, y1] of the bumpers, grown by margin."""
+        r = self.bumpers['radius'] + margin
+        return np.stack((self.bumpers['x'] - r, self.bumpers['y'] - r,
+                         self.bumpers['x'] + r, self.bumpers['y'] + r), axis=1)
+
+    def segment_boxes(self, margin = 0):
+        """(K, 4) bounding boxes [x0, y0, x1, y1] of the segments, grown by margin."""
+        s = self.segments
+        return np.stack((np.minimum(s['ax'], s['bx']) - margin, np.minimum(s['ay'], s['by']) - margin,
+                         np.maximum(s['ax'], s['bx']) + margin, np.maximum(s['ay'], s['by']) + margin), axis=1)
+
+
+class UniformGrid():
+    """
+    Uniform-grid broad phase over static bounding boxes.
+
+    The table is cut into square cells of `cell_size` px. Every box is
+    registered in all cells it overlaps, so with boxes grown by the ball
+    radius, every obstacle the ball can touch is listed in the cell of the
+    ball center. Positions outside the grid are clamped to its border cells.
+
+    The cell lists are stored three ways: CSR arrays (`cell_start`,
+    `cell_items`), a (cells, max_per_cell) table `padded` filled with -1
+    for vectorized lookups, and `cells`, a list of tuples for the scalar
+    hot path. Every list is sorted by obstacle index.
+    """
+    def __init__(self, boxes, width, height, cell_size):
+        self.cell_size = float(cell_size)
+        self.cols = max(1, int(math.ceil(width / self.cell_size)))
+        self.rows = max(1, int(math.ceil(height / self.cell_size)))
+        n_cells = self.cols * self.rows
+
+        members = [[] for _ in range(n_cells)]
+        for i, (x0, y0, x1, y1) in enumerate(np.asarray(boxes, dtype=float).reshape(-1, 4)):
+            c0, r0 = self._col(x0), self._row(y0)
+            c1, r1 = self._col(x1), self._row(y1)
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    members[r * self.cols + c].append(i)
+
+        self.cells = [tuple(m) for m in members]
+        counts = np.array([len(m) for m in members], dtype=np.int64)
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        self.cell_items = np.array([i for m in members for i in m], dtype=np.int32)
+        self.padded = np.full((n_cells, max(1, int(counts.max(initial=0)))), -1, dtype=np.int32)
+        for c, m in enumerate(members):
+            self.padded[c, :len(m)] = m
+
+    def _col(self, x):
+        return min(self.cols - 1, max(0, int(x // self.cell_size)))
+
+    def _row(self, y):
+        return min(self.rows - 1, max(0, int(y // self.cell_size)))
+
+    def cell(self, x, y):
+        """Index of the cell containing (x, y)."""
+        return self._row(y) * self.cols + self._col(x)
+
+    def query(self, x, y):
+        """Obstacles registered in the cell of (x, y), as a sorted tuple."""
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.cells[row * self.cols + col]
+        return self.cells[self._row(y) * self.cols + self._col(x)]
+
+    def query_box(self, x0, y0, x1, y1):
+        """Obstacles registered in any cell overlapping the box, sorted."""
+        c0, c1 = self._col(x0), self._col(x1)
+        found = set()
+        for r in range(self._row(y0), self._row(y1) + 1):
+            base = r * self.cols
+            for c in range(c0, c1 + 1):
+                found.update(self.cells[base + c])
+        return sorted(found)
+
+    def cells_of(self, x, y):
+        """Vectorized cell(): cell indices of the points (x, y) given as arrays."""
+        # Truncation instead of floor is fine here: negative values are clamped to 0 either way
+        cols = (x * (1 / self.cell_size)).astype(np.int64)
+        rows = (y * (1 / self.cell_size)).astype(np.int64)
+        np.maximum(cols, 0, out=cols)
+        np.minimum(cols, self.cols - 1, out=cols)
+        np.maximum(rows, 0, out=rows)
+        np.minimum(rows, self.rows - 1, out=rows)
+        rows *= self.cols
+        rows += cols
+        return rows
@@ -0,0 +1,262 @@
+"""
+Live metrics of many environments in one shared-memory block.
+
+Every worker process owns one row of the block and is its only writer. A
+GameEnvironment created with metrics=block.writer(i) publishes its counters
+and gauges into row i every `every` play_step calls, at the end of every
+episode and on close(). Publishing copies one local record into the row
+between two increments of its sequence number (a seqlock): writers never
+wait, and a reader that sees an odd or changed sequence number copies the
+row again. Nothing is locked, nothing is sent through a pipe, and between
+two publishes play_step only decrements a countdown.
+
+Rows are padded to whole cache lines, so workers do not share lines.
+
+A monitor in any process attaches to the block by name:
+
+    python PinBallMetrics.py NAME [--interval 1]
+
+Stale values are possible on CPUs with weak memory ordering. The sequence
+check catches torn rows on x86; elsewhere a row can be off by one publish.
+"""
+import argparse
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+CACHE_LINE = 64
+HEADER_SIZE = CACHE_LINE            # uint64 row count, then padding
+
+# GameEnvironment counters summed over the episodes of a row (they restart at 0 with every episode)
+COUNTERS = ('cumulative_reward',
+            'LEFT_FLIPPER_TOUCH_NUM', 'RIGHT_FLIPPER_TOUCH_NUM',
+            'LEFT_FLIPPER_SUCCESS_HIT_NUM', 'RIGHT_FLIPPER_SUCCESS_HIT_NUM',
+            'LEFT_FLIPPER_PRESS_NUM', 'RIGHT_FLIPPER_PRESS_NUM',
+            'BALL_STUCK_NUM')
+
+
+def _padded(fields):
+    dtype = np.dtype(fields)
+    itemsize = -(-dtype.itemsize // CACHE_LINE) * CACHE_LINE
+    return np.dtype({'names': dtype.names, 'formats': [dtype.fields[name][0] for name in dtype.names],
+                     'offsets': [dtype.fields[name][1] for name in dtype.names], 'itemsize': itemsize})
+
+
+# One row per writer
+METRICS_DTYPE = _padded([
+    ('seq', '<u8'),                     # Even: row consistent, odd: being written
+    ('pid', '<i8'),                     # Writer process (0: row never written)
+    ('updated', '<f8'),                 # time.time() of the last publish
+    ('closed', '?'),                    # The writer was closed
+    ('steps', '<i8'),                   # play_step calls
+    ('ticks', '<i8'),                   # Physics ticks
+    ('episodes', '<i8'),                # Finished episodes (including ones cut short by reset() or close())
+    ('steps_per_s', '<f8'),             # Gauge: play_step rate since the previous publish
+    ('last_episode_s', '<f8'),          # Gauge: simulated duration of the last finished episode
+    ('episode_s_total', '<f8'),         # Simulated duration of all finished episodes
+] + [(name, '<f8' if name == 'cumulative_reward' else '<i8') for name in COUNTERS])
+
+
+class MetricsWriter():
+    """
+    Publishes one environment (or several, one after the other) into one row.
+
+    Counters are totals over all episodes of the environments it was attached
+    to, including the running one. GameEnvironment.close() folds the running
+    episode in; close() the writer when its worker is done. Created by
+    MetricsBlock.writer().
+    """
+    def __init__(self, rows, index, every = 1000):
+        self.index = index
+        self.every = every
+        self.countdown = every          # play_step calls left until the next publish (decremented by the env)
+        self._row = rows[index:index + 1]
+        self._seq = rows['seq'][index:index + 1]
+        self._local = np.zeros(1, dtype=rows.dtype)
+        self._local['pid'] = os.getpid()
+        self._done = [0] * len(COUNTERS)   # Totals of the finished episodes
+        self.steps = 0
+        self.episodes = 0
+        self.episode_s_total = 0.0
+        self.last_episode_s = 0.0
+        self._ticks_done = 0
+        self._episode_start_tick = 0
+        self._last_publish = (time.perf_counter(), 0)
+        self.env = None
+
+    def attach(self, env):
+        """Publish `env` from now on (GameEnvironment does this for metrics=...)."""
+        if self.env is not None and self.env is not env:
+            self._ticks_done += self.env.time_tick_cnt - self._episode_start_tick
+        self.env = env
+        env.metrics = self
+        self._episode_start_tick = env.time_tick_cnt
+
+    def end_episode(self, env):
+        """Fold the counters of the episode that just ended into the totals (before the env zeroes them)."""
+        ticks = env.time_tick_cnt - self._episode_start_tick
+        if ticks == 0:
+            return                      # Nothing played since the last reset
+        done = self._done
+        for i, name in enumerate(COUNTERS):
+            done[i] += getattr(env, name)
+        self.episodes += 1
+        self.last_episode_s = ticks * env.PHYSICS_DT
+        self.episode_s_total += self.last_episode_s
+        self._ticks_done += ticks
+        self._episode_start_tick = env.time_tick_cnt
+        self.publish(env, live=False)
+
+    def publish(self, env, live = True, closed = False):
+        """Write the row now. live: add the counters of the running episode of env."""
+        self.steps += self.every - self.countdown
+        self.countdown = self.every
+        now = time.perf_counter()
+        last_time, last_steps = self._last_publish
+        local = self._local
+        if now > last_time and self.steps > last_steps:
+            local['steps_per_s'] = (self.steps - last_steps) / (now - last_time)
+            self._last_publish = (now, self.steps)
+        local['updated'] = time.time()
+        local['closed'] = closed
+        local['steps'] = self.steps
+        local['ticks'] = self._ticks_done + (env.time_tick_cnt - self._episode_start_tick)
+        local['episodes'] = self.episodes
+        local['last_episode_s'] = self.last_episode_s
+        local['episode_s_total'] = self.episode_s_total
+        for name, done in zip(COUNTERS, self._done):
+            local[name] = done + getattr(env, name) if live else done
+
+        seq = int(self._seq[0]) + 1
+        local['seq'] = seq
+        self._seq[0] = seq              # odd: readers retry
+        self._row[:] = local
+        self._seq[0] = seq + 1
+
+    def close(self):
+        """Fold the running episode and mark the row closed."""
+        if self.env is not None:
+            self.end_episode(self.env)
+            self.publish(self.env, live=False, closed=True)
+
+
+class MetricsBlock():
+    """
+    Shared-memory block of `num_rows` METRICS_DTYPE rows.
+
+    MetricsBlock(num_rows) creates a new block (name=None picks a free name).
+    MetricsBlock.attach(name) opens an existing one in another process. Only
+    the creator unlinks the block, in close().
+    """
+    def __init__(self, num_rows = None, name = None, _shm = None):
+        self.owner = _shm is None
+        if self.owner:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + num_rows * METRICS_DTYPE.itemsize)
+            np.ndarray((1,), dtype='<u8', buffer=shm.buf)[0] = num_rows
+        else:
+            shm = _shm
+            num_rows = int(np.ndarray((1,), dtype='<u8', buffer=shm.buf)[0])
+        self.shm = shm
+        self.name = shm.name
+        self.num_rows = num_rows
+        self.rows = np.ndarray((num_rows,), dtype=METRICS_DTYPE, buffer=shm.buf, offset=HEADER_SIZE)
+        if self.owner:
+            self.rows[:] = np.zeros((), dtype=METRICS_DTYPE)
+
+    @classmethod
+    def attach(cls, name, track = True):
+        """
+        Open the block `name`. track=False for a process not started by the
+        creator (e.g. a monitor in another shell), so its resource tracker does
+        not remove the block when it exits.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if not track:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(_shm=shm)
+
+    def writer(self, index, every = 1000):
+        """MetricsWriter for row `index`, publishing every `every` play_step calls."""
+        return MetricsWriter(self.rows, index, every)
+
+    def snapshot(self):
+        """Consistent copy of all rows (a row being written is read again)."""
+        rows = self.rows
+        out = rows.copy()
+        retry = (out['seq'] & 1).astype(bool) | (rows['seq'] != out['seq'])
+        while retry.any():
+            for i in np.flatnonzero(retry):
+                out[i] = rows[i]
+            time.sleep(0)
+            retry = (out['seq'] & 1).astype(bool) | (rows['seq'] != out['seq'])
+        return out
+
+    def summary(self, rows = None, stale_s = 5.0):
+        """
+        Totals over all rows, plus:
+        active: writers not closed that published within stale_s seconds;
+        steps_per_s: sum of their rates;
+        mean_episode_s, left/right_success_rate (hits per touch), stuck_per_episode.
+        """
+        rows = self.snapshot() if rows is None else rows
+        rows = rows[rows['pid'] != 0]
+        active = ~rows['closed'] & (rows['updated'] > time.time() - stale_s)
+        out = {name: rows[name].sum().item() for name in ('steps', 'ticks', 'episodes', 'episode_s_total') + COUNTERS}
+        out['writers'] = len(rows)
+        out['active'] = int(active.sum())
+        out['steps_per_s'] = float(rows['steps_per_s'][active].sum())
+        episodes = out['episodes']
+        out['mean_episode_s'] = out['episode_s_total'] / episodes if episodes else float('nan')
+        out['stuck_per_episode'] = out['BALL_STUCK_NUM'] / episodes if episodes else float('nan')
+        for side in ('LEFT', 'RIGHT'):
+            touches = out[f'{side}_FLIPPER_TOUCH_NUM']
+            hits = out[f'{side}_FLIPPER_SUCCESS_HIT_NUM']
+            out[f'{side.lower()}_success_rate'] = hits / touches if touches else float('nan')
+        return out
+
+    def table(self, stale_s = 5.0):
+        """Per-row lines and the summary as text."""
+        rows = self.snapshot()
+        lines = [f"{'row':>4}{'pid':>8}{'steps':>11}{'steps/s':>10}{'episodes':>9}{'last ep s':>10}"
+                 f"{'reward':>10}{'hit L':>7}{'hit R':>7}{'stuck':>7}"]
+        for i, row in enumerate(rows):
+            if row['pid'] == 0:
+                continue
+            state = " closed" if row['closed'] else ""
+            lines.append(f"{i:>4}{row['pid']:>8}{row['steps']:>11}{row['steps_per_s']:>10.0f}{row['episodes']:>9}"
+                         f"{row['last_episode_s']:>10.2f}{row['cumulative_reward']:>10.1f}"
+                         f"{row['LEFT_FLIPPER_SUCCESS_HIT_NUM']:>7}{row['RIGHT_FLIPPER_SUCCESS_HIT_NUM']:>7}"
+                         f"{row['BALL_STUCK_NUM']:>7}{state}")
+        s = self.summary(rows, stale_s)
+        lines.append(f"total: {s['active']}/{s['writers']} active, {s['steps_per_s']:.0f} steps/s, {s['episodes']} episodes "
+                     f"(mean {s['mean_episode_s']:.2f} s), success rate L {s['left_success_rate']:.3f} "
+                     f"R {s['right_success_rate']:.3f}, {s['stuck_per_episode']:.3f} stuck resets per episode")
+        return "\n".join(lines)
+
+    def close(self):
+        """Detach; the creator also removes the block."""
+        self.rows = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", help="shared-memory name of the block")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between reports")
+    parser.add_argument("--count", type=int, help="stop after this many reports")
+    args = parser.parse_args()
+
+    block = MetricsBlock.attach(args.name, track=False)
+    try:
+        n = 0
+        while args.count is None or n < args.count:
+            print(block.table(), "\n", flush=True)
+            n += 1
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        block.close()
@@ -0,0 +1,374 @@
+import numpy as np
+from PinBallGameEnvironment import GameEnvironment, STATE_FIELDS
+
+# Per-ball attributes: arrays of shape (num_balls,) in MultiBallGameEnvironment
+BALL_FIELDS = ('ball_x', 'ball_y', 'ball_vx_px_per_frame', 'ball_vy_px_per_frame',
+               'ball_speed_val_px_per_frame', 'ball_speed_val_px_per_sec')
+
+
+class MultiBallGameEnvironment(GameEnvironment):
+    """
+    GameEnvironment with `num_balls` balls on the table at once.
+
+    ball_x, ball_y, ball_vx_px_per_frame, ball_vy_px_per_frame and the ball
+    speeds are arrays of shape (num_balls,), and `ball_active` marks the balls
+    in play. Every collision check runs on all active balls at once with
+    NumPy. Bumpers and segments go through the same uniform grid as in
+    GameEnvironment. Ball-ball contacts are found by sort-and-sweep along x,
+    then resolved as equal-mass collisions with `ball_restitution`.
+
+    Drain: a ball that drains while others are still in play leaves the
+    table and costs NEG_REWARD. When the last ball drains, a life is lost
+    as in GameEnvironment, and all num_balls balls are launched again.
+
+    With num_balls=1 a rollout is bit-identical to GameEnvironment.
+    continuous_collision is not supported. The trajectory log records ball 0.
+    """
+    def __init__(self, num_balls = 4, ball_restitution = 0.95, **env_kwargs):
+        if env_kwargs.get('continuous_collision'):
+            raise ValueError("continuous_collision is not supported with multiball")
+        self.num_balls = num_balls
+        self.BALL_RESTITUTION = ball_restitution
+        self.ball_active = np.zeros(num_balls, dtype=bool)
+        self._state_fields = tuple(field if field[0] not in BALL_FIELDS else (field[0], field[1], (num_balls,))
+                                   for field in STATE_FIELDS) + (('ball_active', '?', (num_balls,)),)
+        self._launch_x = None
+        super().__init__(**env_kwargs)
+
+
+    # --- Balls ---
+    def _launch_positions(self):
+        # Launch spots in rows of balls 3 radii apart, centered on the single-ball launch spot
+        spacing = 3 * self.BALL_RADIUS
+        per_row = max(1, min(self.num_balls, int((self.WIDTH - 2*self.BALL_RADIUS) // spacing)))
+        i = np.arange(self.num_balls)
+        col, row = i % per_row, i // per_row
+        x = self.BALL_INIT_X + (col - (per_row - 1) / 2) * spacing
+        y = self.BALL_INIT_Y - row * spacing
+        return x.astype(float), y.astype(float)
+
+    def _reset_ball(self, mask = None):
+        if self._launch_x is None:
+            self._launch_x, self._launch_y = self._launch_positions()
+            self.ball_x = self._launch_x.copy()
+            self.ball_y = self._launch_y.copy()
+            self.ball_vx_px_per_frame = np.zeros(self.num_balls)
+            self.ball_vy_px_per_frame = np.zeros(self.num_balls)
+            self.ball_speed_val_px_per_frame = np.zeros(self.num_balls)
+            self.ball_speed_val_px_per_sec = np.zeros(self.num_balls)
+        if mask is None:
+            mask = np.ones(self.num_balls, dtype=bool)
+        k = int(mask.sum())
+        if k == 0:
+            return
+        self.ball_x[mask] = self._launch_x[mask]
+        self.ball_y[mask] = self._launch_y[mask]
+        self.ball_vx_px_per_frame[mask] = self.np_random.integers(3, 11, size=k)
+        self.ball_vy_px_per_frame[mask] = self.np_random.integers(3, 11, size=k)
+        self.ball_active[mask] = True
+
+    def _ball_positions(self):
+        return zip(self.ball_x[self.ball_active].tolist(), self.ball_y[self.ball_active].tolist())
+
+
+    # --- Vectorized collisions (active balls only) ---
+    def _collide_flippers(self, action, boost = True):
+        for side, flipper, angle in ((1, self._left_flipper, self.left_flipper_angle),
+                                     (2, self._right_flipper, self.right_flipper_angle)):
+            if action != side:
+                continue
+            idx = np.flatnonzero(self.ball_active)
+            ax, ay = flipper.pivot
+            pose = flipper.pose(angle)
+            bx, by = pose.bx, pose.by
+            px, py = self.ball_x[idx], self.ball_y[idx]
+
+            # Point-segment distance
+            abx, aby = bx - ax, by - ay
+            ab2 = abx*abx + aby*aby
+            t = np.clip(((px - ax)*abx + (py - ay)*aby) / ab2, 0, 1)
+            cx, cy = ax + t*abx, ay + t*aby
+            dx, dy = px - cx, py - cy
+            dist = np.sqrt(dx*dx + dy*dy)
+
+            hit = (dist < self.BALL_RADIUS) & (dist != 0)
+            n_hits = int(hit.sum())
+            if n_hits == 0:
+                continue
+            idx, cx, cy, dx, dy, dist = idx[hit], cx[hit], cy[hit], dx[hit], dy[hit], dist[hit]
+            nx, ny = dx / dist, dy / dist
+            vx, vy = self.ball_vx_px_per_frame[idx], self.ball_vy_px_per_frame[idx]
+            dot = vx*nx + vy*ny
+            vx, vy = vx - 2*dot*nx, vy - 2*dot*ny
+            if boost:
+                vx, vy = vx * self.FLIPPER_BOOST, vy * self.FLIPPER_BOOST
+            self.ball_vx_px_per_frame[idx] = vx
+            self.ball_vy_px_per_frame[idx] = vy
+            self.ball_x[idx] = cx + nx * (self.BALL_RADIUS + 20)
+            self.ball_y[idx] = cy + ny * (self.BALL_RADIUS + 20)
+            if side == 1:
+                self.LEFT_FLIPPER_TOUCH_NUM += n_hits
+                if boost:
+                    self.left_success_hit = True
+                    self.LEFT_FLIPPER_SUCCESS_HIT_NUM += n_hits
+                    if self.verbose:
+                        print("left_success_hit")
+            else:
+                self.RIGHT_FLIPPER_TOUCH_NUM += n_hits
+                if boost:
+                    self.right_success_hit = True
+                    self.RIGHT_FLIPPER_SUCCESS_HIT_NUM += n_hits
+                    if self.verbose:
+                        print("right_success_hit")
+
+    def _check_wall_collidepoint(self):
+        left = self.ball_active & (self.ball_x - self.BALL_RADIUS <= 0)
+        self.ball_x[left] = self.BALL_RADIUS
+        self.ball_vx_px_per_frame[left] = -self.ball_vx_px_per_frame[left] * self.WALL_RESTITUTION
+        right = self.ball_active & (self.ball_x + self.BALL_RADIUS >= self.WIDTH)
+        self.ball_x[right] = self.WIDTH - self.BALL_RADIUS
+        self.ball_vx_px_per_frame[right] = -self.ball_vx_px_per_frame[right] * self.WALL_RESTITUTION
+
+    def _check_top_wall_collision(self):
+        top = self.ball_active & (self.ball_y - self.BALL_RADIUS <= 0)
+        self.ball_y[top] = self.BALL_RADIUS
+        slow = top & (np.abs(self.ball_vy_px_per_frame) < 0.2)
+        bounce = top & ~slow
+        self.ball_vy_px_per_frame[slow] = 0.2
+        self.ball_vy_px_per_frame[bounce] = -self.ball_vy_px_per_frame[bounce] * self.WALL_RESTITUTION
+
+    def _broadphase(self, grid, respond):
+        """
+        Visit, for every active ball, the obstacles listed in the grid cell of the
+        ball, in index order as GameEnvironment does. respond(balls, j) tests
+        obstacle j[k] against ball balls[k], applies the hits and returns the hit
+        mask. A ball that was moved is looked up again in its new cell.
+        """
+        balls = np.flatnonzero(self.ball_active)
+        cells = grid.cells_of(self.ball_x[balls], self.ball_y[balls])
+        keep = grid.padded[cells, 0] >= 0
+        balls, cells = balls[keep], cells[keep]
+        last = np.full(balls.size, -1, dtype=np.int64)
+        while balls.size:
+            candidates = grid.padded[cells]
+            later = candidates > last[:, None]
+            left = later.any(axis=1)
+            if not left.all():
+                balls, cells, last, candidates, later = balls[left], cells[left], last[left], candidates[left], later[left]
+                if balls.size == 0:
+                    break
+            last = candidates[np.arange(balls.size), later.argmax(axis=1)]
+            hit = respond(balls, last)
+            if hit is not None:
+                cells[hit] = grid.cells_of(self.ball_x[balls[hit]], self.ball_y[balls[hit]])
+
+    def _respond_bumpers(self, idx, j):
+        bumpers = self.layout.bumpers[j]
+        bx, by, br, bounce = bumpers['x'], bumpers['y'], bumpers['radius'], bumpers['bounce']
+        dx = self.ball_x[idx] - bx
+        dy = self.ball_y[idx] - by
+        dist = np.sqrt(dx*dx + dy*dy)
+        hit = dist < self.BALL_RADIUS + br
+        if not hit.any():
+            return None
+        idx, bx, by, br, bounce, dx, dy, dist = idx[hit], bx[hit], by[hit], br[hit], bounce[hit], dx[hit], dy[hit], dist[hit]
+        nonzero = dist != 0
+        nx = np.where(nonzero, dx / np.where(nonzero, dist, 1), dx)
+        ny = np.where(nonzero, dy / np.where(nonzero, dist, 1), dy)
+        vx, vy = self.ball_vx_px_per_frame[idx], self.ball_vy_px_per_frame[idx]
+        dot = vx*nx + vy*ny
+        self.ball_vx_px_per_frame[idx] = (vx - 2*dot*nx) * bounce
+        self.ball_vy_px_per_frame[idx] = (vy - 2*dot*ny) * bounce
+        self.ball_x[idx] = bx + nx*(self.BALL_RADIUS + br + 1)
+        self.ball_y[idx] = by + ny*(self.BALL_RADIUS + br + 1)
+        self.reward += self.POS_REWARD * len(idx)
+        return hit
+
+    def _respond_segments(self, idx, j):
+        segments = self.layout.segments[j]
+        ax, ay, bx, by = segments['ax'], segments['ay'], segments['bx'], segments['by']
+        px, py = self.ball_x[idx], self.ball_y[idx]
+        # Point-segment distance
+        abx, aby = bx - ax, by - ay
+        ab2 = abx*abx + aby*aby
+        t = np.clip(((px - ax)*abx + (py - ay)*aby) / np.where(ab2 == 0, 1, ab2), 0, 1)
+        cx, cy = ax + t*abx, ay + t*aby
+        dx, dy = px - cx, py - cy
+        dist = np.sqrt(dx*dx + dy*dy)
+        hit = (dist < self.BALL_RADIUS) & (dist != 0)
+        if not hit.any():
+            return None
+        idx, segments, cx, cy, dx, dy, dist = idx[hit], segments[hit], cx[hit], cy[hit], dx[hit], dy[hit], dist[hit]
+        nx, ny = dx / dist, dy / dist
+        vx, vy = self.ball_vx_px_per_frame[idx], self.ball_vy_px_per_frame[idx]
+        # Reflect only balls moving into the segment
+        dot = np.minimum(vx*nx + vy*ny, 0)
+        self.ball_vx_px_per_frame[idx] = (vx - 2*dot*nx) * segments['restitution'] + segments['kick'] * nx
+        self.ball_vy_px_per_frame[idx] = (vy - 2*dot*ny) * segments['restitution'] + segments['kick'] * ny
+        self.ball_x[idx] = cx + nx * (self.BALL_RADIUS + 1)
+        self.ball_y[idx] = cy + ny * (self.BALL_RADIUS + 1)
+        self.reward += float(segments['reward'].sum())
+        return hit
+
+    def _check_bumpers_collision(self):
+        self._broadphase(self._bumper_grid, self._respond_bumpers)
+
+    def _check_segments_collision(self):
+        self._broadphase(self._segment_grid, self._respond_segments)
+
+    def _check_balls_collision(self):
+        """
+        Ball-ball contacts. Broad phase: sort the active balls by x and sweep;
+        pairs k places apart in that order are only candidates while some of
+        them are closer than one diameter in x. Narrow phase and response are
+        vectorized over all candidate pairs.
+        """
+        balls = np.flatnonzero(self.ball_active)
+        if balls.size < 2:
+            return
+        order = balls[np.argsort(self.ball_x[balls], kind='stable')]
+        xs = self.ball_x[order]
+        diameter = 2 * self.BALL_RADIUS
+        first, second = [], []
+        for k in range(1, order.size):
+            close = np.flatnonzero(xs[k:] - xs[:-k] < diameter)
+            if close.size == 0:
+                break
+            first.append(order[close])
+            second.append(order[close + k])
+        if not first:
+            return
+        i = np.concatenate(first)
+        j = np.concatenate(second)
+
+        dx = self.ball_x[i] - self.ball_x[j]
+        dy = self.ball_y[i] - self.ball_y[j]
+        d2 = dx*dx + dy*dy
+        touch = (d2 < diameter*diameter) & (d2 > 0)
+        if not touch.any():
+            return
+        i, j, dx, dy = i[touch], j[touch], dx[touch], dy[touch]
+        dist = np.sqrt(d2[touch])
+        nx, ny = dx / dist, dy / dist
+
+        # Push the two balls apart, half the overlap each
+        push = (diameter - dist) / 2
+        np.add.at(self.ball_x, i, nx * push)
+        np.add.at(self.ball_y, i, ny * push)
+        np.subtract.at(self.ball_x, j, nx * push)
+        np.subtract.at(self.ball_y, j, ny * push)
+
+        # Equal masses: exchange the approaching part of the normal velocity
+        vn = ((self.ball_vx_px_per_frame[i] - self.ball_vx_px_per_frame[j]) * nx
+              + (self.ball_vy_px_per_frame[i] - self.ball_vy_px_per_frame[j]) * ny)
+        impulse = np.where(vn < 0, -(1 + self.BALL_RESTITUTION) / 2 * vn, 0)
+        np.add.at(self.ball_vx_px_per_frame, i, impulse * nx)
+        np.add.at(self.ball_vy_px_per_frame, i, impulse * ny)
+        np.subtract.at(self.ball_vx_px_per_frame, j, impulse * nx)
+        np.subtract.at(self.ball_vy_px_per_frame, j, impulse * ny)
+
+    def _check_bottom_collision(self):
+        in_gap = (self.left_gap <= self.ball_x) & (self.ball_x <= self.right_gap)
+        hit = self.ball_active & (self.ball_y + self.BALL_RADIUS >= self.FLIPPERs_Y) & ~in_gap
+        self.ball_y[hit] = self.FLIPPERs_Y - self.BALL_RADIUS
+        self.ball_vy_px_per_frame[hit] = -self.ball_vy_px_per_frame[hit] * self.WALL_RESTITUTION
+
+    def _check_drain(self):
+        if self.episode_cnt >= self.N_EPISODES:
+            return
+        in_gap = (self.left_gap <= self.ball_x) & (self.ball_x <= self.right_gap)
+        drained = self.ball_active & (self.ball_y + self.BALL_RADIUS >= self.FLIPPERs_Y+self.FLIPPER_LENGTH) & in_gap
+        lost = int(drained.sum())
+        if lost == 0:
+            return
+        self.ball_active[drained] = False
+        self.ball_vx_px_per_frame[drained] = 0
+        self.ball_vy_px_per_frame[drained] = 0
+        if self.ball_active.any():
+            # Other balls are still in play: the drained ones just leave the table
+            self.reward += self.NEG_REWARD * lost
+            return
+        # The last ball(s) drained: a life is lost, as in GameEnvironment
+        self.reward += self.NEG_REWARD * (lost - 1)
+        self.n_reamined_balls -= 1
+        if self.n_reamined_balls > 0:
+            self.reward += self.NEG_REWARD # Penalty for game_over or passing through the drain
+            self._reset_ball()
+            if self.verbose:
+                print(f'Episode, Reamined balls: {self.episode_cnt} -> {self.n_reamined_balls}')
+        else:
+            if self.verbose:
+                print("Oops! Game Over!")
+            self.current_time = 0
+            self.single_episode_game_over = True  # Game over
+            self.episode_cnt += 1
+            if self.episode_cnt<self.N_EPISODES:
+                self._reset()
+            elif self.verbose:
+                print("No episodes left!")
+
+    def _check_if_the_ball_got_stuck_at_the_bottom(self):
+        """Mask of the active balls that came to rest on the bottom."""
+        return (self.ball_active
+                & (np.abs(self.ball_vx_px_per_frame) * 10 <= 0.5)
+                & (np.abs(self.ball_vy_px_per_frame) * 10 <= 0.5)
+                & (self.ball_y + self.BALL_RADIUS >= self.FLIPPERs_Y))
+
+
+    def _tick(self, action, render = True):
+        """One physics tick of PHYSICS_DT for all balls, in the order of GameEnvironment._tick."""
+        self.reward = 0
+
+        self._update_flippers()
+
+        self._check_flippers_collision(action)
+        self._check_wall_collidepoint()
+        self._check_top_wall_collision()
+        self._check_bumpers_collision()
+        if self.segments:
+            self._check_segments_collision()
+        self._check_balls_collision()
+        self._check_bottom_collision()
+        if self.START_GAME == True:
+            self._check_game_over()
+            self._check_drain()
+
+        if self.HEADLESS or not render:
+            self._advance_clock(wait=False)
+        else:
+            self.update_ui()
+
+        active = self.ball_active
+
+        # --- Apply Gravity ---
+        self.ball_vy_px_per_frame[active] += self.GRAVITY * self.TICK_FRAMES
+
+        # --- Update Ball Position ---
+        self.ball_x[active] += self.ball_vx_px_per_frame[active] * self.TICK_FRAMES
+        self.ball_y[active] += self.ball_vy_px_per_frame[active] * self.TICK_FRAMES
+
+        stuck = self._check_if_the_ball_got_stuck_at_the_bottom()
+        self.BALL_GOT_STUCK = bool(stuck.any())
+        if self.BALL_GOT_STUCK:
+            self.BALL_STUCK_NUM += int(stuck.sum())
+            self._reset_ball(stuck)
+
+        # --- Apply Friction ---
+        friction = self.FRICTION ** self.TICK_FRAMES
+        self.ball_vx_px_per_frame *= friction
+        self.ball_vy_px_per_frame *= friction
+
+        # --- Enforce Maximum Speed ---
+        speed = np.sqrt(self.ball_vx_px_per_frame*self.ball_vx_px_per_frame + self.ball_vy_px_per_frame*self.ball_vy_px_per_frame)
+        self.ball_speed_val_px_per_frame = speed
+        self.ball_speed_val_px_per_sec = speed * self.GAME_FPS
+        fast = speed > self.MAX_SPEED_PX_PER_FRAME
+        if fast.any():
+            factor = self.MAX_SPEED_PX_PER_FRAME / speed[fast]
+            self.ball_vx_px_per_frame[fast] *= factor
+            self.ball_vy_px_per_frame[fast] *= factor
+        self.cumulative_reward += self.reward # track an episode reward
+
+        if self.SAVE_SPEED_LOG:
+            self._log_tick(action, self.ball_x[0], self.ball_y[0], self.ball_vx_px_per_frame[0], self.ball_vy_px_per_frame[0],
+                           self.ball_speed_val_px_per_sec[0])
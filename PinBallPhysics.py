@@ -0,0 +1,110 @@
+import math
+
+# Scalar collision kernels on plain Python floats.
+# For 2D vectors the per-call cost of building NumPy arrays and calling
+# np.linalg.norm is far larger than the arithmetic itself, so the hot path
+# of GameEnvironment.play_step uses these instead. None of them allocate
+# anything but the returned tuple.
+
+
+def rotate_point(x, y, angle):
+    """Rotate the 2D point (x, y) by angle (in degrees)."""
+    rad = math.radians(angle)
+    c = math.cos(rad)
+    s = math.sin(rad)
+    return (x * c - y * s,
+            x * s + y * c)
+
+
+def point_segment_distance(px, py, ax, ay, bx, by):
+    """
+    Compute the distance from point p to line segment ab.
+    Returns (distance, closest_x, closest_y)
+    """
+    abx = bx - ax
+    aby = by - ay
+    ab2 = abx*abx + aby*aby
+    if ab2 == 0:
+        dx = px - ax
+        dy = py - ay
+        return math.sqrt(dx*dx + dy*dy), ax, ay
+    t = ((px - ax)*abx + (py - ay)*aby) / ab2
+    if t < 0:
+        t = 0
+    elif t > 1:
+        t = 1
+    cx = ax + t*abx
+    cy = ay + t*aby
+    dx = px - cx
+    dy = py - cy
+    return math.sqrt(dx*dx + dy*dy), cx, cy
+
+
+def reflect_vector(vx, vy, nx, ny):
+    """Reflect vector v about normalized vector n."""
+    d = vx*nx + vy*ny
+    return vx - 2*d*nx, vy - 2*d*ny
+
+
+# --- Swept-circle time of impact ---
+# A ball at p moving by d during one step touches an obstacle at p + t*d.
+# These return the earliest t in [0, 1], or None when there is no impact
+# (no contact during the step, moving apart, or already overlapping, which
+# the discrete checks resolve).
+
+def sweep_circle_circle(px, py, dx, dy, r, cx, cy, cr):
+    """Time of impact of a circle of radius r moving by d against a circle (cx, cy, cr)."""
+    mx = px - cx
+    my = py - cy
+    rr = r + cr
+    c = mx*mx + my*my - rr*rr
+    if c <= 0:
+        return None
+    b = mx*dx + my*dy
+    if b >= 0:
+        return None
+    a = dx*dx + dy*dy
+    disc = b*b - a*c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    if t > 1:
+        return None
+    return t
+
+
+def sweep_circle_line(px, py, dx, dy, r, ax, ay, bx, by):
+    """Time of impact of a circle of radius r moving by d against the infinite line through a and b."""
+    abx = bx - ax
+    aby = by - ay
+    length = math.sqrt(abx*abx + aby*aby)
+    s0 = ((px - ax)*aby - (py - ay)*abx) / length
+    s1 = s0 + (dx*aby - dy*abx) / length
+    if s0 < 0:
+        s0, s1 = -s0, -s1
+    if s0 > r and s1 < r:
+        return (s0 - r) / (s0 - s1)
+    return None
+
+
+def sweep_circle_segment(px, py, dx, dy, r, ax, ay, bx, by, caps = True):
+    """
+    Time of impact of a circle of radius r moving by d against segment ab
+    (a capsule of radius r around ab). Without caps only the flat sides count.
+    """
+    abx = bx - ax
+    aby = by - ay
+    ab2 = abx*abx + aby*aby
+    if ab2 == 0:
+        return sweep_circle_circle(px, py, dx, dy, r, ax, ay, 0) if caps else None
+    best = sweep_circle_line(px, py, dx, dy, r, ax, ay, bx, by)
+    if best is not None:
+        u = ((px + best*dx - ax)*abx + (py + best*dy - ay)*aby) / ab2
+        if not 0 <= u <= 1:
+            best = None
+    if caps and best is None:
+        for ex, ey in ((ax, ay), (bx, by)):
+            t = sweep_circle_circle(px, py, dx, dy, r, ex, ey, 0)
+            if t is not None and (best is None or t < best):
+                best = t
+    return best
@@ -0,0 +1,177 @@
+import numpy as np
+
+# One record per predicted ball state
+ARRIVAL_DTYPE = np.dtype([
+    ('ticks', '<i8'),                    # Physics ticks until the ball reaches the flipper line (-1: not within max_ticks)
+    ('time', '<f8'),                     # Seconds until the crossing, interpolated within the last tick
+    ('x', '<f8'),                        # x of the crossing, interpolated within the last tick
+    ('in_gap', '?'),                     # x is in the drain gap between the flipper pivots
+    ('ball_x', '<f8'),                   # Ball state after `ticks` ticks, as the environment would have it
+    ('ball_y', '<f8'),
+    ('ball_vx_px_per_frame', '<f8'),
+    ('ball_vy_px_per_frame', '<f8'),
+])
+
+
+class ArrivalPredictor():
+    """
+    Predicts when and where the ball reaches the flipper line, without stepping an environment.
+
+    The flipper line is where the ball touches FLIPPERs_Y (ball center at
+    FLIPPERs_Y - BALL_RADIUS), the height at which the bottom collision and the
+    flippers take over. The ball flies freely: side walls, top wall, gravity,
+    friction and the speed clamp are applied exactly as in a physics tick of
+    `env`, in the same order and with the same float operations, so `ticks` and
+    the arrival state match stepping the environment on a table without
+    bumpers and segments and with idle flippers. Bumpers, layout segments and
+    flippers are ignored.
+
+    predict() takes batches. Blocks of states are advanced one tick at a time
+    with in-place NumPy operations on preallocated buffers, and a block is
+    compacted whenever more than half of it has arrived. Millions of recorded
+    states can be labelled in one call.
+
+    env: a GameEnvironment (or MultiBall / Batch environment) for the table constants.
+    line_y: ball-center height of the line (default FLIPPERs_Y - BALL_RADIUS).
+    max_ticks: prediction horizon.
+    block_size: states advanced together; blocks are predicted one after the other.
+    """
+    def __init__(self, env, line_y = None, max_ticks = 1200, block_size = 65536):
+        self.R = env.BALL_RADIUS
+        self.WIDTH = env.WIDTH
+        self.WALL_RESTITUTION = env.WALL_RESTITUTION
+        self.gravity_step = env.GRAVITY * env.TICK_FRAMES
+        self.k = env.TICK_FRAMES
+        self.friction = env.FRICTION ** env.TICK_FRAMES
+        self.MAX_SPEED_PX_PER_FRAME = env.MAX_SPEED_PX_PER_FRAME
+        self.PHYSICS_DT = env.PHYSICS_DT
+        self.left_gap = float(env.left_gap)
+        self.right_gap = float(env.right_gap)
+        self.line_y = env.FLIPPERs_Y - env.BALL_RADIUS if line_y is None else line_y
+        self.max_ticks = max_ticks
+        self.block_size = block_size
+
+    def predict(self, x, y, vx, vy):
+        """
+        Arrival of the balls at (x, y) with velocity (vx, vy) in px per 1/60 s frame
+        (arrays of any broadcastable shape, or scalars). Returns an ARRIVAL_DTYPE
+        array of the broadcast shape.
+        """
+        x, y, vx, vy = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (x, y, vx, vy)))
+        shape = x.shape
+        out = np.zeros(x.size, dtype=ARRIVAL_DTYPE)
+        out['ticks'] = -1
+        x, y, vx, vy = (v.ravel() for v in (x, y, vx, vy))
+        # Blocks small enough for the working set to stay in cache over all ticks
+        for start in range(0, x.size, self.block_size):
+            block = slice(start, start + self.block_size)
+            self._predict_block(out, np.arange(start, min(start + self.block_size, x.size)),
+                                x[block].copy(), y[block].copy(), vx[block].copy(), vy[block].copy())
+        return out.reshape(shape)
+
+    def _predict_block(self, out, rows, x, y, vx, vy):
+
+        R, W, WR, line = self.R, self.WIDTH, self.WALL_RESTITUTION, self.line_y
+        k, gravity_step, friction, max_speed = self.k, self.gravity_step, self.friction, self.MAX_SPEED_PX_PER_FRAME
+        buffers = None
+        tick = 0
+        while True:
+            if buffers is None:
+                # Scratch space for the working set; rebuilt (smaller) after every compaction
+                n = rows.size
+                prev_x, prev_y, tmp, speed = (np.empty(n) for _ in range(4))
+                m, done, hit = (np.zeros(n, dtype=bool) for _ in range(3))
+                buffers = True
+
+            # States at (or below) the line have arrived; they stay in the working set until most have
+            np.greater_equal(y, line, out=hit)
+            np.greater(hit, done, out=hit)                  # hit and not done
+            if hit.any():
+                idx = np.flatnonzero(hit)
+                src_x, src_y = (prev_x, prev_y) if tick else (x, y)
+                self._store(out, rows[idx], tick, src_x[idx], src_y[idx], x[idx], y[idx], vx[idx], vy[idx])
+                done |= hit
+                n_done = np.count_nonzero(done)
+                if n_done == rows.size:
+                    break
+                if 2 * n_done > rows.size:
+                    keep = ~done
+                    rows, x, y, vx, vy = rows[keep], x[keep], y[keep], vx[keep], vy[keep]
+                    buffers = None
+                    continue
+            if tick == self.max_ticks:
+                break
+            tick += 1
+
+            # --- Wall collisions (_check_wall_collidepoint, _check_top_wall_collision) ---
+            # Few states touch a wall on any tick, so the updates go through index lists.
+            # x - R <= 0 is exactly x <= R (a rounded difference keeps its sign)
+            np.less_equal(x, R, out=m)
+            if m.any():
+                i = np.flatnonzero(m)
+                x[i] = R
+                vx[i] = -vx[i] * WR
+            np.add(x, R, out=tmp)
+            np.greater_equal(tmp, W, out=m)
+            if m.any():
+                i = np.flatnonzero(m)
+                x[i] = W - R
+                vx[i] = -vx[i] * WR
+            np.less_equal(y, R, out=m)
+            if m.any():
+                i = np.flatnonzero(m)
+                y[i] = R
+                v = vy[i]
+                vy[i] = np.where(np.abs(v) < 0.2, 0.2, -v * WR)   # Nudge downward if the vertical speed is very low
+
+            # --- Gravity, position, friction and speed clamp (GameEnvironment._tick) ---
+            np.copyto(prev_x, x)
+            np.copyto(prev_y, y)
+            vy += gravity_step
+            np.multiply(vx, k, out=tmp)
+            x += tmp
+            np.multiply(vy, k, out=tmp)
+            y += tmp
+            vx *= friction
+            vy *= friction
+            np.multiply(vx, vx, out=speed)
+            np.multiply(vy, vy, out=tmp)
+            speed += tmp
+            np.sqrt(speed, out=speed)
+            np.greater(speed, max_speed, out=m)
+            if m.any():
+                i = np.flatnonzero(m)
+                factor = max_speed / speed[i]
+                vx[i] *= factor
+                vy[i] *= factor
+
+    def _store(self, out, rows, tick, px, py, x, y, vx, vy):
+        # Fraction of the last tick at which the ball center crossed the line
+        dy = y - py
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = np.where(dy > 0, (self.line_y - py) / dy, 1.0)
+        f = np.clip(f, 0.0, 1.0)
+        cross_x = px + f * (x - px)
+        out['ticks'][rows] = tick
+        out['time'][rows] = (tick - 1 + f) * self.PHYSICS_DT if tick else 0.0
+        out['x'][rows] = cross_x
+        out['in_gap'][rows] = (self.left_gap <= cross_x) & (cross_x <= self.right_gap)
+        out['ball_x'][rows] = x
+        out['ball_y'][rows] = y
+        out['ball_vx_px_per_frame'][rows] = vx
+        out['ball_vy_px_per_frame'][rows] = vy
+
+    def predict_env(self, env):
+        """predict() for the current ball(s) of env."""
+        return self.predict(env.ball_x, env.ball_y, env.ball_vx_px_per_frame, env.ball_vy_px_per_frame)
+
+    def flip_action(self, env, lead_ticks = 4):
+        """
+        Baseline controller: press the flipper on the ball's side when the ball
+        reaches the drain gap within lead_ticks ticks, else do nothing.
+        Returns an action per ball (an int for a single ball).
+        """
+        arrival = self.predict_env(env)
+        soon = (arrival['ticks'] >= 0) & (arrival['ticks'] <= lead_ticks) & arrival['in_gap']
+        action = np.where(soon, np.where(arrival['x'] < self.WIDTH / 2, 1, 2), 0)
+        return int(action) if action.ndim == 0 else action
@@ -0,0 +1,185 @@
+import os
+import re
+import glob
+import numpy as np
+
+# One record per play_step tick
+TRAJECTORY_DTYPE = np.dtype([
+    ('time_tick_cnt', '<i8'),
+    ('episode_cnt', '<i4'),
+    ('single_episode_game_over', '?'),
+    ('ball_x', '<f8'),
+    ('ball_y', '<f8'),
+    ('ball_vx_px_per_frame', '<f8'),
+    ('ball_vy_px_per_frame', '<f8'),
+    ('ball_speed_px_per_sec', '<f8'),
+    ('left_flipper_angle', '<f8'),
+    ('right_flipper_angle', '<f8'),
+    ('action', 'i1'),
+    ('reward', '<f8'),
+])
+
+CHUNK_PATTERN = 'chunk_{:06d}.npy'
+
+
+def next_index(paths):
+    """One past the highest number in the numbered file names `paths` (0 for none)."""
+    numbers = [int(m.group(1)) for m in (re.search(r'_(\d+)\.\w+$', path) for path in paths) if m]
+    return max(numbers) + 1 if numbers else 0
+
+
+class TrajectoryRecorder():
+    """
+    Buffered binary trajectory logger.
+
+    Ticks are collected in a columnar in-memory block (one preallocated
+    NumPy array per field of TRAJECTORY_DTYPE). When `flush_size` ticks are
+    buffered, or on flush()/close(), the block is written in one go as a
+    structured .npy chunk in `directory` (chunk_000000.npy, chunk_000001.npy, ...).
+    Recording into an existing directory continues after its highest-numbered
+    chunk, so gaps in the numbering never cause a chunk to be overwritten.
+    """
+    def __init__(self, directory, flush_size = 4096):
+        self.directory = directory
+        self.flush_size = flush_size
+        os.makedirs(directory, exist_ok=True)
+        self.chunk_cnt = next_index(glob.glob(os.path.join(directory, 'chunk_*.npy')))
+
+        self.columns = {name: np.empty(flush_size, dtype=TRAJECTORY_DTYPE[name]) for name in TRAJECTORY_DTYPE.names}
+        # Bound column arrays, in TRAJECTORY_DTYPE order, for the per-tick write
+        self._cols = [self.columns[name] for name in TRAJECTORY_DTYPE.names]
+        self.n = 0
+        self.ticks_total = 0
+
+    def record(self, *values):
+        """Append one tick; values in the field order of TRAJECTORY_DTYPE."""
+        i = self.n
+        for col, value in zip(self._cols, values):
+            col[i] = value
+        self.n = i + 1
+        if self.n == self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered ticks as one chunk file."""
+        if self.n == 0:
+            return
+        block = np.empty(self.n, dtype=TRAJECTORY_DTYPE)
+        for name in TRAJECTORY_DTYPE.names:
+            block[name] = self.columns[name][:self.n]
+        np.save(os.path.join(self.directory, CHUNK_PATTERN.format(self.chunk_cnt)), block)
+        self.chunk_cnt += 1
+        self.ticks_total += self.n
+        self.n = 0
+
+    def close(self):
+        self.flush()
+
+
+class TrajectoryReader():
+    """
+    Memory-mapped reader for the chunks written by TrajectoryRecorder.
+
+    Nothing is loaded into RAM up front: every chunk is opened with
+    np.load(mmap_mode='r'). Ticks are addressed by a global index over all
+    chunks. A slice that lies inside one chunk is returned as a zero-copy view
+    of the memory map. A slice that crosses chunk borders is concatenated,
+    which copies it.
+
+    `episodes` is an (E, 2) array of [start, stop) global tick indices. A new
+    episode starts at the tick where single_episode_game_over rises (the
+    environment resets within that tick, so it already holds the new
+    episode), and wherever time_tick_cnt restarts (a new recording session).
+    The last drain of a game is not followed by a reset: its tick and the
+    game-over ticks after it belong to no episode.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        paths = sorted(glob.glob(os.path.join(directory, 'chunk_*.npy')))
+        self.chunks = [np.load(path, mmap_mode='r') for path in paths]
+        lengths = np.array([len(chunk) for chunk in self.chunks], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.n_ticks = int(self.offsets[-1])
+        self.episodes = self._index_episodes()
+
+    def __len__(self):
+        return self.n_ticks
+
+    def _index_episodes(self):
+        # Scanned chunk by chunk, so only two columns of one chunk are in RAM at a time
+        starts = np.zeros(0, dtype=np.int64)
+        playing = np.zeros(0, dtype=bool)      # Episode has a tick that is not game over
+        prev_game_over, prev_tick = False, None
+        for c, chunk in enumerate(self.chunks):
+            if len(chunk) == 0:
+                continue
+            base = int(self.offsets[c])
+            game_over = np.asarray(chunk['single_episode_game_over'])
+            ticks = np.asarray(chunk['time_tick_cnt'])
+            prev_go = np.concatenate(([prev_game_over], game_over[:-1]))
+            is_start = game_over & ~prev_go
+            is_start[1:] |= ticks[1:] <= ticks[:-1]
+            is_start[0] |= prev_tick is None or ticks[0] <= prev_tick
+            episode = len(starts) - 1 + np.cumsum(is_start)
+            starts = np.concatenate((starts, base + np.flatnonzero(is_start)))
+            playing = np.concatenate((playing, np.zeros(int(is_start.sum()), dtype=bool)))
+            playing[episode[~game_over]] = True
+            prev_game_over, prev_tick = bool(game_over[-1]), int(ticks[-1])
+
+        stops = np.concatenate((starts[1:], [self.n_ticks])).astype(np.int64)
+        # Drop the game-over-only ticks recorded from the last drain on (no reset follows it)
+        return np.stack((starts[playing], stops[playing]), axis=1)
+
+    @property
+    def n_episodes(self):
+        return len(self.episodes)
+
+    def slice(self, start, stop):
+        """Ticks [start, stop) by global index; a view when they lie in one chunk."""
+        start = max(0, start)
+        stop = min(self.n_ticks, stop)
+        if stop <= start:
+            return np.zeros(0, dtype=TRAJECTORY_DTYPE)
+        first = int(np.searchsorted(self.offsets, start, side='right')) - 1
+        last = int(np.searchsorted(self.offsets, stop - 1, side='right')) - 1
+        if first == last:
+            base = self.offsets[first]
+            return self.chunks[first][start - base:stop - base]
+        parts = []
+        for c in range(first, last + 1):
+            base = self.offsets[c]
+            parts.append(self.chunks[c][max(start, base) - base:min(stop, self.offsets[c + 1]) - base])
+        return np.concatenate(parts)
+
+    def episode(self, index, tick_start = 0, tick_stop = None):
+        """Ticks [tick_start, tick_stop) of episode `index`, relative to its first tick."""
+        start, stop = self.episodes[index]
+        if tick_stop is None:
+            tick_stop = stop - start
+        return self.slice(start + tick_start, min(stop, start + tick_stop))
+
+    def restore(self, env, record):
+        """Put one recorded tick back into a GameEnvironment."""
+        env.time_tick_cnt = int(record['time_tick_cnt'])
+        env.episode_cnt = int(record['episode_cnt'])
+        env.single_episode_game_over = bool(record['single_episode_game_over'])
+        env.ball_x = float(record['ball_x'])
+        env.ball_y = float(record['ball_y'])
+        env.ball_vx_px_per_frame = float(record['ball_vx_px_per_frame'])
+        env.ball_vy_px_per_frame = float(record['ball_vy_px_per_frame'])
+        env.left_flipper_angle = float(record['left_flipper_angle'])
+        env.right_flipper_angle = float(record['right_flipper_angle'])
+        action = int(record['action'])
+        env.left_flipper_target = env.LEFT_ACTIVE_ANGLE if action in (1, 3) else env.LEFT_IDLE_ANGLE
+        env.right_flipper_target = env.RIGHT_ACTIVE_ANGLE if action in (2, 3) else env.RIGHT_IDLE_ANGLE
+        env.reward = float(record['reward'])
+
+    def replay(self, env, records, fps = None):
+        """
+        Show recorded ticks in the environment window, one frame per tick.
+        fps limits the playback rate (defaults to env.GAME_FPS).
+        """
+        for record in records:
+            self.restore(env, record)
+            env.render()
+            env.clock.tick(env.GAME_FPS if fps is None else fps)
@@ -0,0 +1,85 @@
+import threading
+import time
+import pygame
+
+
+class AsyncViewer():
+    """
+    Draws a GameEnvironment from a background thread, so play_step never waits on drawing.
+
+    The viewer thread wakes up `fps` times per second, draws the latest
+    snapshot with GameEnvironment._draw() and raises frame_requested. The next
+    play_step then puts a _render_snapshot() of the table (a tuple of plain
+    Python values) into a single slot with publish(). Both are plain attribute
+    stores, atomic under the GIL: no lock, no queue and no copy of the
+    environment. Snapshots are only built when the viewer will draw them, so
+    all steps in between run at full speed. When the simulation runs slower
+    than `fps`, frames with no new snapshot are skipped. Only the viewer thread
+    touches the window.
+
+    Closing the window or clicking QUIT stops the viewer; the simulation goes
+    on. The other buttons are not handled. The window is created from the
+    viewer thread, which SDL supports on Linux and Windows but not on macOS.
+
+    frames_published, frames_drawn: counters of snapshots published and drawn.
+    """
+    def __init__(self, env, fps = 60):
+        self.env = env
+        self.fps = fps
+        self.frames_published = 0
+        self.frames_drawn = 0
+        self._latest = None
+        self.frame_requested = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PinBallViewer", daemon=True)
+        self._thread.start()
+
+    def publish(self, snapshot):
+        """Make snapshot the next frame to draw (replaces a frame not drawn yet)."""
+        self.frame_requested = False
+        self._latest = snapshot
+        self.frames_published += 1
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def close(self):
+        """Stop the viewer thread and close its window."""
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        env = self.env
+        env.screen = pygame.display.set_mode((env.WIDTH, env.HEIGHT))
+        env.background = None
+        period = 1.0 / self.fps
+        next_frame = time.perf_counter()
+        drawn = None
+        try:
+            while not self._stop.is_set():
+                snapshot = self._latest
+                if snapshot is not None and snapshot is not drawn:
+                    env._draw(snapshot)
+                    drawn = snapshot
+                    self.frames_drawn += 1
+                self.frame_requested = True
+
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self._stop.set()
+                    if event.type == pygame.MOUSEBUTTONDOWN and env.button_rect_quit.collidepoint(event.pos):
+                        self._stop.set()
+
+                # Fixed frame rate; after a slow frame, start over from now instead of catching up
+                next_frame += period
+                delay = next_frame - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_frame = time.perf_counter()
+        finally:
+            env.screen = None
+            env.background = None
+            pygame.display.quit()
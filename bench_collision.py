@@ -0,0 +1,128 @@
+"""
+Micro-benchmark of the collision core.
+
+Compares the scalar kernels in PinBallPhysics against the previous
+implementation that built small NumPy arrays and called np.linalg.norm on
+every collision test, both per kernel call and per headless play_step.
+
+    python bench_collision.py [--steps 20000] [--calls 200000]
+"""
+import argparse
+import io
+import contextlib
+import time
+import numpy as np
+
+import PinBallGameEnvironment as env
+from PinBallPhysics import rotate_point, point_segment_distance, reflect_vector
+
+
+# --- Previous NumPy-based kernels, kept here only as the baseline ---
+def np_rotate_point(point, angle):
+    rad = np.radians(angle)
+    x, y = point
+    return (x * np.cos(rad) - y * np.sin(rad),
+            x * np.sin(rad) + y * np.cos(rad))
+
+def np_point_segment_distance(p, a, b):
+    p = np.array(p, dtype=float)
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    ab = b - a
+    if np.dot(ab, ab) == 0:
+        return np.linalg.norm(p - a), a
+    t = np.dot(p - a, ab) / np.dot(ab, ab)
+    t = max(0, min(1, t))
+    closest = a + t * ab
+    return np.linalg.norm(p - closest), closest
+
+def np_reflect_vector(v, n):
+    return v - 2 * np.dot(v, n) * n
+
+
+class NumpyCollisionGame(env.GameEnvironment):
+    """GameEnvironment with the previous NumPy-based flipper and bumper checks."""
+    def _check_flippers_collision(self, action):
+        self.left_success_hit = False
+        self.right_success_hit = False
+        for flipper_action, pivot, angle in ((1, self.left_flipper_pivot, self.left_flipper_angle),
+                                             (2, self.right_flipper_pivot, self.right_flipper_angle)):
+            if action != flipper_action:
+                continue
+            tip = pivot + np.array(np_rotate_point((self.FLIPPER_LENGTH * 1.1, 0), angle))
+            dist, closest = np_point_segment_distance((self.ball_x, self.ball_y), pivot, tip)
+            if dist < self.BALL_RADIUS:
+                collision_vec = np.array([self.ball_x, self.ball_y]) - closest
+                if np.linalg.norm(collision_vec) != 0:
+                    normal = collision_vec / np.linalg.norm(collision_vec)
+                    v = np.array([self.ball_vx_px_per_frame, self.ball_vy_px_per_frame])
+                    v_reflected = np_reflect_vector(v, normal) * self.FLIPPER_BOOST
+                    self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = v_reflected
+                    self.ball_x, self.ball_y = closest + normal * (self.BALL_RADIUS + 20)
+
+    def _check_bumpers_collision(self):
+        for bumper in self.bumpers:
+            dx = self.ball_x - bumper["x"]
+            dy = self.ball_y - bumper["y"]
+            dist = np.sqrt(dx**2 + dy**2)
+            if dist < self.BALL_RADIUS + bumper["radius"]:
+                normal = np.array([dx, dy])
+                if np.linalg.norm(normal) != 0:
+                    normal = normal / np.linalg.norm(normal)
+                v = np.array([self.ball_vx_px_per_frame, self.ball_vy_px_per_frame])
+                v_reflected = np_reflect_vector(v, normal)
+                self.ball_vx_px_per_frame, self.ball_vy_px_per_frame = v_reflected * bumper["bounce"]
+                self.ball_x = bumper["x"] + normal[0]*(self.BALL_RADIUS + bumper["radius"] + 1)
+                self.ball_y = bumper["y"] + normal[1]*(self.BALL_RADIUS + bumper["radius"] + 1)
+                self.reward += self.POS_REWARD
+
+
+def time_calls(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def time_steps(cls, n_steps):
+    game = cls(width=256, height=656, bottom_area_height=250, camera_height=256, ball_radius=12,
+               bumpers_radius=[15, 12, 12], max_ball_speed=1_000, num_episodes=10**9,
+               headless=True, verbose=False)
+    actions = np.random.default_rng(0).integers(0, 4, size=n_steps).tolist()
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        for action in actions:
+            game.play_step(action)
+        elapsed = time.perf_counter() - t0
+    return elapsed / n_steps * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=20_000)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    p, a, b = (100.0, 200.0), (64.0, 324.0), (130.0, 290.0)
+    v, n = (3.0, -4.0), (0.6, 0.8)
+    v_np, n_np = np.array(v), np.array(n)
+    kernels = [
+        ("rotate_point",
+         lambda: np_rotate_point((90.0, 0), 45),
+         lambda: rotate_point(90.0, 0, 45)),
+        ("point_segment_distance",
+         lambda: np_point_segment_distance(p, a, b),
+         lambda: point_segment_distance(p[0], p[1], a[0], a[1], b[0], b[1])),
+        ("reflect_vector",
+         lambda: np_reflect_vector(v_np, n_np),
+         lambda: reflect_vector(v[0], v[1], n[0], n[1])),
+    ]
+    print(f"{'kernel':<26}{'numpy ns':>12}{'scalar ns':>12}{'speedup':>10}")
+    for name, old, new in kernels:
+        t_old = time_calls(old, args.calls)
+        t_new = time_calls(new, args.calls)
+        print(f"{name:<26}{t_old:>12.0f}{t_new:>12.0f}{t_old / t_new:>9.1f}x")
+
+    t_old = time_steps(NumpyCollisionGame, args.steps)
+    t_new = time_steps(env.GameEnvironment, args.steps)
+    print(f"{'headless play_step':<26}{t_old * 1000:>12.0f}{t_new * 1000:>12.0f}{t_old / t_new:>9.1f}x")
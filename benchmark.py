@@ -0,0 +1,310 @@
+"""
+Benchmark suite for the simulation.
+
+Runs scripted policies against GameEnvironment and reports, per case:
+steps per second, p50 / p99 play_step latency, episodes per second and
+peak memory (RSS). The cases cover
+  - headless vs. rendered (render() after every step, on the dummy SDL
+    video driver unless --show is given),
+  - a single table vs. BatchGameEnvironment with --batch tables,
+  - 1..--workers worker processes, each stepping its own table,
+  - SubprocVectorEnv with --vector-envs envs in 1..--workers worker
+    processes, one step per command and --vector-block steps per command
+    (step_block), so the cost of the pipe round trips is measured.
+
+Every case runs in freshly spawned processes, so peak memory is per case
+and workers start together behind a barrier. Steps per second count table
+steps (a batched call advances --batch tables, a vector env command
+--vector-envs envs times its steps) over the wall time of the step loop,
+policy included. Vector env latencies are per vector step (a command's
+time divided by its steps); they only run the random policy. Results are printed and written to --out as
+JSON; --baseline prints the speedup against an earlier results file.
+
+Policies:
+  random   uniform random action on every step
+  idle     never press a flipper
+  bot      press the flipper on the ball's side while it falls towards the flippers
+
+    python benchmark.py [--steps 20000] [--workers 4] [--batch 64] [--vector-envs 8] [--vector-block 32]
+                        [--out benchmark.json] [--baseline old.json]
+"""
+import argparse
+import datetime
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+try:
+    import resource
+except ImportError:                 # Windows
+    resource = None
+
+POLICIES = ("random", "idle", "bot")
+
+
+# --- Policies: policy(game, i) -> action for step i (an int, or an (N,) array for a batch) ---
+def make_policy(name, game, seed, steps):
+    batched = hasattr(game, "N")
+    if name == "random":
+        # Drawn up front, so the step loop measures the environment and not the RNG
+        actions = np.random.default_rng(seed).integers(0, 4, size=(steps, game.N) if batched else steps)
+        if not batched:
+            actions = actions.tolist()
+        return lambda game, i: actions[i]
+    if name == "idle":
+        idle = np.zeros(game.N, dtype=np.int64) if batched else 0
+        return lambda game, i: idle
+    if name == "bot":
+        line = game.FLIPPERs_Y - 3 * game.BALL_RADIUS
+        middle = game.WIDTH / 2
+        if batched:
+            def bot(game, i):
+                falling = (game.ball_vy_px_per_frame > 0) & (game.ball_y > line)
+                return np.where(falling, np.where(game.ball_x < middle, 1, 2), 0)
+        else:
+            def bot(game, i):
+                if game.ball_vy_px_per_frame > 0 and game.ball_y > line:
+                    return 1 if game.ball_x < middle else 2
+                return 0
+        return bot
+    raise ValueError(f"unknown policy {name!r}")
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10   # bytes on macOS, KB elsewhere
+
+
+def run_vector_case(case, seed, barrier = None):
+    """Step a SubprocVectorEnv of case['tables'] envs in case['workers'] processes, case['block'] steps per command."""
+    from PinBallGym import SubprocVectorEnv
+    t0 = time.perf_counter()
+    block = case["block"]
+    envs = SubprocVectorEnv(case["tables"], dict(seed=seed), copy=False, num_workers=case["workers"], block_steps=block)
+    envs.reset(seed=seed)
+    setup_s = time.perf_counter() - t0
+
+    steps = case["steps"]
+    actions = np.random.default_rng(seed).integers(0, 4, size=(steps, case["tables"]))
+    latencies = []
+    episodes = 0
+    clock = time.perf_counter_ns
+    if barrier is not None:
+        barrier.wait()
+
+    started = time.time()
+    t0 = time.perf_counter()
+    for i in range(0, steps, block):
+        start = clock()
+        if block == 1:
+            terminated = envs.step(actions[i])[2]
+        else:
+            terminated = envs.step_block(actions[i:i + block])[2]
+        latencies.append((clock() - start) / min(block, steps - i))
+        episodes += int(terminated.sum())
+    elapsed = time.perf_counter() - t0
+    finished = time.time()
+    envs.close()
+
+    return {"elapsed_s": elapsed, "started": started, "finished": finished, "setup_s": setup_s, "episodes": episodes,
+            "p50_us": float(np.percentile(latencies, 50)) / 1e3,
+            "p99_us": float(np.percentile(latencies, 99)) / 1e3,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def run_case(case, seed, barrier = None):
+    """Build the table(s) of `case`, run its step loop in this process and return the measurements."""
+    if case["mode"] == "vector":
+        return run_vector_case(case, seed, barrier)
+    t0 = time.perf_counter()
+    if case["tables"] > 1:
+        from PinBallBatchEnvironment import BatchGameEnvironment
+        game = BatchGameEnvironment(num_envs=case["tables"], seed=seed)
+    else:
+        from PinBallGameEnvironment import GameEnvironment
+        game = GameEnvironment(headless=True, verbose=False, num_episodes=10**9, seed=seed)
+    render = case["mode"] == "rendered"
+    if render:
+        game.render()
+    setup_s = time.perf_counter() - t0
+
+    steps = case["steps"]
+    policy = make_policy(case["policy"], game, seed, steps)
+    latencies = np.empty(steps, dtype=np.int64)
+    episodes = 0
+    clock = time.perf_counter_ns
+    if barrier is not None:
+        barrier.wait()
+
+    started = time.time()
+    t0 = time.perf_counter()
+    if case["tables"] > 1:
+        for i in range(steps):
+            action = policy(game, i)
+            start = clock()
+            done = game.play_step(action)[1]
+            latencies[i] = clock() - start
+            episodes += int(done.sum())
+    else:
+        for i in range(steps):
+            action = policy(game, i)
+            start = clock()
+            game_over = game.play_step(action)[1]
+            if render:
+                game.render()
+            latencies[i] = clock() - start
+            # play_step resets the table itself when an episode ends
+            if game_over:
+                episodes += 1
+    elapsed = time.perf_counter() - t0
+    finished = time.time()
+    if hasattr(game, "close"):
+        game.close()
+
+    return {"elapsed_s": elapsed, "started": started, "finished": finished, "setup_s": setup_s, "episodes": episodes,
+            "p50_us": float(np.percentile(latencies, 50)) / 1e3,
+            "p99_us": float(np.percentile(latencies, 99)) / 1e3,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def _worker(case, seed, barrier, results):
+    try:
+        results.put(run_case(case, seed, barrier))
+    except Exception as e:
+        barrier.abort()                 # release the other workers instead of leaving them waiting
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_parallel(case, seed):
+    """
+    Run `case` in case['workers'] spawned processes that start stepping together; aggregate their results.
+    A vector case runs in one process: its workers are the processes of the SubprocVectorEnv.
+    """
+    ctx = mp.get_context("spawn")
+    n_procs = 1 if case["mode"] == "vector" else case["workers"]
+    barrier = ctx.Barrier(n_procs)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(case, seed + k, barrier, results)) for k in range(n_procs)]
+    for p in procs:
+        p.start()
+    parts = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    errors = [part["error"] for part in parts if "error" in part]
+    if errors:
+        raise RuntimeError(f"{case_name(case)}: {errors[0]}")
+
+    # Wall time from the first worker starting to the last one finishing (time.time() is shared across processes)
+    elapsed = max(part["elapsed_s"] for part in parts)
+    if len(parts) > 1:
+        elapsed = max(elapsed, max(part["finished"] for part in parts) - min(part["started"] for part in parts))
+    table_steps = case["steps"] * case["tables"] * n_procs
+    episodes = sum(part["episodes"] for part in parts)
+    rss = [part["peak_rss_mb"] for part in parts]
+    return dict(case,
+                name=case_name(case),
+                table_steps=table_steps,
+                episodes=episodes,
+                elapsed_s=elapsed,
+                setup_s=max(part["setup_s"] for part in parts),
+                steps_per_s=table_steps / elapsed,
+                episodes_per_s=episodes / elapsed,
+                p50_us=float(np.median([part["p50_us"] for part in parts])),
+                p99_us=max(part["p99_us"] for part in parts),
+                peak_rss_mb=None if None in rss else max(rss),
+                total_rss_mb=None if None in rss else sum(rss))
+
+
+def case_name(case):
+    name = f"{case['mode']}/{case['policy']}/tables={case['tables']}/workers={case['workers']}"
+    return name + f"/block={case['block']}" if case["mode"] == "vector" else name
+
+
+def build_cases(args):
+    cases = []
+    for policy in args.policies:
+        cases.append(dict(mode="headless", policy=policy, tables=1, workers=1, steps=args.steps))
+    if not args.no_render:
+        cases.append(dict(mode="rendered", policy="random", tables=1, workers=1, steps=args.render_steps))
+    if args.batch > 1:
+        for policy in args.policies:
+            cases.append(dict(mode="headless", policy=policy, tables=args.batch, workers=1, steps=args.batch_steps))
+    for workers in range(2, args.workers + 1):
+        cases.append(dict(mode="headless", policy="random", tables=1, workers=workers, steps=args.steps))
+    if args.vector_envs > 0:
+        for workers in range(1, min(args.workers, args.vector_envs) + 1):
+            for block in sorted({1, args.vector_block}):
+                cases.append(dict(mode="vector", policy="random", tables=args.vector_envs, workers=workers, block=block,
+                                  steps=args.vector_steps))
+    return cases
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def fmt(value, width, precision):
+    return f"{value:>{width}.{precision}f}" if value is not None else f"{'-':>{width}}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=20_000, help="play_step calls per single-table case and worker")
+    parser.add_argument("--render-steps", type=int, default=2_000, help="play_step calls of the rendered case")
+    parser.add_argument("--batch", type=int, default=64, help="tables of the batched cases (<= 1 to skip them)")
+    parser.add_argument("--batch-steps", type=int, default=2_000, help="play_step calls per batched case")
+    parser.add_argument("--vector-envs", type=int, default=8, help="envs of the SubprocVectorEnv cases (0 to skip them)")
+    parser.add_argument("--vector-block", type=int, default=32, help="steps per command of the step_block cases")
+    parser.add_argument("--vector-steps", type=int, default=4_000, help="steps per env of the vector cases")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="largest worker count")
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--no-render", action="store_true", help="skip the rendered case")
+    parser.add_argument("--show", action="store_true", help="render into a real window instead of the dummy video driver")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark.json", help="results file (JSON)")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare steps/s against")
+    args = parser.parse_args()
+
+    if not args.show:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")      # inherited by the worker processes
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["name"]: r["steps_per_s"] for r in json.load(f)["results"]}
+
+    print(f"{'case':<52}{'steps/s':>11}{'p50 us':>9}{'p99 us':>9}{'eps/s':>9}{'RSS MB':>8}"
+          + (f"{'vs base':>9}" if baseline else ""))
+    results = []
+    for case in build_cases(args):
+        result = run_parallel(case, args.seed)
+        results.append(result)
+        line = (f"{result['name']:<52}{result['steps_per_s']:>11.0f}{result['p50_us']:>9.1f}{result['p99_us']:>9.1f}"
+                f"{result['episodes_per_s']:>9.2f}{fmt(result['peak_rss_mb'], 8, 0)}")
+        if baseline:
+            base = baseline.get(result["name"])
+            line += fmt(base and result["steps_per_s"] / base, 8, 2) + ("x" if base else " ")
+        print(line, flush=True)
+
+    meta = {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args)}
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print(f"results written to {args.out}")
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PinBallBatchEnvironment import BatchGameEnvironment
+from PinBallGameEnvironment import GameEnvironment
+
+
+def test_single_table_batch_matches_game_environment():
+    kwargs = dict(width=256, height=662, bottom_area_height=250, camera_height=256, ball_radius=12,
+                  bumpers_radius=[15, 12, 12], max_ball_speed=1000, seed=7)
+    env = GameEnvironment(headless=True, verbose=False, num_episodes=10**9, **kwargs)
+    batch = BatchGameEnvironment(num_envs=1, **kwargs)
+    episodes = 0
+    for action in np.random.RandomState(3).randint(0, 4, 5000).tolist():
+        reward, game_over, _, left_hit, right_hit = env.play_step(action)
+        rewards, game_overs, left_hits, right_hits = batch.play_step(np.array([action]))
+        assert (reward, game_over, left_hit, right_hit) == (rewards[0], game_overs[0], left_hits[0], right_hits[0])
+        assert (env.ball_x, env.ball_y, env.ball_vx_px_per_frame, env.ball_vy_px_per_frame,
+                env.left_flipper_angle, env.right_flipper_angle, env.cumulative_reward, env.episode_cnt) == \
+               (batch.ball_x[0], batch.ball_y[0], batch.ball_vx_px_per_frame[0], batch.ball_vy_px_per_frame[0],
+                batch.left_flipper_angle[0], batch.right_flipper_angle[0], batch.cumulative_reward[0],
+                batch.episode_cnt[0])
+        episodes += game_over
+    assert episodes > 5
+    assert (env.LEFT_FLIPPER_PRESS_NUM, env.RIGHT_FLIPPER_SUCCESS_HIT_NUM) == \
+           (batch.LEFT_FLIPPER_PRESS_NUM[0], batch.RIGHT_FLIPPER_SUCCESS_HIT_NUM[0])
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PinBallFlippers import FlipperPoseCache
+from PinBallGameEnvironment import GameEnvironment
+from PinBallPhysics import rotate_point
+
+
+def make_caches(**kwargs):
+    # Fresh caches (not the shared ones) for the flippers of a table with slow flippers, so many angles are reachable
+    env = GameEnvironment(headless=True, verbose=False, seed=0, flipper_rotation_speed_frac=0.01)
+    step = env.FLIPPER_ROTATION_SPEED * env.flipper_rotation_speed_frac * env.TICK_FRAMES
+    return [FlipperPoseCache(env._left_pivot_xy, env.FLIPPER_LENGTH, env.FLIPPER_WIDTH, False,
+                             env.LEFT_IDLE_ANGLE, env.LEFT_ACTIVE_ANGLE, step, **kwargs),
+            FlipperPoseCache(env._right_pivot_xy, env.FLIPPER_LENGTH, env.FLIPPER_WIDTH, True,
+                             env.RIGHT_IDLE_ANGLE, env.RIGHT_ACTIVE_ANGLE, step, **kwargs)]
+
+
+def computed_pose(flipper, angle):
+    # The trigonometry the cache replaces: collision segment, its upper normal and the polygon
+    tip_x, tip_y = rotate_point(flipper.collision_length, 0, angle)
+    nx, ny = tip_y / flipper.collision_length, -tip_x / flipper.collision_length
+    if ny > 0 or (ny == 0 and nx > 0):
+        nx, ny = -nx, -ny
+    half_width = -flipper.width/2 if not flipper.mirror else flipper.width/2
+    points = [(0, 0), (flipper.length * 0.7, half_width), (flipper.length, 0), (flipper.length * 0.7, -half_width)]
+    polygon = tuple((flipper.pivot[0] + rx, flipper.pivot[1] + ry)
+                    for rx, ry in (rotate_point(x, y, angle) for x, y in points))
+    return (angle, tip_x, tip_y, flipper.pivot[0] + tip_x, flipper.pivot[1] + tip_y, nx, ny, polygon)
+
+
+def test_cached_pose_equals_computed_pose():
+    arbitrary = np.random.RandomState(0).uniform(-360, 360, 100).tolist() + [0.0, 90.0, 180.0, -90.0]
+    for flipper in make_caches(max_extra=50):
+        reachable = flipper.angles.tolist()
+        assert len(reachable) == 10
+        # Twice: the arbitrary angles are computed, then (the first 50) looked up
+        for angle in reachable + arbitrary + arbitrary:
+            assert tuple(flipper.pose(angle)) == computed_pose(flipper, angle)
+        assert len(flipper._poses) == len(reachable) + 50
+
+
+def test_segment_ends_match_poses():
+    for flipper in make_caches():
+        angles = np.concatenate((flipper.angles, [-17.25, 3.5, 200.125], flipper.angles[::-1]))
+        bx, by = flipper.segment_ends(angles)
+        assert bx.tolist() == [flipper.pose(angle).bx for angle in angles.tolist()]
+        assert by.tolist() == [flipper.pose(angle).by for angle in angles.tolist()]
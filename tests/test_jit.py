@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PinBallJit
+from PinBallGameEnvironment import GameEnvironment
+
+LAYOUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'layouts', 'example.json')
+
+
+def make_env(**kwargs):
+    kwargs = dict(dict(width=256, height=662, bottom_area_height=250, camera_height=256, ball_radius=12,
+                       bumpers_radius=[15, 12, 12], max_ball_speed=1000, num_leds=10, num_episodes=5,
+                       headless=True, verbose=False, seed=0),
+                  **kwargs)
+    env = GameEnvironment(**kwargs)
+    env.START_GAME = True
+    return env
+
+
+def play(env, actions, block):
+    # (reward, game_over, left hit, right hit) of every step, block steps per call
+    out = []
+    for i in range(0, len(actions), block):
+        if not env.RUNING:
+            break
+        if block == 1:
+            reward, game_over, _, left_hit, right_hit = env.play_step(int(actions[i]))
+            results = [(reward, game_over, left_hit, right_hit)]
+        else:
+            results = zip(*env.play_steps(actions[i:i + block]))
+        out += [(float(reward), bool(game_over), bool(left_hit), bool(right_hit))
+                for reward, game_over, left_hit, right_hit in results]
+    return out
+
+
+@pytest.mark.parametrize('frame_skip', [1, 4, 8])
+@pytest.mark.parametrize('layout', [None, LAYOUT])
+def test_jit_matches_python(frame_skip, layout):
+    pytest.importorskip('numba')
+    kwargs = dict(frame_skip=frame_skip, layout=layout, num_episodes=20)
+    if layout is not None:
+        kwargs.update(width=700, height=1000, bottom_area_height=150, camera_height=128)
+    actions = np.random.RandomState(1).randint(0, 4, 4000)
+    for block in (1, 7, 1000):
+        python, jit = make_env(**kwargs), make_env(jit=True, **kwargs)
+        assert jit.jit and not python.jit
+        assert play(jit, actions, block) == play(python, actions, 1)
+        assert jit.get_state().tobytes() == python.get_state().tobytes()
+        assert (jit.LEFT_FLIPPER_PRESS_NUM, jit.RIGHT_FLIPPER_PRESS_NUM, jit.episode_cnt) == \
+               (python.LEFT_FLIPPER_PRESS_NUM, python.RIGHT_FLIPPER_PRESS_NUM, python.episode_cnt)
+
+
+def test_play_steps_matches_play_step_loop():
+    actions = np.random.RandomState(2).randint(0, 4, 3000)
+    env, expected = make_env(frame_skip=2), make_env(frame_skip=2)
+    assert play(env, actions, 500) == play(expected, actions, 1)
+    assert env.get_state().tobytes() == expected.get_state().tobytes()
+
+
+def test_without_numba_falls_back_to_python(monkeypatch):
+    monkeypatch.setattr(PinBallJit, 'AVAILABLE', False)
+    env = make_env(jit=True, frame_skip=4)
+    assert not env.jit
+    actions = np.random.RandomState(3).randint(0, 4, 500)
+    assert play(env, actions, 100) == play(make_env(frame_skip=4), actions, 1)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+import pygame
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PinBallGameEnvironment import GameEnvironment
+from PinBallMultiBall import MultiBallGameEnvironment
+
+
+def make_kwargs(**kwargs):
+    return dict(dict(width=256, height=662, bottom_area_height=250, camera_height=256, ball_radius=12,
+                     bumpers_radius=[15, 12, 12], max_ball_speed=1000, num_leds=30, show_fov=True, headless=True,
+                     verbose=False, seed=0),
+                **kwargs)
+
+
+def check_dirty_rects(env, steps = 200):
+    # Each frame drawn over the previous one (dirty rectangles) equals a full redraw of the same state
+    env.START_GAME = True
+    for i in range(steps):
+        env.play_step((i // 7) % 4)
+        env.render()
+        frame = pygame.surfarray.array3d(env.screen)
+        env.background = None
+        env.render()
+        np.testing.assert_array_equal(frame, pygame.surfarray.array3d(env.screen))
+
+
+def test_dirty_rect_render_matches_full_redraw():
+    check_dirty_rects(GameEnvironment(**make_kwargs()))
+
+
+def test_multiball_dirty_rect_render_matches_full_redraw():
+    check_dirty_rects(MultiBallGameEnvironment(num_balls=6, **make_kwargs()))
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PinBallGameEnvironment import GameEnvironment
+
+
+def make_env(**kwargs):
+    kwargs = dict(dict(width=256, height=662, bottom_area_height=250, camera_height=256, ball_radius=12,
+                       bumpers_radius=[15, 12, 12], max_ball_speed=1000, headless=True, verbose=False, seed=0),
+                  **kwargs)
+    env = GameEnvironment(**kwargs)
+    env.START_GAME = True
+    return env
+
+
+def rollout(env, actions):
+    return np.array([(env.ball_x, env.ball_y, env.ball_vx_px_per_frame, env.ball_vy_px_per_frame, env.play_step(a)[0])
+                     for a in actions])
+
+
+def test_replay_after_set_state_with_fractional_bumper_radii():
+    env = make_env(bumpers_radius=[18.5, 12.5, 12.5])
+    actions = np.random.RandomState(0).randint(0, 4, 3000)
+    rollout(env, actions[:100])
+    state = env.get_state().tobytes()
+    first = rollout(env, actions[100:])
+
+    env.set_state(state)
+    assert [bumper["radius"] for bumper in env.bumpers] == [18.5, 12.5, 12.5]
+    np.testing.assert_array_equal(rollout(env, actions[100:]), first)
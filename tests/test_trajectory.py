@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PinBallGameEnvironment import GameEnvironment
+from PinBallTrajectory import TrajectoryReader
+
+
+def record_game(directory, num_episodes, seed):
+    env = GameEnvironment(width=256, height=662, bottom_area_height=250, camera_height=256, ball_radius=12,
+                          bumpers_radius=[15, 12, 12], max_ball_speed=1000, num_episodes=num_episodes,
+                          headless=True, verbose=False, seed=seed, save_speed_log=True,
+                          log_filename=directory, log_flush_size=97)
+    env.START_GAME = True
+    rng = np.random.RandomState(seed)
+    extra_ticks = 5                     # Keep stepping a little after the last drain
+    while extra_ticks > 0:
+        env.play_step(int(rng.randint(0, 4)))
+        if not env.RUNING:
+            extra_ticks -= 1
+    env.close()
+    return env
+
+
+def test_each_episode_has_one_episode_cnt(tmp_path):
+    directory = str(tmp_path / 'log')
+    record_game(directory, num_episodes=3, seed=0)
+    record_game(directory, num_episodes=2, seed=1)  # A second session appended to the same directory
+
+    reader = TrajectoryReader(directory)
+    assert len(reader.chunks) > 1
+    assert reader.n_episodes == 5
+    counts = []
+    for start, stop in reader.episodes:
+        episode = reader.slice(start, stop)
+        assert len(np.unique(episode['episode_cnt'])) == 1
+        assert not episode['single_episode_game_over'][1:].any()
+        counts.append(int(episode['episode_cnt'][0]))
+    assert counts == [0, 1, 2, 0, 1]